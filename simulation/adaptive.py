@@ -0,0 +1,157 @@
+import random
+import numpy as np
+from typing import List, Dict, Any, Optional, Callable
+from environment import (
+    SignalCondition,
+    run_all_scenarios,
+    stream_seed
+)
+from stats import normal_quantile, wilson_interval
+from survival import convergence_time_summary
+
+
+def group_size_sweep(strategy, signal_condition: SignalCondition, max_rounds: int = 10000,
+                     params: Optional[Dict[str, Any]] = None) -> Callable[[float], Dict[str, Any]]:
+    """Setup factory for a sweep over the number of agents of one homogeneous strategy"""
+    def make_setup(num_agents):
+        return {
+            "signal_condition": signal_condition,
+            "max_rounds": max_rounds,
+            "agent_configs": [{"strategy_type": strategy, "params": dict(params or {})}
+                              for _ in range(int(num_agents))]
+        }
+    return make_setup
+
+
+def parameter_sweep(param: str, num_agents: int, strategy, signal_condition: SignalCondition,
+                    max_rounds: int = 10000, params: Optional[Dict[str, Any]] = None
+                    ) -> Callable[[float], Dict[str, Any]]:
+    """Setup factory for a sweep over one strategy parameter (e.g. "alpha") at a fixed group size"""
+    def make_setup(value):
+        return group_size_sweep(strategy, signal_condition, max_rounds,
+                                dict(params or {}, **{param: value}))(num_agents)
+    return make_setup
+
+
+def _point_summary(runs_data: List[Dict[str, Any]], max_rounds: int, level: float) -> Dict[str, Any]:
+    n = len(runs_data)
+    converged = sum(1 for run in runs_data if run["converged"])
+    times = convergence_time_summary(runs_data, max_rounds, level)
+    z = normal_quantile(0.5 + level / 2)
+    rmst_low, rmst_high = times["restricted_mean_ci"]
+    return {
+        "runs": n,
+        "convergence_rate": converged / n,
+        "convergence_rate_ci": list(wilson_interval(converged, n, level)),
+        "convergence_rate_se": float(np.sqrt(max(converged * (n - converged), 1) / n ** 3)),
+        "mean_rounds": times["restricted_mean_rounds"],
+        "mean_rounds_ci": [rmst_low, rmst_high],
+        "mean_rounds_se": (rmst_high - rmst_low) / (2 * z),
+        "km_median_rounds": times["km_median_rounds"]
+    }
+
+
+def adaptive_sweep(make_setup: Callable[[float], Dict[str, Any]], initial_points: List[float],
+                   budget_runs: int, runs_per_batch: int = 20, metric: str = "convergence_rate",
+                   integer: bool = False, min_spacing: float = 0.0, batches_per_iteration: int = 4,
+                   label: str = "x", engine: str = "scalar", n_workers: int = 1,
+                   seed: Optional[int] = None, level: float = 0.95) -> Dict[str, Any]:
+    """Coarse-to-fine 1-D sweep that spends runs where `metric` changes or is uncertain.
+
+    make_setup(x) returns an experiment setup (without name/runs_per_setup) for the swept
+    value x; see group_size_sweep and parameter_sweep. After running `runs_per_batch` runs
+    at every initial point, each iteration ranks the gaps between neighbouring points:
+
+      - a gap whose metric jump is significant (more than z standard errors) and that is
+        wider than min_spacing (integer sweeps: more than 1) is split at its midpoint,
+        ranked by the size of the jump;
+      - a gap whose jump is not (yet) significant gets another batch at both endpoints,
+        ranked by the jump's standard error, so unclear regions are resolved before they
+        are refined.
+
+    The top `batches_per_iteration` actions are run together in one run_all_scenarios
+    call (so n_workers applies across them) until `budget_runs` runs are spent.
+    metric is "convergence_rate" or "mean_rounds" (restricted mean up to max_rounds).
+    """
+    if metric not in ("convergence_rate", "mean_rounds"):
+        raise ValueError(f"Unknown metric '{metric}'. Expected 'convergence_rate' or 'mean_rounds'")
+    points = sorted(set(int(x) if integer else float(x) for x in initial_points))
+    if len(points) < 2:
+        raise ValueError("Need at least two initial points")
+    if len(points) * runs_per_batch > budget_runs:
+        raise ValueError(f"The initial grid needs {len(points) * runs_per_batch} runs, " +
+                         f"more than the budget of {budget_runs}")
+    base_seed = seed if seed is not None else random.getrandbits(63)
+    z = normal_quantile(0.5 + level / 2)
+
+    runs: Dict[float, List[Dict[str, Any]]] = {x: [] for x in points}
+    max_rounds: Dict[float, int] = {}
+    runs_used = 0
+    history = []
+    pending = list(points)
+
+    def run_batches(xs, iteration):
+        nonlocal runs_used
+        setups = []
+        for x in xs:
+            setup = dict(make_setup(x))
+            setup["name"] = f"{label}={x}"
+            setup["runs_per_setup"] = runs_per_batch
+            setups.append(setup)
+            max_rounds[x] = setup.get("max_rounds", 100000)
+        results = run_all_scenarios(setups, engine=engine, n_workers=n_workers,
+                                    seed=stream_seed(base_seed, iteration))
+        for x, setup in zip(xs, setups):
+            offset = len(runs[x])
+            for run in results[setup["name"]]["runs_data"]:
+                runs[x].append(dict(run, run_number=offset + run["run_number"], batch=iteration))
+        runs_used += runs_per_batch * len(xs)
+
+    iteration = 0
+    while pending:
+        run_batches(pending, iteration)
+        history.append({"iteration": iteration, "points": list(pending), "runs_used": runs_used})
+        iteration += 1
+
+        summaries = {x: _point_summary(runs[x], max_rounds[x], level) for x in runs}
+        xs = sorted(runs)
+        splits, replications = [], []
+        for a, b in zip(xs, xs[1:]):
+            jump = abs(summaries[b][metric] - summaries[a][metric])
+            se = np.hypot(summaries[a][f"{metric}_se"], summaries[b][f"{metric}_se"])
+            midpoint = (a + b) // 2 if integer else float(f"{(a + b) / 2:.12g}")
+            splittable = b - a > 1 if integer else b - a > min_spacing
+            if jump > z * se:
+                if splittable:
+                    splits.append((jump, midpoint))
+            elif se > 0:
+                replications.append((se, a, b))
+
+        # Splits first (largest jumps), then replications (largest uncertainty)
+        affordable = min(batches_per_iteration, (budget_runs - runs_used) // runs_per_batch)
+        pending = []
+        for _, midpoint in sorted(splits, reverse=True):
+            if len(pending) < affordable and midpoint not in runs:
+                runs[midpoint] = []
+                pending.append(midpoint)
+        for _, a, b in sorted(replications, reverse=True):
+            for x in (a, b):
+                if len(pending) < affordable and x not in pending:
+                    pending.append(x)
+
+    summaries = {x: _point_summary(runs[x], max_rounds[x], level) for x in sorted(runs)}
+    print(f"\nAdaptive sweep over {label} ({metric}): {len(summaries)} points, {runs_used} runs, " +
+          f"{iteration} iterations")
+    for x, summary in summaries.items():
+        print(f"  {label}={x}: {summary['runs']} runs, convergence rate {summary['convergence_rate']:.2f} " +
+              f"[{summary['convergence_rate_ci'][0]:.2f}, {summary['convergence_rate_ci'][1]:.2f}], " +
+              f"mean rounds {summary['mean_rounds']:.1f}")
+    return {
+        "label": label,
+        "metric": metric,
+        "points": [dict(summary, x=x) for x, summary in summaries.items()],
+        "runs_data": runs,
+        "runs_used": runs_used,
+        "iterations": history,
+        "seed": base_seed
+    }
@@ -0,0 +1,224 @@
+import random
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from environment import (
+    PUBLIC_CONDITIONS,
+    SignalCondition,
+    Environment,
+    stream_seed
+)
+from topology import CSRGraph
+
+# Stream key of the event generator (agent streams use keys 0..N-1, as in Environment)
+EVENT_STREAM = 2 ** 32 + 2
+
+# Uniforms drawn per refill of the event generator's buffer
+_BLOCK = 4096
+
+
+class RateTable:
+    """Per-agent event rates in a Fenwick tree: O(log N) rate updates and weighted draws.
+
+    While all rates are equal a draw is O(1) (the tree is only consulted once rates differ).
+    At least min_positive rates must stay positive, at construction and after every update.
+    """
+
+    def __init__(self, rates, min_positive: int = 1):
+        rates = np.asarray(rates, dtype=np.float64)
+        if np.any(rates < 0):
+            raise ValueError("Rates must be non-negative")
+        self.min_positive = max(1, min_positive)
+        self.positive = int(np.count_nonzero(rates > 0))
+        if self.positive < self.min_positive:
+            raise ValueError(f"Need at least {self.min_positive} positive rates, got {self.positive}")
+        self.n = len(rates)
+        self.rates = rates.copy()
+        # Uniformity is tracked as the number of rates differing from the first initial rate
+        self._reference = float(rates[0])
+        self._differing = int(np.count_nonzero(rates != self._reference))
+        self.tree = np.zeros(self.n + 1)
+        for i, rate in enumerate(rates):
+            self._add(i, rate)
+        self.total = float(rates.sum())
+        self._top_bit = 1 << (self.n.bit_length() - 1)
+
+    @property
+    def uniform(self) -> bool:
+        return self._differing == 0
+
+    def _add(self, i: int, delta: float) -> None:
+        i += 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def update(self, i: int, rate: float) -> None:
+        if rate < 0:
+            raise ValueError(f"Rate must be non-negative, got {rate}")
+        old = self.rates[i]
+        positive = self.positive + int(rate > 0) - int(old > 0)
+        if positive < self.min_positive:
+            raise ValueError(f"Need at least {self.min_positive} positive rates; setting rate {i} to {rate} " +
+                             f"would leave {positive}")
+        self.positive = positive
+        self._differing += int(rate != self._reference) - int(old != self._reference)
+        self._add(i, rate - old)
+        self.total += rate - old
+        self.rates[i] = rate
+
+    def sample(self, u: float) -> int:
+        """Index drawn with probability rate / total, from a uniform u in [0, 1)"""
+        if self.uniform:
+            return min(int(u * self.n), self.n - 1)
+        target = u * self.total
+        position, bit = 0, self._top_bit
+        tree = self.tree
+        while bit:
+            step = position + bit
+            if step <= self.n and tree[step] <= target:
+                position = step
+                target -= tree[step]
+            bit >>= 1
+        # Guard against landing on a zero-rate index through rounding
+        while self.rates[min(position, self.n - 1)] == 0 and position > 0:
+            position -= 1
+        return min(position, self.n - 1)
+
+
+class AsyncEnvironment:
+    """Continuous-time version of Environment: single pair interactions as events.
+
+    Agent i starts interactions at rate rates[i]. Each event draws the initiator from
+    the rate table and a partner (rate-weighted among the other agents, or a uniform
+    neighbour on `graph`), plays one interaction with the same agent methods as
+    Environment.run_round, and advances time by an exponential waiting time.
+
+    Progress is measured in rounds, where a round is N // 2 interactions (as many as
+    one synchronous round), so each agent plays about once per round on average.
+    Convergence (every agent's last choice equal) is checked every 10 rounds, like the
+    synchronous engine, from last-choice counts kept up to date per interaction.
+    """
+
+    def __init__(self, agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition,
+                 rates=None, graph: Optional[CSRGraph] = None, seed: Optional[int] = None):
+        if signal_condition in PUBLIC_CONDITIONS:
+            raise ValueError(f"The asynchronous engine does not support '{signal_condition.value}'")
+        if len(agent_configs) < 2:
+            raise ValueError("The asynchronous engine needs at least 2 agents")
+        if graph is not None and graph.num_nodes != len(agent_configs):
+            raise ValueError(f"Graph has {graph.num_nodes} nodes but there are {len(agent_configs)} agents")
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        # Agents (and their per-agent random streams) are built exactly as in Environment
+        self.agents = Environment(agent_configs, signal_condition, seed=self.seed).agents
+        self.num_agents = len(self.agents)
+        self.signal_condition = signal_condition
+        # Without a graph the partner is rate-weighted among the other agents, so two must be active
+        self.rate_table = RateTable(rates if rates is not None else np.ones(self.num_agents),
+                                    min_positive=2 if graph is None else 1)
+        self.graph = graph
+        self.rng = np.random.default_rng(stream_seed(self.seed, EVENT_STREAM))
+        self._buffer = np.empty(0)
+        self._next = 0
+
+        self.pairs_per_round = self.num_agents // 2
+        self.events = 0
+        self.time = 0.0
+        self.converged = False
+        self.convergence_choice = None
+        self.last_choice: List[Optional[str]] = [None] * self.num_agents
+        self.choice_counts = {"Blue": 0, "Red": 0}
+        # Optional per-interaction hook with Environment.trace_callback's arguments
+        self.trace_callback = None
+
+    @property
+    def rounds(self) -> float:
+        return self.events / self.pairs_per_round
+
+    def _uniform(self) -> float:
+        if self._next == len(self._buffer):
+            self._buffer = self.rng.random(_BLOCK)
+            self._next = 0
+        self._next += 1
+        return self._buffer[self._next - 1]
+
+    def _draw_pair(self) -> Tuple[int, int]:
+        i = self.rate_table.sample(self._uniform())
+        if self.graph is not None:
+            start, end = self.graph.indptr[i], self.graph.indptr[i + 1]
+            if start == end:
+                return i, -1
+            return i, int(self.graph.indices[start + min(int(self._uniform() * (end - start)), end - start - 1)])
+        while True:
+            j = self.rate_table.sample(self._uniform())
+            if j != i:
+                return i, j
+
+    def _record_choice(self, index: int, choice: str) -> None:
+        previous = self.last_choice[index]
+        if previous is not None:
+            self.choice_counts[previous] -= 1
+        self.choice_counts[choice] += 1
+        self.last_choice[index] = choice
+
+    def step(self) -> None:
+        """One interaction event"""
+        self.time += -np.log(1.0 - self._uniform()) / self.rate_table.total
+        i, j = self._draw_pair()
+        self.events += 1
+        if j < 0:  # Isolated node on the graph: the event is lost
+            return
+        agent1, agent2 = self.agents[i], self.agents[j]
+        signal1 = agent1.decide_signal(self.signal_condition)
+        signal2 = agent2.decide_signal(self.signal_condition)
+        choice1 = agent1.decide_final_choice(signal2, signal1)
+        choice2 = agent2.decide_final_choice(signal1, signal2)
+        success = choice1 == choice2
+        agent1.update(signal1, signal2, choice1, choice2, success)
+        agent2.update(signal2, signal1, choice2, choice1, success)
+        self._record_choice(i, choice1)
+        self._record_choice(j, choice2)
+        if self.trace_callback is not None:
+            self.trace_callback((self.events - 1) // self.pairs_per_round + 1, agent1.name, agent2.name,
+                                signal1, signal2, choice1, choice2, success)
+
+    def _check_convergence(self) -> None:
+        for choice, count in self.choice_counts.items():
+            if count == self.num_agents:
+                self.converged = True
+                self.convergence_choice = choice
+
+    def run_simulation(self, max_rounds: int = 100000, progress_callback=None,
+                       progress_every: int = 1000) -> Tuple[int, bool, Optional[str]]:
+        """Run until convergence or max_rounds rounds; returns (rounds, converged, choice) like Environment"""
+        check_every = 10 * self.pairs_per_round
+        progress_events = progress_every * self.pairs_per_round
+        max_events = max_rounds * self.pairs_per_round
+        while not self.converged and self.events < max_events:
+            self.step()
+            if self.events % check_every == 0:
+                self._check_convergence()
+            if progress_callback is not None and self.events % progress_events == 0:
+                progress_callback(self.events // self.pairs_per_round)
+        return self.events // self.pairs_per_round, self.converged, self.convergence_choice
+
+
+def run_async(agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition, runs: int = 20,
+              max_rounds: int = 100000, rates=None, graph: Optional[CSRGraph] = None,
+              seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Independent asynchronous runs as runs_data records (usable with survival.py and stats.py)"""
+    base_seed = seed if seed is not None else random.getrandbits(63)
+    runs_data = []
+    for run_number in range(1, runs + 1):
+        run_seed = stream_seed(base_seed, run_number)
+        env = AsyncEnvironment(agent_configs, signal_condition, rates=rates, graph=graph, seed=run_seed)
+        rounds, converged, choice = env.run_simulation(max_rounds)
+        runs_data.append({
+            "run_number": run_number,
+            "rounds_to_convergence": rounds,
+            "converged": converged,
+            "convergence_choice": choice,
+            "time": env.time,
+            "engine": "async",
+            "seed": run_seed
+        })
+    return runs_data
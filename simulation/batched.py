@@ -0,0 +1,313 @@
+import numpy as np
+from typing import List, Dict, Tuple, Optional, Any
+from environment import (
+    PUBLIC_CONDITIONS,
+    SignalCondition,
+    Strategy,
+    get_strategy_spec,
+    register_kernel,
+    rotation_pairs
+)
+
+# Array encodings used by kernels
+NO_SIGNAL = -1  # Signals: -1 = none, 0 = Red, 1 = Blue
+RED, BLUE = 0, 1  # Choices
+CHOICE_NAMES = {RED: "Red", BLUE: "Blue"}
+SIGNAL_NAMES = {NO_SIGNAL: None, RED: "Red", BLUE: "Blue"}
+
+
+class StrategyKernel:
+    """Vectorized implementation of a strategy over a batch of replicas.
+
+    State is a dict of float arrays shaped (replicas, agents of this strategy).
+    Every method acts on the columns `cols` (the strategy's agents that play this
+    round) for all replicas at once. `u` arguments are uniform draws shaped like
+    the output, so kernels stay free of RNG handling.
+    """
+
+    def init_state(self, params_list: List[Dict[str, Any]], n_replicas: int) -> Dict[str, np.ndarray]:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def decide_signal(self, state, cols, condition: SignalCondition, u, u2) -> np.ndarray:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def decide_final_choice(self, state, cols, own_signal, opponent_signal, u) -> np.ndarray:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def update(self, state, cols, own_signal, opponent_signal, final_choice, success) -> None:
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+def _follow_signals(own_signal, opponent_signal, fallback_blue):
+    """Shared final-choice rule: follow the lone signal, keep a matching pair, else fall back"""
+    choice = np.where(fallback_blue, BLUE, RED).astype(np.int8)
+    only_opponent = (own_signal == NO_SIGNAL) & (opponent_signal != NO_SIGNAL)
+    own_decides = (own_signal != NO_SIGNAL) & ((opponent_signal == NO_SIGNAL) | (own_signal == opponent_signal))
+    choice[only_opponent] = opponent_signal[only_opponent]
+    choice[own_decides] = own_signal[own_decides]
+    return choice
+
+
+def _params_array(params_list, name, n_replicas):
+    return np.broadcast_to(np.array([params[name] for params in params_list], dtype=np.float64),
+                           (n_replicas, len(params_list)))
+
+
+class HistoryBasedKernel(StrategyKernel):
+    """Batched HistoryBasedAgent (success counters are omitted: they never affect decisions)"""
+
+    def init_state(self, params_list, n_replicas):
+        pseudo = _params_array(params_list, "pseudo_count", n_replicas)
+        return {
+            "learning_step_follow": _params_array(params_list, "learning_step_follow", n_replicas),
+            "total_count": 2 * pseudo,
+            "blue_count": pseudo.copy(),
+            "no_signal_count": 2 * pseudo,
+            "signal_blue_count": pseudo.copy(),
+            "signal_choice_total": 4 * pseudo
+        }
+
+    def decide_signal(self, state, cols, condition, u, u2):
+        if condition == SignalCondition.NO_SIGNAL:
+            return np.full(u.shape, NO_SIGNAL, dtype=np.int8)
+        if condition == SignalCondition.MANDATORY_SIGNAL:
+            blue_ratio = state["blue_count"][:, cols] / state["total_count"][:, cols]
+            return (u < blue_ratio).astype(np.int8)
+        # OPTIONAL_SIGNAL
+        total = state["signal_choice_total"][:, cols]
+        no_signal_prob = state["no_signal_count"][:, cols] / total
+        blue_signal_prob = state["signal_blue_count"][:, cols] / total
+        signal = np.where(u < no_signal_prob + blue_signal_prob, BLUE, RED).astype(np.int8)
+        signal[u < no_signal_prob] = NO_SIGNAL
+        return signal
+
+    def decide_final_choice(self, state, cols, own_signal, opponent_signal, u):
+        blue_ratio = state["blue_count"][:, cols] / state["total_count"][:, cols]
+        return _follow_signals(own_signal, opponent_signal, u < blue_ratio)
+
+    def update(self, state, cols, own_signal, opponent_signal, final_choice, success):
+        step = state["learning_step_follow"][:, cols]
+        followed = (own_signal == NO_SIGNAL) & (opponent_signal != NO_SIGNAL) & success & \
+                   (opponent_signal == final_choice)
+        is_blue = final_choice == BLUE
+        state["total_count"][:, cols] += 1 + np.where(followed, step, 0.0)
+        state["blue_count"][:, cols] += is_blue + np.where(followed & is_blue, step, 0.0)
+        state["signal_choice_total"][:, cols] += 1
+        state["no_signal_count"][:, cols] += own_signal == NO_SIGNAL
+        state["signal_blue_count"][:, cols] += own_signal == BLUE
+
+
+class RewardBasedKernel(StrategyKernel):
+    """Batched RewardBasedAgent"""
+
+    def init_state(self, params_list, n_replicas):
+        return {
+            "alpha": _params_array(params_list, "alpha", n_replicas),
+            "beta": _params_array(params_list, "beta", n_replicas),
+            "conflict_learning_boost": _params_array(params_list, "conflict_learning_boost", n_replicas),
+            "p_choice_blue": _params_array(params_list, "initial_p_choice_blue", n_replicas).copy(),
+            "p_send_signal": _params_array(params_list, "initial_p_send_signal", n_replicas).copy(),
+            "p_signal_blue": _params_array(params_list, "initial_p_signal_blue", n_replicas).copy()
+        }
+
+    def decide_signal(self, state, cols, condition, u, u2):
+        if condition == SignalCondition.NO_SIGNAL:
+            return np.full(u.shape, NO_SIGNAL, dtype=np.int8)
+        if condition == SignalCondition.MANDATORY_SIGNAL:
+            return (u < state["p_signal_blue"][:, cols]).astype(np.int8)
+        # OPTIONAL_SIGNAL: first whether to send, then which color
+        signal = (u2 < state["p_signal_blue"][:, cols]).astype(np.int8)
+        signal[u >= state["p_send_signal"][:, cols]] = NO_SIGNAL
+        return signal
+
+    def decide_final_choice(self, state, cols, own_signal, opponent_signal, u):
+        return _follow_signals(own_signal, opponent_signal, u < state["p_choice_blue"][:, cols])
+
+    def update(self, state, cols, own_signal, opponent_signal, final_choice, success):
+        # Every rule moves a probability toward a 0/1 target: with rate ALPHA toward the
+        # rewarded option on success, with rate BETA toward the other option on failure.
+        rate = np.where(success, state["alpha"][:, cols], state["beta"][:, cols])
+        sent = own_signal != NO_SIGNAL
+
+        p_choice = state["p_choice_blue"][:, cols]
+        target = np.where(success, final_choice == BLUE, final_choice == RED)
+        p_choice += rate * (target - p_choice)
+
+        p_send = state["p_send_signal"][:, cols]
+        target = np.where(success, sent, ~sent)
+        p_send += rate * (target - p_send)
+
+        p_signal = state["p_signal_blue"][:, cols]
+        target = np.where(success, own_signal == BLUE, own_signal == RED)
+        p_signal += np.where(sent, rate * (target - p_signal), 0.0)
+
+        # Conflict boost: own signal won a signal conflict
+        boosted = sent & (opponent_signal != NO_SIGNAL) & (own_signal != opponent_signal) & \
+                  success & (final_choice == own_signal)
+        adj = state["alpha"][:, cols] * state["conflict_learning_boost"][:, cols]
+        p_choice += np.where(boosted, adj * ((own_signal == BLUE) - p_choice), 0.0)
+
+        state["p_choice_blue"][:, cols] = np.clip(p_choice, 0.0, 1.0)
+        state["p_send_signal"][:, cols] = np.clip(p_send, 0.0, 1.0)
+        state["p_signal_blue"][:, cols] = np.clip(p_signal, 0.0, 1.0)
+
+
+register_kernel(Strategy.HISTORY_BASED, HistoryBasedKernel())
+register_kernel(Strategy.REWARD_BASED, RewardBasedKernel())
+
+
+def batched_kernels(agent_configs: List[Dict[str, Any]]) -> Optional[List[StrategyKernel]]:
+    """Per-agent kernels, or None if some strategy in the setup has no kernel"""
+    kernels = [get_strategy_spec(config.get("strategy_type")).kernel for config in agent_configs]
+    return None if any(kernel is None for kernel in kernels) else kernels
+
+
+class BatchedEngine:
+    """Runs many replicas of one setup at once on the rotation schedule.
+
+    Agent states are struct-of-arrays shaped (replicas, agents); each round is a few
+    array operations per strategy instead of Python calls per agent. Replicas that
+    converge are dropped from the arrays at the next convergence check.
+    """
+
+    def __init__(self, agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition,
+                 n_replicas: int, seed: Optional[int] = None):
+        kernels = batched_kernels(agent_configs)
+        if kernels is None:
+            raise ValueError("Every strategy in the setup needs a batched kernel")
+        if signal_condition in PUBLIC_CONDITIONS:
+            raise ValueError(f"The batched engine does not support '{signal_condition.value}'")
+        self.num_agents = len(agent_configs)
+        self.agent_names = [config.get("name", f"Agent {i+1}") for i, config in enumerate(agent_configs)]
+        self.signal_condition = signal_condition
+        self.n_replicas = n_replicas
+        self.rng = np.random.default_rng(seed)
+
+        # Group agents by kernel: (kernel, global agent indices, state arrays)
+        self.groups = []
+        self.local_index = np.zeros(self.num_agents, dtype=np.int64)
+        self.group_of = np.zeros(self.num_agents, dtype=np.int64)
+        for kernel in dict.fromkeys(kernels):
+            members = [i for i, k in enumerate(kernels) if k is kernel]
+            params_list = [get_strategy_spec(agent_configs[i].get("strategy_type"))
+                           .resolve_params(agent_configs[i].get("params", {})) for i in members]
+            self.local_index[members] = np.arange(len(members))
+            self.group_of[members] = len(self.groups)
+            self.groups.append((kernel, np.array(members), kernel.init_state(params_list, n_replicas)))
+
+        self.last_choice = np.full((n_replicas, self.num_agents), NO_SIGNAL, dtype=np.int8)
+        self.replica_ids = np.arange(n_replicas)
+        self.rounds = 0
+        self._schedule_cache: Dict[int, Any] = {}
+
+    def _schedule_period(self) -> int:
+        n = self.num_agents
+        if n <= 2:
+            return 1
+        if n == 3:
+            return 3
+        if n % 2 == 0:
+            return n - 1
+        return int(np.lcm(n, n - 2))
+
+    def _round_plan(self):
+        """Pairs for this round as index arrays, plus per-group column/position splits"""
+        key = self.rounds % self._schedule_period()
+        plan = self._schedule_cache.get(key)
+        if plan is None:
+            pairs = np.array(rotation_pairs(self.num_agents, self.rounds), dtype=np.int64).reshape(-1, 2)
+            # Sides: position p plays against position (p + P) % 2P
+            players = np.concatenate([pairs[:, 0], pairs[:, 1]])
+            n_pairs = len(pairs)
+            opponent_pos = np.concatenate([np.arange(n_pairs, 2 * n_pairs), np.arange(n_pairs)])
+            splits = []
+            for g in range(len(self.groups)):
+                positions = np.nonzero(self.group_of[players] == g)[0]
+                splits.append((positions, self.local_index[players[positions]]))
+            plan = (players, opponent_pos, n_pairs, splits)
+            self._schedule_cache[key] = plan
+        return plan
+
+    def _compact(self, keep: np.ndarray) -> None:
+        self.last_choice = self.last_choice[keep]
+        self.replica_ids = self.replica_ids[keep]
+        for _, _, state in self.groups:
+            for name, values in state.items():
+                state[name] = values[keep]
+
+    def _trace_round(self, trace_callback, row, players, n_pairs, signal, choice, success) -> None:
+        for p in range(n_pairs):
+            left, right = p, p + n_pairs
+            trace_callback(self.rounds,
+                           self.agent_names[players[left]], self.agent_names[players[right]],
+                           SIGNAL_NAMES[int(signal[row, left])], SIGNAL_NAMES[int(signal[row, right])],
+                           CHOICE_NAMES[int(choice[row, left])], CHOICE_NAMES[int(choice[row, right])],
+                           bool(success[row, left]))
+
+    def run(self, max_rounds: int = 100000, progress_callback=None,
+            progress_every: int = 1000, trace_replica: Optional[int] = None,
+            trace_callback=None) -> List[Tuple[int, bool, Optional[str]]]:
+        """Run all replicas; return (rounds, converged, convergence_choice) per replica
+
+        trace_callback, if given, receives every interaction of replica `trace_replica`
+        with the same arguments as Environment.trace_callback.
+        """
+        results: List[Optional[Tuple[int, bool, Optional[str]]]] = [None] * self.n_replicas
+        condition = self.signal_condition
+        while len(self.replica_ids) > 0 and self.rounds < max_rounds:
+            self.rounds += 1
+            players, opponent_pos, n_pairs, splits = self._round_plan()
+            if n_pairs > 0:
+                shape = (len(self.replica_ids), len(players))
+                u = self.rng.random((3,) + shape)
+                signal = np.empty(shape, dtype=np.int8)
+                for (kernel, _, state), (positions, cols) in zip(self.groups, splits):
+                    if len(positions):
+                        signal[:, positions] = kernel.decide_signal(
+                            state, cols, condition, u[0][:, positions], u[1][:, positions])
+                opponent_signal = signal[:, opponent_pos]
+
+                choice = np.empty(shape, dtype=np.int8)
+                for (kernel, _, state), (positions, cols) in zip(self.groups, splits):
+                    if len(positions):
+                        choice[:, positions] = kernel.decide_final_choice(
+                            state, cols, signal[:, positions], opponent_signal[:, positions],
+                            u[2][:, positions])
+                success = choice == choice[:, opponent_pos]
+
+                for (kernel, _, state), (positions, cols) in zip(self.groups, splits):
+                    if len(positions):
+                        kernel.update(state, cols, signal[:, positions], opponent_signal[:, positions],
+                                      choice[:, positions], success[:, positions])
+                self.last_choice[:, players] = choice
+
+                if trace_callback is not None:
+                    # replica_ids stays sorted through compaction
+                    row = int(np.searchsorted(self.replica_ids, trace_replica))
+                    if row < len(self.replica_ids) and self.replica_ids[row] == trace_replica:
+                        self._trace_round(trace_callback, row, players, n_pairs, signal, choice, success)
+
+            # Same cadence and rule as Environment._check_convergence
+            if self.rounds % 10 == 0:
+                first = self.last_choice[:, :1]
+                converged = (first[:, 0] != NO_SIGNAL) & np.all(self.last_choice == first, axis=1)
+                if converged.any():
+                    for replica, choice_code in zip(self.replica_ids[converged], first[converged, 0]):
+                        results[replica] = (self.rounds, True, CHOICE_NAMES[int(choice_code)])
+                    self._compact(~converged)
+            if progress_callback is not None and self.rounds % progress_every == 0:
+                progress_callback(self.rounds)
+
+        for replica in self.replica_ids:
+            results[replica] = (self.rounds, False, None)
+        return results
+
+
+def run_batched(agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition,
+                n_replicas: int, max_rounds: int = 100000, seed: Optional[int] = None,
+                progress_callback=None, progress_every: int = 1000, trace_replica: Optional[int] = None,
+                trace_callback=None) -> List[Tuple[int, bool, Optional[str]]]:
+    """Run n_replicas independent simulations of a setup with the batched engine"""
+    engine = BatchedEngine(agent_configs, signal_condition, n_replicas, seed=seed)
+    return engine.run(max_rounds, progress_callback=progress_callback, progress_every=progress_every,
+                      trace_replica=trace_replica, trace_callback=trace_callback)
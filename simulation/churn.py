@@ -0,0 +1,224 @@
+import math
+import random
+import numpy as np
+from typing import List, Dict, Any, Optional
+from environment import (
+    SignalCondition,
+    Agent,
+    Environment,
+    EnvironmentSnapshot,
+    get_strategy_spec,
+    rotation_pairs,
+    stream_seed
+)
+
+# Stream key of the churn generator (agent streams use keys 0, 1, ... in order of arrival)
+CHURN_STREAM = 2 ** 32 + 3
+
+
+class ChurnEnvironment(Environment):
+    """Environment whose members leave and join during a run.
+
+    Before every round each member leaves with probability leave_rate, then a
+    Poisson(join_rate) number of newcomers join, each built fresh from a config drawn
+    uniformly from newcomer_configs (default: the founders' configs). The group size
+    drifts around join_rate / leave_rate within [min_agents, max_agents]; join_rate
+    defaults to leave_rate * len(agent_configs), which keeps the initial size on average.
+
+    Membership is dense: agents, agent_configs and the last-choice slots hold the current
+    members in positions 0..num_agents-1, so the rotation schedule and broadcasts run on
+    the current group unchanged. A departure moves the last member into the leaver's slot,
+    a join appends, and both adjust the Blue/Red last-choice counts that convergence is
+    read from, so every event is O(1). Departed newcomers are recycled (reseeded and reset)
+    for later newcomers of the same config instead of being rebuilt.
+
+    Convergence uses Environment's rule on the current members: checked every 10 rounds,
+    every member must have chosen and all last choices must agree.
+    """
+
+    def __init__(self, agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition,
+                 leave_rate: float = 0.01, join_rate: Optional[float] = None,
+                 newcomer_configs: Optional[List[Dict[str, Any]]] = None, min_agents: int = 2,
+                 max_agents: Optional[int] = None, seed: Optional[int] = None, antithetic: bool = False):
+        if not 0.0 <= leave_rate <= 1.0:
+            raise ValueError(f"leave_rate must be in [0, 1], got {leave_rate}")
+        if join_rate is None:
+            join_rate = leave_rate * len(agent_configs)
+        if join_rate < 0:
+            raise ValueError(f"join_rate must be non-negative, got {join_rate}")
+        if min_agents < 2 or (max_agents is not None and max_agents < min_agents):
+            raise ValueError(f"Need 2 <= min_agents <= max_agents, got {min_agents} and {max_agents}")
+        super().__init__(list(agent_configs), signal_condition, seed=seed, antithetic=antithetic)
+        self.leave_rate = leave_rate
+        self.join_rate = join_rate
+        self.newcomer_configs = list(newcomer_configs or agent_configs)
+        for config in self.newcomer_configs:
+            get_strategy_spec(config.get("strategy_type"))  # Fail early on unknown strategies
+        self.min_agents = min_agents
+        self.max_agents = max_agents if max_agents is not None else math.inf
+        self._founders = list(self.agents)
+        self._founder_configs = list(self.agent_configs)
+        # Departed newcomers per newcomer config, and the learned state they restart from
+        self._recycled: Dict[int, List[Agent]] = {k: [] for k in range(len(self.newcomer_configs))}
+        self._newcomer_states: Dict[int, tuple] = {}
+        self._start_churn()
+
+    def _start_churn(self) -> None:
+        self.churn_rng = np.random.default_rng(stream_seed(self.seed, CHURN_STREAM))
+        self.next_id = len(self.agents)
+        # Per position: newcomer config index (None for founders) and last choice
+        self._origin: List[Optional[int]] = [None] * self.num_agents
+        self._last_choice: List[Optional[str]] = [None] * self.num_agents
+        self.choice_counts = {"Blue": 0, "Red": 0}
+        self._round_pairs = []
+        self.arrivals = 0
+        self.departures = 0
+        self.group_sizes = []
+
+    def leave(self, position: int) -> Agent:
+        """Remove the member at `position`; the last member takes over its slot"""
+        agent = self.agents[position]
+        choice = self._last_choice[position]
+        if choice is not None:
+            self.choice_counts[choice] -= 1
+        origin = self._origin[position]
+        last = self.num_agents - 1
+        for slots in (self.agents, self.agent_configs, self._origin, self._last_choice):
+            slots[position] = slots[last]
+            slots.pop()
+        self.num_agents -= 1
+        self.departures += 1
+        if origin is not None:
+            self._recycled[origin].append(agent)
+        return agent
+
+    def join(self, config_index: Optional[int] = None) -> Agent:
+        """Add a newcomer built from newcomer_configs[config_index] (random if None)"""
+        if config_index is None:
+            config_index = int(self.churn_rng.integers(len(self.newcomer_configs)))
+        config = self.newcomer_configs[config_index]
+        agent_id = self.next_id
+        self.next_id += 1
+        name = f"Agent {agent_id + 1}"
+        if self._recycled[config_index]:
+            agent = self._recycled[config_index].pop()
+            agent.name = name
+            agent.rng.seed(stream_seed(self.seed, agent_id))
+            agent.reset(self._newcomer_states[config_index])
+        else:
+            spec = get_strategy_spec(config.get("strategy_type"))
+            agent = spec.build(name, config.get("params", {}), rng=self._agent_rng(agent_id))
+            self._newcomer_states.setdefault(config_index, agent.get_state())
+        self.agents.append(agent)
+        self.agent_configs.append(config)
+        self._origin.append(config_index)
+        self._last_choice.append(None)
+        self.num_agents += 1
+        self.arrivals += 1
+        return agent
+
+    def _churn(self) -> None:
+        rng = self.churn_rng
+        # A Binomial number of leavers picked one by one without replacement is the same
+        # as every member leaving independently with probability leave_rate
+        if self.leave_rate > 0:
+            for _ in range(rng.binomial(self.num_agents, self.leave_rate)):
+                if self.num_agents <= self.min_agents:
+                    break
+                self.leave(int(rng.integers(self.num_agents)))
+        if self.join_rate > 0:
+            for _ in range(rng.poisson(self.join_rate)):
+                if self.num_agents >= self.max_agents:
+                    break
+                self.join()
+
+    def run_round(self):
+        """Apply this round's departures and arrivals, then run the round"""
+        self._churn()
+        super().run_round()
+        self.group_sizes.append(self.num_agents)
+
+    def _get_matchups(self):
+        self._round_pairs = rotation_pairs(self.num_agents, self.rounds)
+        agents = self.agents
+        return [(agents[i], agents[j]) for i, j in self._round_pairs]
+
+    def _record_choice(self, position: int, choice: str) -> None:
+        previous = self._last_choice[position]
+        if previous is not None:
+            self.choice_counts[previous] -= 1
+        self.choice_counts[choice] += 1
+        self._last_choice[position] = choice
+
+    def _check_convergence(self):
+        """Fold this round's choices into the counts; every 10 rounds, check them"""
+        for i, j in self._round_pairs:
+            self._record_choice(i, self.agents[i].choice_history[-1])
+            self._record_choice(j, self.agents[j].choice_history[-1])
+        self._round_pairs = []
+        if self.rounds % 10 != 0:
+            return
+        for choice, count in self.choice_counts.items():
+            if count == self.num_agents:
+                self.converged = True
+                self.convergence_choice = choice
+
+    def reset(self, seed: Optional[int] = None, antithetic: Optional[bool] = None) -> None:
+        """Return to the founding group with this seed, in place (newcomers are recycled)"""
+        self._check_resettable()
+        for agent, origin in zip(self.agents, self._origin):
+            if origin is not None:
+                self._recycled[origin].append(agent)
+        if antithetic is not None and antithetic != self.antithetic:
+            # Recycled agents carry random streams of the other kind
+            self._recycled = {k: [] for k in self._recycled}
+        self.agents = list(self._founders)
+        self.agent_configs = list(self._founder_configs)
+        self.num_agents = len(self.agents)
+        super().reset(seed, antithetic)
+        self._start_churn()
+
+    @property
+    def resettable(self) -> bool:
+        """Founders and every kind of newcomer (recycled across runs) declare STATE_FIELDS"""
+        return super().resettable and all(
+            get_strategy_spec(config.get("strategy_type")).agent_class.STATE_FIELDS
+            for config in self.newcomer_configs)
+
+    def restore(self, snapshot: EnvironmentSnapshot, restore_rng: bool = True) -> None:
+        raise ValueError("A churn environment cannot be restored; snapshot() captures the current members, " +
+                         "which Environment.from_snapshot continues as a fixed group")
+
+
+def run_churn(agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition, runs: int = 20,
+              max_rounds: int = 100000, leave_rate: float = 0.01, join_rate: Optional[float] = None,
+              newcomer_configs: Optional[List[Dict[str, Any]]] = None, min_agents: int = 2,
+              max_agents: Optional[int] = None, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Independent churn runs as runs_data records (usable with survival.py and stats.py).
+
+    One environment is reset between runs, so recycled newcomers are reused across runs too.
+    """
+    base_seed = seed if seed is not None else random.getrandbits(63)
+    env = None
+    runs_data = []
+    for run_number in range(1, runs + 1):
+        run_seed = stream_seed(base_seed, run_number)
+        if env is None or not env.resettable:
+            env = ChurnEnvironment(agent_configs, signal_condition, leave_rate, join_rate, newcomer_configs,
+                                   min_agents, max_agents, seed=run_seed)
+        else:
+            env.reset(run_seed)
+        rounds, converged, choice = env.run_simulation(max_rounds)
+        runs_data.append({
+            "run_number": run_number,
+            "rounds_to_convergence": rounds,
+            "converged": converged,
+            "convergence_choice": choice,
+            "final_size": env.num_agents,
+            "mean_size": float(np.mean(env.group_sizes)) if env.group_sizes else float(env.num_agents),
+            "arrivals": env.arrivals,
+            "departures": env.departures,
+            "engine": "churn",
+            "seed": run_seed
+        })
+    return runs_data
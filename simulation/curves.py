@@ -0,0 +1,92 @@
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Any, Optional, Sequence
+
+
+class SharedCurveBuffer:
+    """Per-round sums over many runs of one setup, held in a shared-memory NumPy buffer.
+
+    Workers fold each finished run into the buffer in place (one vectorized add per row),
+    so individual run series never have to be kept or sent back to the parent.
+
+    Rows (indexed by round - 1):
+      runs_active       runs that played this round
+      runs_unconverged  runs still unconverged after this round
+      success_sum       sum of per-round success rates (and success_sq_sum of their squares)
+      blue_sum          sum of per-round Blue choice shares (and blue_sq_sum of their squares)
+    """
+
+    ROWS = ("runs_active", "runs_unconverged", "success_sum", "success_sq_sum", "blue_sum", "blue_sq_sum")
+
+    def __init__(self, max_rounds: int, name: Optional[str] = None, lock=None):
+        self.max_rounds = max_rounds
+        self.lock = lock
+        size = len(self.ROWS) * max_rounds * np.dtype(np.float64).itemsize
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray((len(self.ROWS), max_rounds), dtype=np.float64, buffer=self.shm.buf)
+        if name is None:
+            self.array.fill(0.0)
+
+    def __getstate__(self):
+        # Pickled handles (e.g. for spawned workers) re-attach to the same block by name
+        return {"max_rounds": self.max_rounds, "name": self.shm.name, "lock": self.lock}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_rounds"], name=state["name"], lock=state["lock"])
+
+    def add_run(self, success_rate: Sequence[float], blue_choices: Sequence[float],
+                rounds: int, converged: bool) -> None:
+        """Fold one run's per-round series into the sums"""
+        rounds = min(rounds, self.max_rounds)
+        success = np.asarray(success_rate[:rounds], dtype=np.float64)
+        blue = np.asarray(blue_choices[:rounds], dtype=np.float64)
+        if self.lock is not None:
+            self.lock.acquire()
+        try:
+            a = self.array
+            a[0, :rounds] += 1.0
+            a[1, :rounds] += 1.0
+            if converged and rounds > 0:
+                a[1, rounds - 1] -= 1.0
+            a[2, :rounds] += success
+            a[3, :rounds] += success * success
+            a[4, :rounds] += blue
+            a[5, :rounds] += blue * blue
+        finally:
+            if self.lock is not None:
+                self.lock.release()
+
+    def curves(self, total_runs: int) -> Dict[str, Any]:
+        """Mean and variance curves across runs.
+
+        Success and Blue share are averaged over the runs still playing at each round;
+        unconverged_fraction is relative to all `total_runs`. Curves are cut at the last
+        round any run reached.
+        """
+        a = self.array
+        last_round = int(np.count_nonzero(a[0]))
+        active, unconverged, s, s2, b, b2 = (row[:last_round] for row in a)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            success_mean = s / active
+            blue_mean = b / active
+            success_var = np.maximum(s2 / active - success_mean ** 2, 0.0)
+            blue_var = np.maximum(b2 / active - blue_mean ** 2, 0.0)
+        return {
+            "rounds": np.arange(1, last_round + 1),
+            "runs_active": active.copy(),
+            "success_rate_mean": success_mean,
+            "success_rate_var": success_var,
+            "blue_share_mean": blue_mean,
+            "blue_share_var": blue_var,
+            "unconverged_fraction": unconverged / total_runs if total_runs > 0 else unconverged * 0.0
+        }
+
+    def close(self) -> None:
+        self.array = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
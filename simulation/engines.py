@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from environment import (
+    PUBLIC_CONDITIONS,
+    SignalCondition,
+    Strategy,
+    Environment,
+    get_strategy_spec,
+    stream_seed
+)
+from batched import BatchedEngine, batched_kernels
+from survival import kaplan_meier, extrapolated_mean
+
+ENGINES = ("scalar", "batched")
+DEFAULT_CALIBRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), "engine_calibration.json")
+CALIBRATION_VERSION = 2
+
+# Benchmark grid: small enough to finish in well under a minute
+BENCHMARK_SIZES = (2, 4, 8, 16)
+BENCHMARK_RUNS = 6
+BENCHMARK_REPLICAS = (4, 32)
+BENCHMARK_MAX_ROUNDS = 2000
+
+
+def valid_engines(agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition, topology=None,
+                  record_curves: bool = False, variance_reduction: Optional[str] = None) -> List[str]:
+    """Engines able to run a setup: the batched engine needs every strategy to have a kernel,
+    the rotation schedule, a pairwise signal condition, independent seeds and no per-round
+    recording (record_curves needs each run's series, which only the scalar engine keeps)"""
+    engines = ["scalar"]
+    if (topology is None and not record_curves and not variance_reduction and
+            signal_condition not in PUBLIC_CONDITIONS and batched_kernels(agent_configs) is not None):
+        engines.append("batched")
+    return engines
+
+
+def _strategy_counts(agent_configs: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for config in agent_configs:
+        name = get_strategy_spec(config.get("strategy_type")).name
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def _harmonic(k: float) -> float:
+    return float(np.sum(1.0 / np.arange(1, max(1, int(round(k))) + 1)))
+
+
+class EngineCostModel:
+    """Predicted seconds for running a setup on each engine, fitted by calibrate().
+
+    Rounds to convergence: log(mean rounds) = a + b * log(N) per (strategy, condition),
+    averaged in log space over a mixed group's strategies, capped at max_rounds.
+    Scalar engine: each run costs overhead + sum over strategies of (agents * rounds *
+    cost per agent-round). Batched engine: each chunk of replicas costs overhead + rounds
+    until its slowest replica stops * per-round cost + the same agent-round sum over its
+    replicas. The slowest of k replicas is taken as mean rounds * H(k), the expected
+    maximum of k exponential times.
+
+    Strategies or conditions the benchmark did not cover use the most expensive strategy's
+    costs and the pooled rounds model.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+
+    @classmethod
+    def load(cls, path: str) -> "EngineCostModel":
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != CALIBRATION_VERSION:
+            raise ValueError(f"Calibration {path} has version {data.get('version')}, expected {CALIBRATION_VERSION}")
+        return cls(data)
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.data, f, indent=2)
+
+    def expected_rounds(self, agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition,
+                        max_rounds: int) -> float:
+        models = self.data["rounds_model"]
+        num_agents = len(agent_configs)
+        log_rounds = 0.0
+        for name, count in _strategy_counts(agent_configs).items():
+            a, b = models.get(f"{name}|{signal_condition.value}", models["*"])
+            log_rounds += count / num_agents * (a + b * np.log(num_agents))
+        return float(min(max_rounds, np.exp(log_rounds)))
+
+    def _agent_round_cost(self, engine: str, agent_configs: List[Dict[str, Any]]) -> float:
+        costs = self.data[engine]["per_agent_round"]
+        fallback = max(costs.values())
+        return sum(count * costs.get(name, fallback) for name, count in _strategy_counts(agent_configs).items())
+
+    def predict(self, engine: str, agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition,
+                runs: int, max_rounds: int, n_workers: int = 1) -> float:
+        """Predicted total seconds of a setup's jobs on `engine` (summed over workers)"""
+        if runs == 0:
+            return 0.0
+        rounds = self.expected_rounds(agent_configs, signal_condition, max_rounds)
+        agent_rounds = self._agent_round_cost(engine, agent_configs) * rounds
+        costs = self.data[engine]
+        if engine == "scalar":
+            return runs * (costs["overhead"] + agent_rounds)
+        chunks = min(max(1, n_workers), runs)
+        replicas = runs / chunks
+        slowest = min(max_rounds, rounds * _harmonic(replicas))
+        return chunks * (costs["overhead"] + costs["per_round"] * slowest + replicas * agent_rounds)
+
+    def choose(self, engines: List[str], agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition,
+               runs: int, max_rounds: int, n_workers: int = 1) -> Tuple[str, Dict[str, float]]:
+        """The engine with the smallest predicted time among `engines`, and every prediction"""
+        predictions = {engine: self.predict(engine, agent_configs, signal_condition, runs, max_rounds, n_workers)
+                       for engine in engines}
+        return min(engines, key=lambda engine: predictions[engine]), predictions
+
+
+def _fit_nonnegative(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Least squares, refitting without columns whose coefficient came out negative"""
+    active = np.ones(x.shape[1], dtype=bool)
+    coef = np.zeros(x.shape[1])
+    while active.any():
+        coef[:] = 0.0
+        coef[active] = np.linalg.lstsq(x[:, active], y, rcond=None)[0]
+        if np.all(coef >= 0):
+            break
+        active &= coef > 0
+    return coef
+
+
+def _cell_mean_rounds(run_rounds: List[int], run_converged: List[bool]) -> float:
+    """Mean rounds to convergence of a benchmark cell whose runs stopped at the round budget
+    are censored. The Kaplan-Meier mean with an exponential tail (survival.extrapolated_mean)
+    when its tail has events, otherwise the constant-hazard estimate rounds played /
+    convergences, counting at least one convergence when none was seen"""
+    if all(run_converged):
+        return float(np.mean(run_rounds))
+    if any(run_converged):
+        mean = extrapolated_mean(run_rounds, run_converged, kaplan_meier(run_rounds, run_converged))["mean"]
+        if mean is not None:
+            return float(mean)
+    return float(np.sum(run_rounds)) / max(1, sum(run_converged))
+
+
+def _fit_rounds(cells: Dict[str, List[Tuple[int, float]]]) -> Dict[str, List[float]]:
+    def fit(points):
+        sizes, rounds = np.array(points, dtype=np.float64).T
+        x = np.column_stack([np.ones(len(sizes)), np.log(sizes)])
+        return [float(c) for c in np.linalg.lstsq(x, np.log(np.maximum(rounds, 1.0)), rcond=None)[0]]
+    model = {key: fit(points) for key, points in cells.items()}
+    model["*"] = fit([point for points in cells.values() for point in points])
+    return model
+
+
+def calibrate(path: Optional[str] = DEFAULT_CALIBRATION, seed: int = 0, verbose: bool = True) -> EngineCostModel:
+    """Time both engines on a small benchmark grid, fit an EngineCostModel and save it to `path`.
+
+    The grid covers the built-in strategies, alone and half/half, at BENCHMARK_SIZES: scalar
+    runs under every signal condition (these also fit the rounds model) and batched chunks
+    of BENCHMARK_REPLICAS replicas under the pairwise conditions. Runs that hit
+    BENCHMARK_MAX_ROUNDS enter the rounds model as censored (see _cell_mean_rounds), and
+    the cells that had any are listed under "censored_cells".
+    """
+    started = time.perf_counter()
+    strategies = [strategy for strategy in Strategy if get_strategy_spec(strategy).kernel is not None]
+    names = [get_strategy_spec(strategy).name for strategy in strategies]
+    mixes = [[strategy] for strategy in strategies] + [strategies]
+    scalar_rows, scalar_times = [], []
+    batched_rows, batched_times = [], []
+    rounds_cells: Dict[str, List[Tuple[int, float]]] = {}
+    censored_cells: Dict[str, Dict[str, Any]] = {}
+
+    def agent_rounds(agent_configs, rounds):
+        counts = _strategy_counts(agent_configs)
+        return [counts.get(name, 0) * rounds for name in names]
+
+    cell = 0
+    for mix in mixes:
+        for num_agents in BENCHMARK_SIZES:
+            agent_configs = [{"strategy_type": mix[i % len(mix)]} for i in range(num_agents)]
+            for condition in SignalCondition:
+                cell += 1
+                run_rounds, run_converged = [], []
+                for run in range(BENCHMARK_RUNS):
+                    t0 = time.perf_counter()
+                    env = Environment(agent_configs, condition, seed=stream_seed(seed, cell, run))
+                    rounds, converged, _ = env.run_simulation(BENCHMARK_MAX_ROUNDS)
+                    scalar_times.append(time.perf_counter() - t0)
+                    scalar_rows.append([1.0] + agent_rounds(agent_configs, rounds))
+                    run_rounds.append(rounds)
+                    run_converged.append(converged)
+                if len(mix) == 1:
+                    key = f"{names[strategies.index(mix[0])]}|{condition.value}"
+                    mean_rounds = _cell_mean_rounds(run_rounds, run_converged)
+                    if not all(run_converged):
+                        censored_cells[f"{key}|{num_agents}"] = {
+                            "censored_runs": run_converged.count(False), "runs": BENCHMARK_RUNS,
+                            "estimated_mean_rounds": mean_rounds}
+                    rounds_cells.setdefault(key, []).append((num_agents, mean_rounds))
+                if condition in PUBLIC_CONDITIONS:
+                    continue
+                for replicas in BENCHMARK_REPLICAS:
+                    t0 = time.perf_counter()
+                    engine = BatchedEngine(agent_configs, condition, replicas, seed=stream_seed(seed, cell, replicas))
+                    outcomes = engine.run(BENCHMARK_MAX_ROUNDS)
+                    batched_times.append(time.perf_counter() - t0)
+                    batched_rows.append([1.0, float(engine.rounds)] +
+                                        agent_rounds(agent_configs, sum(rounds for rounds, _, _ in outcomes)))
+
+    scalar_coef = _fit_nonnegative(np.array(scalar_rows), np.array(scalar_times))
+    batched_coef = _fit_nonnegative(np.array(batched_rows), np.array(batched_times))
+    model = EngineCostModel({
+        "version": CALIBRATION_VERSION,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "benchmark_seconds": time.perf_counter() - started,
+        "rounds_model": _fit_rounds(rounds_cells),
+        "censored_cells": censored_cells,
+        "scalar": {"overhead": float(scalar_coef[0]),
+                   "per_agent_round": {name: float(c) for name, c in zip(names, scalar_coef[1:])}},
+        "batched": {"overhead": float(batched_coef[0]), "per_round": float(batched_coef[1]),
+                    "per_agent_round": {name: float(c) for name, c in zip(names, batched_coef[2:])}}
+    })
+    if path is not None:
+        model.save(path)
+    if verbose:
+        print(f"Engine calibration took {model.data['benchmark_seconds']:.1f}s" +
+              (f"; saved to {path}" if path is not None else ""))
+    return model
+
+
+def load_or_calibrate(path: Optional[str] = None) -> EngineCostModel:
+    """The calibration stored at `path` (default DEFAULT_CALIBRATION), benchmarking first if
+    there is none or it comes from an older version of calibrate()"""
+    path = path or DEFAULT_CALIBRATION
+    if os.path.exists(path):
+        try:
+            return EngineCostModel.load(path)
+        except ValueError as error:
+            print(f"{error}; running the benchmark again...")
+    else:
+        print(f"No engine calibration at {path}; running the benchmark...")
+    return calibrate(path)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Calibrate the cost model behind engine="auto"')
+    parser.add_argument('--output', type=str, default=DEFAULT_CALIBRATION, help='Calibration file to write')
+    parser.add_argument('--seed', type=int, default=0, help='Benchmark seed')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    model = calibrate(args.output, args.seed)
+    print(json.dumps(model.data, indent=2))
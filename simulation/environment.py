@@ -1,14 +1,34 @@
+import time
 import random
+import pickle
+import threading
+import queue
+from collections import deque
+import multiprocessing as mp
 import matplotlib.pyplot as plt
 import numpy as np
 from enum import Enum
 from typing import List, Dict, Tuple, Optional, Any, Set
+from topology import GraphTopology
+from curves import SharedCurveBuffer
+from stats import paired_run_comparison, bootstrap_replicates, percentile_ci, bootstrap_difference
+from survival import convergence_time_summary
+from runstore import RunStore
+from memory import MemoryModel, job_units, read_rss, reset_peak_rss
 
 
 class SignalCondition(Enum):
     NO_SIGNAL = "No Signal"        # Players cannot send signals
     MANDATORY_SIGNAL = "Mandatory Signal"  # Players must send a signal (Red/Blue)
     OPTIONAL_SIGNAL = "Optional Signal"    # Players can choose to send a signal or not
+    PUBLIC_SIGNAL = "Public Signal"        # Every player broadcasts Red/Blue to all; no pairwise signals
+    P2P_PUBLIC_SIGNAL = "P2P + Public Signal"  # Optional pairwise signals plus the public broadcast
+
+
+# Conditions with a public broadcast each round (see Environment._broadcast)
+PUBLIC_CONDITIONS = (SignalCondition.PUBLIC_SIGNAL, SignalCondition.P2P_PUBLIC_SIGNAL)
+# The pairwise conditions: the default of sweeps, which include public ones only on request
+PAIRWISE_CONDITIONS = tuple(c for c in SignalCondition if c not in PUBLIC_CONDITIONS)
 
 
 class Strategy(Enum):
@@ -16,14 +36,39 @@ class Strategy(Enum):
     REWARD_BASED = "Reward Based"    # Reinforcement learning with reward updating
 
 
+class AntitheticRandom(random.Random):
+    """Random stream whose uniforms are 1 - u of the same-seeded random.Random"""
+
+    def random(self) -> float:
+        return 1.0 - super().random()
+
+
+def stream_seed(base_seed: int, *key: int) -> int:
+    """Derive an independent 63-bit seed for the stream identified by `key`"""
+    state = np.random.SeedSequence(entropy=base_seed, spawn_key=key).generate_state(1, np.uint64)
+    return int(state[0] >> np.uint64(1))
+
+
+# Bumped whenever a change alters the random path of a seeded run, so stored seeds
+# are only replayed by an engine that reproduces them (see replay.py)
+ENGINE_VERSION = "2"
+
+# Stream key for topology draws (agent streams use keys 0..N-1)
+TOPOLOGY_STREAM = 2 ** 32
+
+
 # Base Agent Class 
 class Agent:
-    def __init__(self, name: str):
+    def __init__(self, name: str, rng: Optional[random.Random] = None):
         self.name = name
+        # Source of uniforms for all decisions; the global random module if not given
+        self.rng = rng if rng is not None else random
         # History tracking
         self.interaction_history = []  # List of interaction results
         self.signal_history = []       # List of signals sent
         self.choice_history = []       # List of final choices made
+        # Majority of the other agents' public announcements this round (None if tied or no broadcast)
+        self.public_majority = None
 
     def decide_signal(self, condition: SignalCondition) -> Optional[str]:
         """Decide what signal to send based on the communication condition"""
@@ -38,11 +83,44 @@ class Agent:
         """Update agent's internal state based on interaction outcome"""
         raise NotImplementedError("Subclasses must implement this method")
 
+    def decide_broadcast(self) -> Optional[str]:
+        """Public announcement (Red/Blue) under a public condition; None abstains"""
+        return None
+
+    def observe_public(self, blue: int, red: int) -> None:
+        """Read the other agents' Blue and Red announcement counts of this round"""
+        self.public_majority = "Blue" if blue > red else "Red" if red > blue else None
+
+    # Attributes that make up the learned state (see get_state / set_state)
+    STATE_FIELDS: Tuple[str, ...] = ()
+
+    def get_state(self) -> Tuple[float, ...]:
+        """Return the learned state as a compact tuple (histories and RNG excluded)"""
+        return tuple(getattr(self, field) for field in self.STATE_FIELDS)
+
+    def set_state(self, state: Tuple[float, ...]) -> None:
+        for field, value in zip(self.STATE_FIELDS, state):
+            setattr(self, field, value)
+
+    def reset(self, state: Tuple[float, ...]) -> None:
+        """Start over from a learned state (e.g. the initial one) without reallocating the agent"""
+        self.set_state(state)
+        self.interaction_history.clear()
+        self.signal_history.clear()
+        self.choice_history.clear()
+        self.public_majority = None
+
 
 # History-Based Agent Implementation
 class HistoryBasedAgent(Agent):
-    def __init__(self, name: str, pseudo_count: float = 2.0, learning_step_follow: float = 0.5):
-        super().__init__(name)
+    STATE_FIELDS = ("total_count", "blue_count", "no_signal_count", "signal_blue_count",
+                    "signal_red_count", "signal_choice_total", "no_signal_success_count",
+                    "blue_signal_success_count", "red_signal_success_count",
+                    "public_count", "public_success_count")
+
+    def __init__(self, name: str, pseudo_count: float = 2.0, learning_step_follow: float = 0.5,
+                 rng: Optional[random.Random] = None):
+        super().__init__(name, rng)
         # Pseudocounts for initial beliefs
         self.PSEUDO_COUNT = pseudo_count
         self.learning_step_follow = learning_step_follow
@@ -63,19 +141,33 @@ class HistoryBasedAgent(Agent):
         self.no_signal_success_count = self.PSEUDO_COUNT
         self.blue_signal_success_count = self.PSEUDO_COUNT / 2
         self.red_signal_success_count = self.PSEUDO_COUNT / 2
+
+        # Trust in the public majority: how often the opponent's choice matched it
+        self.public_count = 2 * self.PSEUDO_COUNT
+        self.public_success_count = self.PSEUDO_COUNT
     
     def get_blue_ratio(self) -> float:
         """Return probability of choosing Blue"""
         return self.blue_count / self.total_count
+
+    def _fallback_choice(self) -> str:
+        """Follow the public majority with the learned trust, otherwise the historical preference"""
+        if self.public_majority is not None and self.rng.random() < self.public_success_count / self.public_count:
+            return self.public_majority
+        return "Blue" if self.rng.random() < self.get_blue_ratio() else "Red"
+
+    def decide_broadcast(self) -> Optional[str]:
+        # Announce a draw from the historical preference, like a mandatory signal
+        return "Blue" if self.rng.random() < self.get_blue_ratio() else "Red"
     
     def decide_signal(self, condition: SignalCondition) -> Optional[str]:
-        if condition == SignalCondition.NO_SIGNAL:
-            # No signal allowed
+        if condition in (SignalCondition.NO_SIGNAL, SignalCondition.PUBLIC_SIGNAL):
+            # No pairwise signal allowed
             signal = None
         elif condition == SignalCondition.MANDATORY_SIGNAL:
             # Must send a signal based on historical preference
             blue_ratio = self.get_blue_ratio()
-            signal = "Blue" if random.random() < blue_ratio else "Red"
+            signal = "Blue" if self.rng.random() < blue_ratio else "Red"
         else:  # OPTIONAL_SIGNAL
             # 计算三种选择的概率
             no_signal_prob = self.no_signal_count / self.signal_choice_total
@@ -83,7 +175,7 @@ class HistoryBasedAgent(Agent):
             # red_signal_prob = self.signal_red_count / self.signal_choice_total
             
             # 根据概率决定是否发信号及信号颜色
-            rand = random.random()
+            rand = self.rng.random()
             if rand < no_signal_prob:
                 signal = None
             elif rand < no_signal_prob + blue_signal_prob:
@@ -108,12 +200,10 @@ class HistoryBasedAgent(Agent):
                 choice = own_signal
             # 如果信号不一致，则基于历史概率选择
             else:
-                blue_ratio = self.get_blue_ratio()
-                choice = "Blue" if random.random() < blue_ratio else "Red"
+                choice = self._fallback_choice()
         # 如果双方都没有发送信号，则基于历史概率选择
         else:
-            blue_ratio = self.get_blue_ratio()
-            choice = "Blue" if random.random() < blue_ratio else "Red"
+            choice = self._fallback_choice()
             
         self.choice_history.append(choice)
         return choice
@@ -156,6 +246,12 @@ class HistoryBasedAgent(Agent):
                 else:
                     self.blue_count += 0  # 加强红色倾向 # This implies red_count effectively increases as total_count does but blue_count doesn't
                     self.total_count += self.learning_step_follow
+
+        # 4. Public condition: count whether following the majority would have matched the opponent
+        if self.public_majority is not None:
+            self.public_count += 1
+            if opponent_choice == self.public_majority:
+                self.public_success_count += 1
         
         # 记录交互结果
         self.interaction_history.append({
@@ -169,12 +265,16 @@ class HistoryBasedAgent(Agent):
 
 # Reward-Based Agent Implementation 
 class RewardBasedAgent(Agent):
+    STATE_FIELDS = ("p_choice_blue", "p_send_signal", "p_signal_blue", "p_follow_public")
+
     def __init__(self, name: str, alpha: float = 0.2, beta: float = 0.2,
                  initial_p_choice_blue: float = 0.5,
                  initial_p_send_signal: float = 0.5,
                  initial_p_signal_blue: float = 0.5,
-                 conflict_learning_boost: float = 1.5):
-        super().__init__(name)
+                 conflict_learning_boost: float = 1.5,
+                 initial_p_follow_public: float = 0.5,
+                 rng: Optional[random.Random] = None):
+        super().__init__(name, rng)
         # Learning rate parameters
         self.ALPHA = alpha
         self.BETA = beta
@@ -186,17 +286,29 @@ class RewardBasedAgent(Agent):
         # 发送信号的相关参数
         self.p_send_signal = initial_p_send_signal   # 发送信号的概率 (初始50%不发送信号)
         self.p_signal_blue = initial_p_signal_blue   # 如果发送信号，选择Blue的概率 (初始蓝色和红色各25%)
+        # Probability of following the public majority when the pairwise signals do not decide
+        self.p_follow_public = initial_p_follow_public
+
+    def _fallback_choice(self) -> str:
+        """Follow the public majority with probability p_follow_public, otherwise p_choice_blue"""
+        if self.public_majority is not None and self.rng.random() < self.p_follow_public:
+            return self.public_majority
+        return "Blue" if self.rng.random() < self.p_choice_blue else "Red"
+
+    def decide_broadcast(self) -> Optional[str]:
+        # Announce the intended choice
+        return "Blue" if self.rng.random() < self.p_choice_blue else "Red"
     
     def decide_signal(self, condition: SignalCondition) -> Optional[str]:
-        if condition == SignalCondition.NO_SIGNAL:
+        if condition in (SignalCondition.NO_SIGNAL, SignalCondition.PUBLIC_SIGNAL):
             signal = None
         elif condition == SignalCondition.MANDATORY_SIGNAL:
-            signal = "Blue" if random.random() < self.p_signal_blue else "Red"
+            signal = "Blue" if self.rng.random() < self.p_signal_blue else "Red"
         else:  # OPTIONAL_SIGNAL
             # 先决定是否发送信号
-            if random.random() < self.p_send_signal:
+            if self.rng.random() < self.p_send_signal:
                 # 发送信号，再决定发送什么颜色
-                signal = "Blue" if random.random() < self.p_signal_blue else "Red"
+                signal = "Blue" if self.rng.random() < self.p_signal_blue else "Red"
             else:
                 signal = None
         
@@ -206,7 +318,7 @@ class RewardBasedAgent(Agent):
     def decide_final_choice(self, opponent_signal: Optional[str], own_signal: Optional[str]) -> str:
         # 如果没有信号交换，决策基于选择偏好
         if own_signal is None and opponent_signal is None:
-            choice = "Blue" if random.random() < self.p_choice_blue else "Red"
+            choice = self._fallback_choice()
         # 如果只有对手发送了信号，在纯协调博弈中应始终跟随对手的信号
         elif own_signal is None and opponent_signal is not None:
             choice = opponent_signal  # 始终跟随
@@ -220,7 +332,7 @@ class RewardBasedAgent(Agent):
                 choice = own_signal
             else:
                 # 信号冲突，直接使用p_choice_blue决定是选择蓝色还是红色
-                choice = "Blue" if random.random() < self.p_choice_blue else "Red"
+                choice = self._fallback_choice()
         
         self.choice_history.append(choice)
         return choice
@@ -279,11 +391,19 @@ class RewardBasedAgent(Agent):
                         self.p_choice_blue = self.p_choice_blue + adj * (1 - self.p_choice_blue)
                     else:
                         self.p_choice_blue = self.p_choice_blue - adj * self.p_choice_blue
+
+        # 5. Public condition: reinforce following the majority if it matched the opponent's choice
+        if self.public_majority is not None:
+            if opponent_choice == self.public_majority:
+                self.p_follow_public = self.p_follow_public + self.ALPHA * (1 - self.p_follow_public)
+            else:
+                self.p_follow_public = self.p_follow_public - self.BETA * self.p_follow_public
         
         # 确保所有概率都在[0,1]范围内
         self.p_send_signal = max(0.0, min(1.0, self.p_send_signal))
         self.p_signal_blue = max(0.0, min(1.0, self.p_signal_blue))
         self.p_choice_blue = max(0.0, min(1.0, self.p_choice_blue))
+        self.p_follow_public = max(0.0, min(1.0, self.p_follow_public))
         
         # 记录交互结果
         self.interaction_history.append({
@@ -295,42 +415,271 @@ class RewardBasedAgent(Agent):
         })
 
 
+# Strategy registry
+class StrategySpec:
+    """How to build agents of one strategy.
+
+    param_schema maps each parameter (a keyword argument of agent_class) to
+    {"default": value, "min": lower bound, "max": upper bound}; bounds are optional.
+    agent_class must also accept an `rng` keyword (see Agent).
+    kernel, if set, is a vectorized implementation over arrays of agent states
+    (see batched.py) that fast engines use instead of agent_class.
+    """
+
+    def __init__(self, key, agent_class, param_schema: Dict[str, Dict[str, Any]],
+                 kernel=None, description: str = ""):
+        self.key = key
+        self.agent_class = agent_class
+        self.param_schema = param_schema
+        self.kernel = kernel
+        self.description = description
+        self._ignored_params = set()
+
+    @property
+    def name(self) -> str:
+        return self.key.name if isinstance(self.key, Enum) else str(self.key)
+
+    def resolve_params(self, params: Dict[str, Any], agent_name: str = "") -> Dict[str, Any]:
+        """Validate params against the schema and fill in defaults.
+
+        Params outside the schema are ignored, as the strategy constructors always did,
+        with a warning printed once per strategy and param.
+        """
+        unknown = set(params) - set(self.param_schema) - self._ignored_params
+        if unknown:
+            self._ignored_params.update(unknown)
+            print(f"Warning: ignoring unknown params {sorted(unknown)} for strategy {self.name} " +
+                  f"(agent {agent_name}). Expected a subset of {sorted(self.param_schema)}")
+        resolved = {}
+        for param, schema in self.param_schema.items():
+            value = params.get(param, schema.get("default"))
+            if "min" in schema and value < schema["min"] or "max" in schema and value > schema["max"]:
+                raise ValueError(f"Param {param}={value} for agent {agent_name} is outside " +
+                                 f"[{schema.get('min')}, {schema.get('max')}]")
+            resolved[param] = value
+        return resolved
+
+    def build(self, name: str, params: Dict[str, Any], rng: Optional[random.Random] = None) -> Agent:
+        return self.agent_class(name=name, rng=rng, **self.resolve_params(params, name))
+
+
+STRATEGY_REGISTRY: Dict[Any, StrategySpec] = {}
+
+
+def register_strategy(key, agent_class, param_schema: Dict[str, Dict[str, Any]],
+                      kernel=None, description: str = "") -> StrategySpec:
+    """Register (or replace) a strategy; key is a Strategy member or a plugin name string.
+
+    agent_class must list every attribute it learns during a run in STATE_FIELDS:
+    Environment.reset restores only those, so sweeps can reuse an environment between
+    runs. Agents that declare no STATE_FIELDS (e.g. ones that never learn) are still
+    valid, but environments containing them are rebuilt for every run instead of reset.
+    """
+    spec = StrategySpec(key, agent_class, param_schema, kernel=kernel, description=description)
+    STRATEGY_REGISTRY[key] = spec
+    return spec
+
+
+def register_kernel(key, kernel) -> None:
+    """Attach a batched kernel to an already registered strategy"""
+    get_strategy_spec(key).kernel = kernel
+
+
+def get_strategy_spec(strategy_type) -> StrategySpec:
+    """Look up a strategy by registry key, Strategy name (e.g. "HISTORY_BASED") or value"""
+    if strategy_type in STRATEGY_REGISTRY:
+        return STRATEGY_REGISTRY[strategy_type]
+    if isinstance(strategy_type, str):
+        for key, spec in STRATEGY_REGISTRY.items():
+            if strategy_type in (spec.name, getattr(key, "value", None)):
+                return spec
+    raise ValueError(f"Unknown strategy_type: {strategy_type}. " +
+                     f"Registered: {[spec.name for spec in STRATEGY_REGISTRY.values()]}")
+
+
+register_strategy(
+    Strategy.HISTORY_BASED, HistoryBasedAgent,
+    {
+        "pseudo_count": {"default": 2.0, "min": 1e-9},
+        "learning_step_follow": {"default": 0.5, "min": 0.0}
+    },
+    description="Frequency-based learning from history"
+)
+register_strategy(
+    Strategy.REWARD_BASED, RewardBasedAgent,
+    {
+        "alpha": {"default": 0.2, "min": 0.0, "max": 1.0},
+        "beta": {"default": 0.2, "min": 0.0, "max": 1.0},
+        "initial_p_choice_blue": {"default": 0.5, "min": 0.0, "max": 1.0},
+        "initial_p_send_signal": {"default": 0.5, "min": 0.0, "max": 1.0},
+        "initial_p_signal_blue": {"default": 0.5, "min": 0.0, "max": 1.0},
+        "conflict_learning_boost": {"default": 1.5, "min": 0.0},
+        "initial_p_follow_public": {"default": 0.5, "min": 0.0, "max": 1.0}
+    },
+    description="Reinforcement learning with reward updating"
+)
+
+
+def rotation_pairs(n: int, rounds: int) -> List[Tuple[int, int]]:
+    """Return the rotation schedule's pairs of agent indices for the given round number"""
+    if n < 2: # Cannot form pairs if less than 2 agents
+        return []
+
+    if n == 3:
+        # Special handling for three-person groups
+        sitting_out = rounds % 3  # Player sitting out in rotation
+        agents_playing = [i for i in range(n) if i != sitting_out]
+        if len(agents_playing) == 2: # Ensure we still have two players
+             return [(agents_playing[0], agents_playing[1])]
+        else: # Should not happen if n=3, but as a safeguard
+             return []
+    
+    elif n % 2 == 0:  # Even number of players
+        # Use rotation matching algorithm
+        # First player is fixed, others rotate
+        # For example with 4 players:
+        # Round 1: (0,1), (2,3)
+        # Round 2: (0,2), (1,3)
+        # Round 3: (0,3), (1,2)
+        # ...then cycle
+        
+        # Adjust rounds for 0-based indexing for modulo operations if needed, but current logic seems fine
+        # The number of distinct sets of pairings is n-1
+        if n == 2: # Special case for 2 agents, always match them
+            return [(0, 1)]
+
+        rotation_step = rounds % (n - 1) # rounds can start from 0 or 1. If 0, it's fine.
+                                         # If rounds starts from 1, (rounds -1) % (n-1) is also common.
+                                         # Let's assume rounds starts from 0 for simplicity here.
+        
+        matchups = []
+        
+        # Create a temporary list of agents to permute, excluding the first agent.
+        # Agents from index 1 to n-1
+        rotating_agents = list(range(1, n))
+        
+        # Apply the rotation to the list of rotating_agents
+        # For each step in rotation_step, the last element moves to the first position
+        for _ in range(rotation_step):
+            last_agent = rotating_agents.pop()
+            rotating_agents.insert(0, last_agent)
+
+        # Match the first agent (index 0) with the first agent in the now-rotated list
+        matchups.append((0, rotating_agents[0]))
+        
+        # Pair up the rest of the agents in the rotated list
+        # These are now from rotating_agents[1] to rotating_agents[n-2]
+        for i in range(1, len(rotating_agents) // 2 + 1): # Iterate up to half the length of remaining agents
+            idx1 = 2 * i - 1
+            idx2 = 2 * i
+            if idx2 < len(rotating_agents) : # Ensure the second index is within bounds
+                matchups.append((rotating_agents[idx1], rotating_agents[idx2]))
+        
+        return matchups
+        
+    else:  # Odd number of players (n > 3, since n=3 is handled)
+        # Each player sits out once in n rounds
+        sitting_out_idx = rounds % n
+        active_agents = [i for i in range(n) if i != sitting_out_idx]
+        
+        # Now we have an even number of active_agents (n-1 agents)
+        # We can apply the even number matching logic to active_agents
+        n_active = len(active_agents)
+        if n_active < 2: return []
+
+        if n_active == 2:
+             return [(active_agents[0], active_agents[1])]
+
+        matchups = []
+        # rotation_step for the active_agents group
+        # The number of distinct sets of pairings for n_active agents is n_active - 1
+        rotation_step = rounds % (n_active - 1) 
+
+        temp_rotating_agents = list(active_agents[1:])
+
+        for _ in range(rotation_step):
+            last_agent = temp_rotating_agents.pop()
+            temp_rotating_agents.insert(0, last_agent)
+        
+        matchups.append((active_agents[0], temp_rotating_agents[0]))
+
+        for i in range(1, len(temp_rotating_agents) // 2 + 1):
+            idx1 = 2 * i - 1
+            idx2 = 2 * i
+            if idx2 < len(temp_rotating_agents):
+                matchups.append((temp_rotating_agents[idx1], temp_rotating_agents[idx2]))
+        return matchups
+
+
+class EnvironmentSnapshot:
+    """Compact state of an Environment at a round boundary (see Environment.snapshot).
+
+    Configs and the topology graph are shared by reference; the per-agent learned state
+    is a small tuple and each agent's Mersenne Twister state is one row of a uint32 array
+    (2.5 KB per agent). Use to_bytes()/from_bytes() to store snapshots outside the process.
+    """
+
+    def __init__(self, agent_configs, signal_condition, seed, antithetic, rounds, converged,
+                 convergence_choice, agent_states, last_choices, rng_states, topology_state,
+                 history=None):
+        self.agent_configs = agent_configs
+        self.signal_condition = signal_condition
+        self.seed = seed
+        self.antithetic = antithetic
+        self.rounds = rounds
+        self.converged = converged
+        self.convergence_choice = convergence_choice
+        self.agent_states = agent_states
+        self.last_choices = last_choices
+        self.rng_states = rng_states
+        self.topology_state = topology_state
+        self.history = history
+
+    def to_bytes(self) -> bytes:
+        return pickle.dumps(self.__dict__, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EnvironmentSnapshot":
+        snapshot = cls.__new__(cls)
+        snapshot.__dict__.update(pickle.loads(data))
+        return snapshot
+
+
 class Environment:
     def __init__(self, 
                  agent_configs: List[Dict[str, Any]], 
-                 signal_condition: SignalCondition):
+                 signal_condition: SignalCondition,
+                 topology: Optional[GraphTopology] = None,
+                 seed: Optional[int] = None,
+                 antithetic: bool = False):
         self.agent_configs = agent_configs
         self.num_agents = len(agent_configs)
         self.signal_condition = signal_condition
+
+        # Agent i draws from its own stream stream_seed(seed, i), so environments built
+        # with the same seed share random numbers agent by agent (common random numbers).
+        # antithetic=True uses 1 - u for every uniform of those streams.
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.antithetic = antithetic
+
+        # Interaction structure: None means the all-to-all rotation schedule,
+        # otherwise pairs are drawn from the topology's graph each round
+        if topology is not None and topology.graph.num_nodes != self.num_agents:
+            raise ValueError(f"Topology has {topology.graph.num_nodes} nodes " +
+                             f"but there are {self.num_agents} agents")
+        self.topology = topology
         
         self.agents: List[Agent] = []
         for i, config in enumerate(agent_configs):
             agent_name = config.get("name", f"Agent {i+1}")
-            strategy_type = config.get("strategy_type")
             params = config.get("params", {})
-
-            if strategy_type == Strategy.HISTORY_BASED:
-                self.agents.append(
-                    HistoryBasedAgent(
-                        name=agent_name,
-                        pseudo_count=params.get("pseudo_count", 2.0),
-                        learning_step_follow=params.get("learning_step_follow", 0.5)
-                    )
-                )
-            elif strategy_type == Strategy.REWARD_BASED:
-                self.agents.append(
-                    RewardBasedAgent(
-                        name=agent_name,
-                        alpha=params.get("alpha", 0.2),
-                        beta=params.get("beta", 0.2),
-                        initial_p_choice_blue=params.get("initial_p_choice_blue", 0.5),
-                        initial_p_send_signal=params.get("initial_p_send_signal", 0.5),
-                        initial_p_signal_blue=params.get("initial_p_signal_blue", 0.5),
-                        conflict_learning_boost=params.get("conflict_learning_boost", 1.5)
-                    )
-                )
-            else:
-                raise ValueError(f"Unknown strategy_type: {strategy_type} for agent {agent_name}")
+            try:
+                spec = get_strategy_spec(config.get("strategy_type"))
+            except ValueError as e:
+                raise ValueError(f"{e} (agent {agent_name})") from None
+            self.agents.append(spec.build(agent_name, params, rng=self._agent_rng(i)))
+        # Learned state of freshly built agents, restored by reset()
+        self._initial_states = [agent.get_state() for agent in self.agents]
 
         # Track rounds and convergence
         self.rounds = 0
@@ -342,104 +691,86 @@ class Environment:
             "success_rate": [],  # Success rate per round
             "blue_choices": []   # Percentage of Blue choices per round
         }
+        # Optional per-interaction hook, called as
+        # trace_callback(round, name1, name2, signal1, signal2, choice1, choice2, success)
+        self.trace_callback = None
+        # Blue and Red announcement counts of the last round under a public condition
+        self.public_counts = None
     
-    def _get_rotation_matchups(self):
-        """Return rotation matchups"""
-        n = self.num_agents
-        
-        if n < 2: # Cannot form pairs if less than 2 agents
-            return []
-
-        if n == 3:
-            # Special handling for three-person groups
-            sitting_out = self.rounds % 3  # Player sitting out in rotation
-            agents_playing = [agent for i, agent in enumerate(self.agents) if i != sitting_out]
-            if len(agents_playing) == 2: # Ensure we still have two players
-                 return [(agents_playing[0], agents_playing[1])]
-            else: # Should not happen if n=3, but as a safeguard
-                 return []
-        
-        elif n % 2 == 0:  # Even number of players
-            # Use rotation matching algorithm
-            # First player is fixed, others rotate
-            # For example with 4 players:
-            # Round 1: (0,1), (2,3)
-            # Round 2: (0,2), (1,3)
-            # Round 3: (0,3), (1,2)
-            # ...then cycle
-            
-            # Adjust rounds for 0-based indexing for modulo operations if needed, but current logic seems fine
-            # The number of distinct sets of pairings is n-1
-            if n == 2: # Special case for 2 agents, always match them
-                return [(self.agents[0], self.agents[1])]
-
-            rotation_step = self.rounds % (n - 1) # self.rounds can start from 0 or 1. If 0, it's fine.
-                                                  # If rounds starts from 1, (self.rounds -1) % (n-1) is also common.
-                                                  # Let's assume self.rounds starts from 0 for simplicity here.
-            
-            matchups = []
-            
-            # Create a temporary list of agents to permute, excluding the first agent.
-            # Agents from index 1 to n-1
-            rotating_agents = list(self.agents[1:]) 
-            
-            # Apply the rotation to the list of rotating_agents
-            # For each step in rotation_step, the last element moves to the first position
-            for _ in range(rotation_step):
-                last_agent = rotating_agents.pop()
-                rotating_agents.insert(0, last_agent)
-
-            # Match the first agent (self.agents[0]) with the first agent in the now-rotated list
-            matchups.append((self.agents[0], rotating_agents[0]))
-            
-            # Pair up the rest of the agents in the rotated list
-            # These are now from rotating_agents[1] to rotating_agents[n-2]
-            for i in range(1, len(rotating_agents) // 2 + 1): # Iterate up to half the length of remaining agents
-                idx1 = 2 * i - 1
-                idx2 = 2 * i
-                if idx2 < len(rotating_agents) : # Ensure the second index is within bounds
-                    matchups.append((rotating_agents[idx1], rotating_agents[idx2]))
-            
-            return matchups
-            
-        else:  # Odd number of players (n > 3, since n=3 is handled)
-            # Each player sits out once in n rounds
-            sitting_out_idx = self.rounds % n
-            active_agents = [agent for i, agent in enumerate(self.agents) if i != sitting_out_idx]
-            
-            # Now we have an even number of active_agents (n-1 agents)
-            # We can apply the even number matching logic to active_agents
-            n_active = len(active_agents)
-            if n_active < 2: return []
+    def reset(self, seed: Optional[int] = None, antithetic: Optional[bool] = None) -> None:
+        """Return to the state of a newly built Environment with this seed, in place.
 
-            if n_active == 2:
-                 return [(active_agents[0], active_agents[1])]
+        Agents, their random streams and history lists are reused; only the learned state
+        and the seeds are reset. Agents must list their learned state in STATE_FIELDS;
+        raises ValueError if some agent declares none (see resettable).
+        antithetic=None keeps the current setting.
+        """
+        self._check_resettable()
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        if antithetic is not None and antithetic != self.antithetic:
+            self.antithetic = antithetic
+            for i, agent in enumerate(self.agents):
+                agent.rng = self._agent_rng(i)
+        else:
+            for i, agent in enumerate(self.agents):
+                agent.rng.seed(stream_seed(self.seed, i))
+        for agent, state in zip(self.agents, self._initial_states):
+            agent.reset(state)
+        if self.topology is not None:
+            self.topology.reseed(stream_seed(self.seed, TOPOLOGY_STREAM))
+        self.rounds = 0
+        self.converged = False
+        self.convergence_choice = None
+        self.interaction_stats = {"success_rate": [], "blue_choices": []}
+        self.public_counts = None
 
-            matchups = []
-            # rotation_step for the active_agents group
-            # The number of distinct sets of pairings for n_active agents is n_active - 1
-            rotation_step = self.rounds % (n_active - 1) 
+    @property
+    def resettable(self) -> bool:
+        """Whether reset() can restore every agent, i.e. all their classes declare STATE_FIELDS"""
+        return all(type(agent).STATE_FIELDS for agent in self.agents)
 
-            temp_rotating_agents = list(active_agents[1:])
+    def _check_resettable(self) -> None:
+        if not self.resettable:
+            stateless = sorted({type(agent).__name__ for agent in self.agents if not type(agent).STATE_FIELDS})
+            raise ValueError(f"Cannot reset: {stateless} declare no STATE_FIELDS, so their learned " +
+                             "state would carry over; build a new Environment instead")
 
-            for _ in range(rotation_step):
-                last_agent = temp_rotating_agents.pop()
-                temp_rotating_agents.insert(0, last_agent)
-            
-            matchups.append((active_agents[0], temp_rotating_agents[0]))
-
-            for i in range(1, len(temp_rotating_agents) // 2 + 1):
-                idx1 = 2 * i - 1
-                idx2 = 2 * i
-                if idx2 < len(temp_rotating_agents):
-                    matchups.append((temp_rotating_agents[idx1], temp_rotating_agents[idx2]))
-            return matchups
+    def _agent_rng(self, index: int) -> random.Random:
+        rng_class = AntitheticRandom if self.antithetic else random.Random
+        return rng_class(stream_seed(self.seed, index))
+    
+    def _get_rotation_matchups(self):
+        """Return rotation matchups"""
+        agents = self.agents
+        return [(agents[i], agents[j]) for i, j in rotation_pairs(self.num_agents, self.rounds)]
+    
+    def _get_matchups(self):
+        """Return this round's pairs from the topology, or the rotation schedule if none is set"""
+        if self.topology is None:
+            return self._get_rotation_matchups()
+        agents = self.agents
+        return [(agents[i], agents[j]) for i, j in self.topology.draw_pairs()]
     
+    def _broadcast(self) -> None:
+        """Reduce this round's public announcements to Blue/Red counts once.
+
+        Every agent then reads the counts without its own announcement in O(1), so the
+        broadcast costs O(N) per round instead of each agent scanning all announcements.
+        """
+        announcements = [agent.decide_broadcast() for agent in self.agents]
+        blue = announcements.count("Blue")
+        red = announcements.count("Red")
+        for agent, announcement in zip(self.agents, announcements):
+            agent.observe_public(blue - (announcement == "Blue"), red - (announcement == "Red"))
+        self.public_counts = (blue, red)
+
     def run_round(self):
         """Run a single round of interactions"""
         self.rounds += 1 # Increment rounds at the beginning
+        if self.signal_condition in PUBLIC_CONDITIONS:
+            self._broadcast()
         
-        matchups = self._get_rotation_matchups()
+        matchups = self._get_matchups()
         
         if not matchups: # If no matchups (e.g., less than 2 players, or error in logic)
             # Potentially log this or handle as an empty round
@@ -453,6 +784,7 @@ class Environment:
         blue_count = 0
         num_interactions = len(matchups)
         num_choices_made = 0 # For blue_ratio calculation
+        trace = self.trace_callback
         
         for agent1, agent2 in matchups:
             # Step 1: Agents decide signals
@@ -478,6 +810,9 @@ class Environment:
             # Step 4: Agents update based on outcome
             agent1.update(signal1, signal2, choice1, choice2, success)
             agent2.update(signal2, signal1, choice2, choice1, success)
+            
+            if trace is not None:
+                trace(self.rounds, agent1.name, agent2.name, signal1, signal2, choice1, choice2, success)
         
         # Update statistics
         current_success_rate = successes / num_interactions if num_interactions > 0 else 0
@@ -518,20 +853,124 @@ class Environment:
         
         # return False # Not strictly necessary
     
-    def run_simulation(self, max_rounds=100000):
-        """Run the simulation until convergence or max rounds"""
-        self.rounds = 0 # Ensure rounds reset for a new simulation run
-        self.converged = False
-        self.convergence_choice = None
-        # Reset agent history for fresh simulation if env object is reused for multiple simulations
-        # This should ideally be done when creating a new Environment instance for each run.
-        # For now, assuming fresh Environment for each call to run_simulation.
+    def run_simulation(self, max_rounds=100000, progress_callback=None, progress_every=1000,
+                       resume=False):
+        """Run the simulation until convergence or max rounds
+
+        If given, progress_callback(rounds) is called every `progress_every` rounds,
+        which keeps telemetry off the per-round hot path.
+        resume=True continues from the current round (e.g. after restore()) instead of
+        restarting the round counter; max_rounds stays a total budget.
+        """
+        if not resume:
+            self.rounds = 0 # Ensure rounds reset for a new simulation run
+            self.converged = False
+            self.convergence_choice = None
+        # Agent state is not reset here; call reset(seed) first to reuse the environment for a new run
 
         while not self.converged and self.rounds < max_rounds:
             self.run_round()
+            if progress_callback is not None and self.rounds % progress_every == 0:
+                progress_callback(self.rounds)
         
         return self.rounds, self.converged, self.convergence_choice
     
+    def release_history(self) -> None:
+        """Free the per-agent histories and per-round stats of a finished run.
+
+        Each agent keeps only its last choice, which is all a continued run needs.
+        """
+        for agent in self.agents:
+            last_choice = agent.choice_history[-1:] if agent.choice_history else []
+            agent.interaction_history = []
+            agent.signal_history = []
+            agent.choice_history = last_choice
+        self.interaction_stats = {"success_rate": [], "blue_choices": []}
+
+    def snapshot(self, include_history: bool = False) -> EnvironmentSnapshot:
+        """Capture the complete simulation state.
+
+        Without include_history only each agent's last choice is kept (enough to continue
+        the run and its convergence checks), which keeps snapshots small. Continue a restored
+        environment with run_simulation(max_rounds, resume=True).
+        """
+        history = None
+        if include_history:
+            history = {
+                "interaction_stats": {key: list(values) for key, values in self.interaction_stats.items()},
+                "agents": [(list(agent.interaction_history), list(agent.signal_history),
+                            list(agent.choice_history)) for agent in self.agents]
+            }
+        topology_state = None
+        if self.topology is not None:
+            topology_state = (self.topology.graph, self.topology.mode, self.topology.pairs_per_round,
+                              self.topology.rng.bit_generator.state)
+        return EnvironmentSnapshot(
+            agent_configs=self.agent_configs,
+            signal_condition=self.signal_condition,
+            seed=self.seed,
+            antithetic=self.antithetic,
+            rounds=self.rounds,
+            converged=self.converged,
+            convergence_choice=self.convergence_choice,
+            agent_states=[agent.get_state() for agent in self.agents],
+            last_choices=[agent.choice_history[-1] if agent.choice_history else None
+                          for agent in self.agents],
+            rng_states=np.array([agent.rng.getstate()[1] for agent in self.agents], dtype=np.uint32),
+            topology_state=topology_state,
+            history=history
+        )
+
+    def restore(self, snapshot: EnvironmentSnapshot, restore_rng: bool = True) -> None:
+        """Load a snapshot of an environment with the same agent configs, in place.
+
+        With restore_rng=False the current random streams are kept, so the restored
+        environment continues on a different random path than the original.
+        """
+        self.rounds = snapshot.rounds
+        self.converged = snapshot.converged
+        self.convergence_choice = snapshot.convergence_choice
+        for i, agent in enumerate(self.agents):
+            agent.set_state(snapshot.agent_states[i])
+            if snapshot.history is not None:
+                interactions, signals, choices = snapshot.history["agents"][i]
+                agent.interaction_history = list(interactions)
+                agent.signal_history = list(signals)
+                agent.choice_history = list(choices)
+            else:
+                last_choice = snapshot.last_choices[i]
+                agent.interaction_history = []
+                agent.signal_history = []
+                agent.choice_history = [last_choice] if last_choice is not None else []
+            if restore_rng:
+                agent.rng.setstate((3, tuple(snapshot.rng_states[i].tolist()), None))
+        if snapshot.history is not None:
+            self.interaction_stats = {key: list(values)
+                                      for key, values in snapshot.history["interaction_stats"].items()}
+        else:
+            self.interaction_stats = {"success_rate": [], "blue_choices": []}
+        if restore_rng and self.topology is not None and snapshot.topology_state is not None:
+            self.topology.rng.bit_generator.state = snapshot.topology_state[3]
+
+    @classmethod
+    def from_snapshot(cls, snapshot: EnvironmentSnapshot, seed: Optional[int] = None) -> "Environment":
+        """Build an environment from a snapshot; a seed gives it fresh random streams instead"""
+        topology = None
+        if snapshot.topology_state is not None:
+            graph, mode, pairs_per_round, _ = snapshot.topology_state
+            topology = GraphTopology(graph, mode, pairs_per_round,
+                                     seed=stream_seed(seed, TOPOLOGY_STREAM) if seed is not None else None)
+        env = cls(snapshot.agent_configs, snapshot.signal_condition, topology=topology,
+                  seed=seed if seed is not None else snapshot.seed, antithetic=snapshot.antithetic)
+        env.restore(snapshot, restore_rng=seed is None)
+        return env
+
+    def fork(self, k: int, seed: Optional[int] = None) -> List["Environment"]:
+        """Return k independent copies of the current state, each with fresh random streams"""
+        snapshot = self.snapshot(include_history=False)
+        base_seed = seed if seed is not None else random.getrandbits(63)
+        return [Environment.from_snapshot(snapshot, seed=stream_seed(base_seed, j)) for j in range(k)]
+    
     def print_status(self):
         """Print the current status of the simulation"""
         if self.converged:
@@ -551,11 +990,449 @@ class Environment:
                 print(f"{agent.name} (Unknown Type): No specific stats available.")
 
 
+def build_experiment_setups(agent_sizes: List[int],
+                            signal_conditions: Optional[List[SignalCondition]] = None,
+                            strategies: Optional[List[Strategy]] = None,
+                            runs_per_setup: int = 20,
+                            max_rounds: int = 100000) -> List[Dict[str, Any]]:
+    """Build homogeneous setups (all agents share one strategy) for every size/condition/strategy.
+
+    signal_conditions defaults to the pairwise ones (PAIRWISE_CONDITIONS); pass public
+    conditions explicitly to include them.
+    """
+    signal_conditions = signal_conditions or list(PAIRWISE_CONDITIONS)
+    strategies = strategies or list(Strategy)
+    setups = []
+    for num_agents in agent_sizes:
+        for signal_condition in signal_conditions:
+            for strategy in strategies:
+                setups.append({
+                    "name": f"{num_agents} agents, {signal_condition.value}, {strategy.value}",
+                    "signal_condition": signal_condition,
+                    "runs_per_setup": runs_per_setup,
+                    "max_rounds": max_rounds,
+                    "agent_configs": [{"strategy_type": strategy} for _ in range(num_agents)]
+                })
+    return setups
+
+
+# Per-process state of pool workers, set by _init_sweep_worker
+_SWEEP_WORKER: Dict[str, Any] = {}
+
+
+def _init_sweep_worker(curve_buffers, events, slot_counter):
+    """Pool initializer: give the worker a stable name and its shared resources"""
+    with slot_counter.get_lock():
+        slot = slot_counter.value
+        slot_counter.value += 1
+    _SWEEP_WORKER.update({
+        "name": f"worker-{slot}",
+        "emit": events.put if events is not None else None,
+        "curve_buffers": curve_buffers,
+        "env_pool": {}
+    })
+
+
+def _run_sweep_job_in_worker(job):
+    return _run_sweep_job(job, _SWEEP_WORKER)
+
+
+# Environments kept per worker (most recently used setups); see _pooled_environment
+ENV_POOL_SIZE = 8
+
+
+def _pooled_environment(job: Dict[str, Any], env_pool: Optional[Dict[str, Environment]]) -> Environment:
+    """The worker's Environment for the job's setup, reset to the job's seed, or a new one.
+
+    Runs stay independent: reset() restores exactly the state a new Environment with the
+    same seed would have, so short runs skip rebuilding agents from their configs. Only
+    resettable environments (all agents declare STATE_FIELDS) are kept in the pool.
+    """
+    env = env_pool.pop(job["setup_name"], None) if env_pool is not None else None
+    if env is not None:
+        env.reset(job["seed"], job["antithetic"])
+    else:
+        topology = job["topology"]
+        env = Environment(agent_configs=job["agent_configs"], 
+                          signal_condition=job["signal_condition"],
+                          topology=(topology.fresh(stream_seed(job["seed"], TOPOLOGY_STREAM))
+                                    if topology is not None else None),
+                          seed=job["seed"],
+                          antithetic=job["antithetic"])
+    if env_pool is not None and env.resettable:
+        # Re-inserting keeps the dict in least-recently-used order
+        env_pool[job["setup_name"]] = env
+        while len(env_pool) > ENV_POOL_SIZE:
+            env_pool.pop(next(iter(env_pool)))
+    return env
+
+
+def _outcome_within(run_data: Dict[str, Any], max_rounds: int) -> Tuple[int, bool, Optional[str]]:
+    """A stored run's outcome under a budget no larger than it has been simulated to"""
+    if run_data["converged"] and run_data["rounds_to_convergence"] <= max_rounds:
+        return run_data["rounds_to_convergence"], True, run_data["convergence_choice"]
+    return max_rounds, False, None
+
+
+def _run_sweep_job(job: Dict[str, Any], context: Dict[str, Any]):
+    """Run the job's simulations of a setup and return (setup_name, [run_data, ...], store_entry, measured).
+
+    context holds the worker name, an optional telemetry event sink ("emit"),
+    the setups' SharedCurveBuffers and the worker's Environment pool ("env_pool"). If the job carries a stored result ("resume"),
+    runs are continued from their saved end state rather than restarted. store_entry is
+    what to keep in the RunStore for this job, or None if nothing changed or no store is used.
+    measured holds the job's wall time in seconds, the process's RSS when the job started
+    and its peak RSS during the job (None where /proc is unavailable) with the job's units
+    (see memory.MemoryModel); every run_data records the peak as "peak_rss".
+    """
+    started = time.perf_counter()
+    rss_before = reset_peak_rss()
+    setup_name = job["setup_name"]
+    run_numbers = job["run_numbers"]
+    max_rounds = job["max_rounds"]
+    worker = context.get("name", "main")
+    emit = context.get("emit")
+    curve_buffer = (context.get("curve_buffers") or {}).get(setup_name)
+    progress = {}
+    if emit is not None:
+        progress = {"progress_callback": lambda r: emit(("progress", worker, r)),
+                    "progress_every": job["snapshot_every"]}
+        emit(("job_started", worker, setup_name, run_numbers[0], max_rounds))
+
+    resume = job.get("resume")
+    end_state = None
+    if resume is not None and (resume["state"] is None or max_rounds <= resume["max_rounds"]):
+        # Nothing left to simulate: the stored outcomes cut at this budget are exact
+        print(f"  Reusing stored runs {run_numbers[0]}-{run_numbers[-1]}/{job['runs_total']} of '{setup_name}'")
+        outcomes = [_outcome_within(run, max_rounds) for run in resume["runs_data"]]
+    elif job["engine"] == "batched":
+        from batched import BatchedEngine
+        if resume is not None:
+            print(f"  Resuming runs {run_numbers[0]}-{run_numbers[-1]}/{job['runs_total']} " +
+                  f"of '{setup_name}' from round {resume['max_rounds']} (batched)...")
+            engine = pickle.loads(resume["state"])
+        else:
+            print(f"  Starting runs {run_numbers[0]}-{run_numbers[-1]}/{job['runs_total']} " +
+                  f"of '{setup_name}' (batched)...")
+            engine = BatchedEngine(job["agent_configs"], job["signal_condition"], len(run_numbers),
+                                   seed=job["seed"])
+        outcomes = engine.run(max_rounds, **progress)
+        if resume is not None:
+            # Replicas that converged before the stored budget are no longer in the engine
+            outcomes = [outcome if outcome is not None else _outcome_within(run, max_rounds)
+                        for outcome, run in zip(outcomes, resume["runs_data"])]
+        if job["store"] and not all(converged for _, converged, _ in outcomes):
+            end_state = pickle.dumps(engine, protocol=pickle.HIGHEST_PROTOCOL)
+    else:
+        run_number = run_numbers[0]
+        if resume is not None:
+            print(f"  Resuming run {run_number}/{job['runs_total']} of '{setup_name}' " +
+                  f"from round {resume['max_rounds']}...")
+            env = Environment.from_snapshot(EnvironmentSnapshot.from_bytes(resume["state"]))
+        else:
+            print(f"  Starting run {run_number}/{job['runs_total']} of '{setup_name}'...")
+            env = _pooled_environment(job, context.get("env_pool"))
+        outcomes = [env.run_simulation(max_rounds, resume=resume is not None, **progress)]
+        if job["store"] and not env.converged:
+            end_state = env.snapshot().to_bytes()
+        if curve_buffer is not None:
+            rounds, converged, _ = outcomes[0]
+            curve_buffer.add_run(env.interaction_stats["success_rate"],
+                                 env.interaction_stats["blue_choices"], rounds, converged)
+        # Pooled environments would otherwise hold the run's histories until their next reset
+        env.release_history()
+
+    rss = read_rss() if rss_before is not None else None
+    peak_rss = rss[1] if rss is not None else None
+    played = sum(rounds for rounds, _, _ in outcomes) - (resume["max_rounds"] if resume is not None else 0)
+    measured = {"seconds": time.perf_counter() - started, "rss_before": rss_before, "peak_rss": peak_rss,
+                "units": job_units(job, rounds=max(0, played))}
+
+    if job["engine"] == "batched":
+        run_seeds = [{"seed": job["seed"], "batch_replica": i, "batch_size": len(run_numbers)}
+                     for i in range(len(run_numbers))]
+    else:
+        run_seeds = [{"seed": job["seed"], "antithetic": job["antithetic"]}]
+
+    runs_data = []
+    for i, (run_number, (rounds, converged, choice), seeds) in enumerate(zip(run_numbers, outcomes, run_seeds)):
+        if emit is not None:
+            emit(("job_finished", worker, setup_name, run_number, rounds, converged, choice))
+        run_data = {
+            "run_number": run_number,
+            "rounds_to_convergence": rounds,
+            "converged": converged,
+            "convergence_choice": choice, # "Blue", "Red" or None
+            "engine": job["engine"],
+            "engine_version": ENGINE_VERSION,
+            "peak_rss": peak_rss # Bytes; for batched jobs the peak of the whole batch
+        }
+        run_data.update(seeds) # Enough to regenerate the run on demand (see replay.py)
+        if resume is not None and not resume["runs_data"][i]["converged"] and max_rounds > resume["max_rounds"]:
+            run_data["resumed_from_round"] = resume["max_rounds"]
+        runs_data.append(run_data)
+
+    store_entry = None
+    if job["store"] and (resume is None or max_rounds > resume["max_rounds"]):
+        store_entry = {"key": job["store"], "max_rounds": max_rounds, "runs_data": runs_data, "state": end_state}
+    return setup_name, runs_data, store_entry, measured
+
+
+def _forward_events(events, telemetry):
+    """Drain worker telemetry events into the parent's SweepTelemetry until a None sentinel"""
+    while True:
+        event = events.get()
+        if event is None:
+            return
+        telemetry.handle(event)
+
+
+def _execute_sweep_jobs(jobs, n_workers, curve_buffers, telemetry, memory_limit=None):
+    """Yield (setup_name, runs_data, store_entry, measured) for each job, in-process or across a process pool.
+
+    With a memory_limit (bytes), jobs are admitted in order only while the summed
+    MemoryModel estimates of the running jobs stay under it. A job estimated above the
+    limit on its own runs alone. The model is calibrated from every finished job.
+    """
+    if n_workers <= 1:
+        context = {
+            "name": "main",
+            "emit": telemetry.handle if telemetry is not None else None,
+            "curve_buffers": curve_buffers,
+            "env_pool": {}
+        }
+        for job in jobs:
+            yield _run_sweep_job(job, context)
+        return
+
+    events = forwarder = None
+    if telemetry is not None:
+        events = mp.Queue()
+        forwarder = threading.Thread(target=_forward_events, args=(events, telemetry), daemon=True)
+        forwarder.start()
+    slot_counter = mp.Value("i", 0)
+    try:
+        with mp.Pool(n_workers, initializer=_init_sweep_worker,
+                     initargs=(curve_buffers, events, slot_counter)) as pool:
+            model = MemoryModel()
+            pending = deque(enumerate(jobs))
+            running = {}  # job index -> estimated bytes
+            oversized = set()
+            finished = queue.Queue()
+            while pending or running:
+                while pending and len(running) < n_workers:
+                    index, job = pending[0]
+                    estimate = model.estimate(job)
+                    if memory_limit is not None and running and sum(running.values()) + estimate > memory_limit:
+                        break
+                    if memory_limit is not None and estimate > memory_limit and job["setup_name"] not in oversized:
+                        oversized.add(job["setup_name"])
+                        print(f"Note: jobs of '{job['setup_name']}' are estimated at {estimate / 2 ** 20:.0f} MB, " +
+                              f"above the memory limit; running them alone.")
+                    pending.popleft()
+                    running[index] = estimate
+                    pool.apply_async(_run_sweep_job_in_worker, (job,),
+                                     callback=lambda result, index=index: finished.put((index, result, None)),
+                                     error_callback=lambda error, index=index: finished.put((index, None, error)))
+                index, result, error = finished.get()
+                if error is not None:
+                    raise error
+                del running[index]
+                model.observe(jobs[index], result[3])
+                yield result
+    finally:
+        if events is not None:
+            events.put(None)
+            forwarder.join()
+
+
+def _summarize_setup(setup_name: str, setup_results: Dict[str, Any], level: float = 0.95,
+                     n_resamples: int = 0, rng: Optional[np.random.Generator] = None
+                     ) -> Optional[Dict[str, np.ndarray]]:
+    """Compute summary_stats for a setup from its runs_data and print them.
+
+    With n_resamples > 0 every bootstrapped statistic also gets a percentile CI
+    ("<statistic>_ci"); the bootstrap replicates are returned for setup comparisons.
+    """
+    runs_data = setup_results["runs_data"]
+    runs_data.sort(key=lambda run: run["run_number"])
+    runs_for_this_setup = len(runs_data)
+
+    round_counts_all_runs = [run["rounds_to_convergence"] for run in runs_data]
+    convergence_counts_total = sum(1 for run in runs_data if run["converged"])
+    blue_convergence_total = sum(1 for run in runs_data
+                                 if run["converged"] and run["convergence_choice"] == "Blue")
+    
+    # Calculate summary statistics for this setup
+    avg_rounds = np.mean(round_counts_all_runs) if round_counts_all_runs else 0
+    convergence_rate = convergence_counts_total / runs_for_this_setup if runs_for_this_setup > 0 else 0
+    
+    # Rate of converging to "Blue", given that convergence occurred
+    blue_conv_rate_if_converged = blue_convergence_total / convergence_counts_total if convergence_counts_total > 0 else 0
+    
+    setup_results["summary_stats"] = {
+        # Naive mean that counts unconverged runs at max_rounds; see the censoring-aware
+        # km_median_rounds / restricted_mean_rounds / extrapolated_mean_rounds below
+        "avg_rounds_to_convergence": avg_rounds,
+        "convergence_rate": convergence_rate,
+        "blue_convergence_rate_given_convergence": blue_conv_rate_if_converged,
+        "total_runs": runs_for_this_setup,
+        "total_converged": convergence_counts_total,
+        "total_converged_blue": blue_convergence_total
+    }
+    # Unconverged runs are right-censored at the round they stopped
+    setup_results["summary_stats"].update(
+        convergence_time_summary(runs_data, setup_results["config"]["max_rounds"]))
+
+    replicates = None
+    rate_ci = ""
+    if n_resamples > 0:
+        replicates = bootstrap_replicates(runs_data, n_resamples, rng)
+        for metric, values in replicates.items():
+            setup_results["summary_stats"][f"{metric}_ci"] = list(percentile_ci(values, level))
+        low, high = setup_results["summary_stats"]["convergence_rate_ci"]
+        rate_ci = f" [{low:.2f}, {high:.2f}]"
+    
+    median = setup_results["summary_stats"].get("km_median_rounds")
+    print(f"  Setup '{setup_name}' Summary: Avg Rounds: {avg_rounds:.1f}, " +
+          f"KM Median Rounds: {'n/a' if median is None else f'{median:.0f}'}, " +
+          f"Convergence Rate: {convergence_rate:.2f}{rate_ci}, " +
+          f"Blue Conv. (if conv.): {blue_conv_rate_if_converged:.2f}")
+    return replicates
+
+
+def _add_paired_comparisons(all_results: Dict[str, Any], level: float, pair_size: int) -> None:
+    """Attach paired differences between every two setups that share a group size"""
+    print(f"\nPaired comparisons ({level:.0%} CI, rounds to convergence):")
+    for name_a, result_a in all_results.items():
+        comparisons = result_a.setdefault("paired_comparisons", {})
+        for name_b, result_b in all_results.items():
+            if name_a == name_b or result_a["config"]["num_agents"] != result_b["config"]["num_agents"]:
+                continue
+            comparisons[name_b] = paired_run_comparison(result_a["runs_data"], result_b["runs_data"],
+                                                        level, pair_size)
+            if name_a < name_b:
+                rounds = comparisons[name_b]["rounds_to_convergence"]
+                print(f"  '{name_a}' - '{name_b}': {rounds['mean_difference']:.1f} " +
+                      f"[{rounds['ci_low']:.1f}, {rounds['ci_high']:.1f}] (n={rounds['n_units']})")
+
+
+def _add_bootstrap_comparisons(all_results: Dict[str, Any], replicates: Dict[str, Dict[str, np.ndarray]],
+                               level: float) -> None:
+    """Attach bootstrap differences between every two setups that share a group size"""
+    for name_a, result_a in all_results.items():
+        comparisons = result_a.setdefault("bootstrap_comparisons", {})
+        for name_b, result_b in all_results.items():
+            if (name_a == name_b or result_a["config"]["num_agents"] != result_b["config"]["num_agents"]
+                    or replicates.get(name_a) is None or replicates.get(name_b) is None):
+                continue
+            comparisons[name_b] = bootstrap_difference(replicates[name_a], replicates[name_b],
+                                                       result_a["summary_stats"], result_b["summary_stats"],
+                                                       level)
+
+
+def summarize_scenarios(all_results: Dict[str, Any], confidence_level: float = 0.95,
+                        bootstrap_resamples: int = 2000, bootstrap_comparisons: bool = False) -> Dict[str, Any]:
+    """Recompute summary_stats of finished setups from their runs_data, e.g. for results loaded from disk.
+
+    Each setup bootstraps from the stream run_all_scenarios gives it (by its position, or
+    as setup 1 of its own seed), so a sweep's results summarize to the same values again.
+    """
+    replicates = {}
+    for position, (setup_name, setup_results) in enumerate(all_results.items(), 1):
+        config = setup_results["config"]
+        setup_index = 1 if config.get("setup_seed") else position
+        rng = np.random.default_rng(stream_seed(config["seed"], 2, setup_index))
+        replicates[setup_name] = _summarize_setup(setup_name, setup_results, confidence_level,
+                                                  bootstrap_resamples, rng)
+    if bootstrap_comparisons:
+        _add_bootstrap_comparisons(all_results, replicates, confidence_level)
+    return all_results
+
+
 def run_all_scenarios(experiment_setups: List[Dict[str, Any]], 
                       default_runs_per_setup=20, 
-                      default_max_rounds=100000):
-    """Run simulations for a defined list of experimental setups."""
+                      default_max_rounds=100000,
+                      telemetry=None,
+                      n_workers=1,
+                      record_curves=False,
+                      engine="scalar",
+                      seed=None,
+                      variance_reduction=None,
+                      confidence_level=0.95,
+                      resume_store=None,
+                      bootstrap_resamples=2000,
+                      bootstrap_comparisons=False,
+                      memory_limit=None,
+                      engine_calibration=None):
+    """Run simulations for a defined list of experimental setups.
+
+    telemetry: optional SweepTelemetry (see telemetry.py) that receives job events
+    and periodic round snapshots while the sweep runs.
+    n_workers: number of worker processes; runs of all setups are spread over the pool.
+    record_curves: if True, each setup gets a "curves" entry with per-round mean/variance
+    of success rate and Blue share and the unconverged fraction. Workers accumulate these
+    in shared memory (see curves.py), so individual run series are never sent back.
+    engine: "scalar" runs one Environment per run; "batched" runs each worker's share of a
+    setup's replicas at once with the strategies' vectorized kernels (see batched.py). Setups
+    the batched engine cannot handle (a strategy without a kernel, a graph topology, a public
+    signal condition, or record_curves) fall back to the scalar engine. "auto" picks, per
+    setup, the valid engine with the smallest time predicted by the cost model in
+    engine_calibration (a path, default engines.DEFAULT_CALIBRATION; the calibration
+    benchmark runs first if the file does not exist). The choice and its predicted times
+    are printed and kept in the setup's "engine_selection", with the actual job time.
+    seed: base seed of the sweep; every run's seed is derived from it and stored in runs_data.
+    A setup may carry its own "seed", which it uses as if it were the sweep's only setup.
+    variance_reduction: None for independent runs, "crn" to drive setups sharing a group size
+    from the same random streams (keyed by run number and agent), or "antithetic" to
+    additionally pair run 2k with the antithetic of run 2k - 1. In both modes each setup gets
+    "paired_comparisons" against the other setups of its group size, with paired confidence
+    intervals at confidence_level.
+    resume_store: a directory (or RunStore) where every job's results and the end state of
+    its unconverged runs are kept. A later sweep with the same seed and a larger max_rounds
+    continues those runs from where they stopped and reuses runs that already converged,
+    giving the same results as running with the larger budget from the start.
+    bootstrap_resamples: resamples behind the percentile CIs (at confidence_level) of
+    avg_rounds_to_convergence, convergence_rate and blue_convergence_rate_given_convergence
+    in summary_stats; 0 disables them. All resamples of a setup are drawn as one array.
+    bootstrap_comparisons: also attach "bootstrap_comparisons" with the difference of those
+    statistics against every other setup of the same group size and its CI (setups
+    treated as independent; with variance_reduction see "paired_comparisons" instead).
+    memory_limit: with n_workers > 1, a ceiling in bytes on the estimated peak memory of
+    the jobs running at once. A job's estimate grows with its group size and round budget
+    (scalar runs keep full histories, so an unconverged run costs its whole budget) or its
+    replicas (batched), and is calibrated from the jobs already measured (see memory.py).
+    Workers start further jobs only while the running ones' total fits. Every run_data
+    records its worker's observed peak RSS during the run as "peak_rss".
+    """
+    if engine not in ("scalar", "batched", "auto"):
+        raise ValueError(f"Unknown engine: {engine}")
+    if variance_reduction not in (None, "crn", "antithetic"):
+        raise ValueError(f"Unknown variance_reduction: {variance_reduction}")
+    if resume_store is not None and record_curves:
+        raise ValueError("record_curves cannot be combined with resume_store: stored runs keep no per-round series")
+    if isinstance(resume_store, str):
+        resume_store = RunStore(resume_store)
+    base_seed = seed if seed is not None else random.getrandbits(63)
+    if engine != "scalar":
+        from engines import valid_engines, load_or_calibrate
+        cost_model = load_or_calibrate(engine_calibration) if engine == "auto" else None
     all_results = {}
+    jobs = []
+    pending_runs = {}
+    curve_buffers = {}
+    fingerprints = {}
+    replicates = {}
+    setup_rngs = {}
+
+    def summarize(setup_name):
+        replicates[setup_name] = _summarize_setup(setup_name, all_results[setup_name], confidence_level,
+                                                  bootstrap_resamples, setup_rngs[setup_name])
+        engine_selection = all_results[setup_name].get("engine_selection")
+        if engine_selection is not None:
+            chosen = engine_selection["engine"]
+            print(f"  Engine '{chosen}' for '{setup_name}': predicted " +
+                  f"{engine_selection['predicted_seconds'][chosen]:.2f}s, actual {engine_selection['actual_seconds']:.2f}s")
     
     for setup_config in experiment_setups:
         setup_name = setup_config.get("name", f"Experiment_{len(all_results) + 1}")
@@ -583,9 +1460,27 @@ def run_all_scenarios(experiment_setups: List[Dict[str, Any]],
             continue
             
         num_agents = len(agent_configs) # Derived from configs
+        # Optional GraphTopology; each run gets a fresh random stream over the same graph
+        topology = setup_config.get("topology")
 
         runs_for_this_setup = setup_config.get("runs_per_setup", default_runs_per_setup)
         max_rounds_for_this_setup = setup_config.get("max_rounds", default_max_rounds)
+        # A setup with its own seed runs as the only setup of a sweep with that seed, so its
+        # results do not depend on the other setups
+        setup_seed = setup_config.get("seed")
+        sweep_seed = setup_seed if setup_seed is not None else base_seed
+
+        setup_engine = engine
+        engine_selection = None
+        if engine != "scalar":
+            engines = valid_engines(agent_configs, signal_condition, topology, record_curves, variance_reduction)
+            if engine == "auto":
+                setup_engine, predicted = cost_model.choose(engines, agent_configs, signal_condition,
+                                                            runs_for_this_setup, max_rounds_for_this_setup, n_workers)
+                engine_selection = {"engine": setup_engine, "predicted_seconds": predicted, "actual_seconds": 0.0}
+            elif engine not in engines:
+                print(f"Note: setup '{setup_name}' is not supported by the {engine} engine; using scalar.")
+                setup_engine = "scalar"
         
         all_results[setup_name] = {
             "config": { # Store config for reference
@@ -593,61 +1488,103 @@ def run_all_scenarios(experiment_setups: List[Dict[str, Any]],
                 "signal_condition": signal_condition.value,
                 "num_agents": num_agents,
                 "runs_per_setup": runs_for_this_setup,
-                "max_rounds": max_rounds_for_this_setup
+                "max_rounds": max_rounds_for_this_setup,
+                "topology": topology.describe() if topology is not None else "rotation",
+                "engine": setup_engine,
+                "seed": sweep_seed,
+                "setup_seed": setup_seed is not None,
+                "variance_reduction": variance_reduction
             },
             "runs_data": [] # Detailed data for each run
         }
+        if engine_selection is not None:
+            all_results[setup_name]["engine_selection"] = engine_selection
             
         print(f"\nRunning Experiment Setup: {setup_name}")
         print(f"  Signal Condition: {signal_condition.value}")
         print(f"  Number of Agents: {num_agents}")
         print(f"  Runs for this setup: {runs_for_this_setup}")
+        if engine_selection is not None:
+            predictions = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in predicted.items())
+            print(f"  Engine: {setup_engine} (predicted {predictions})")
+        if telemetry is not None:
+            telemetry.add_setup(setup_name, runs_for_this_setup, max_rounds_for_this_setup)
+        if record_curves:
+            curve_buffers[setup_name] = SharedCurveBuffer(
+                max_rounds_for_this_setup, lock=mp.Lock() if n_workers > 1 else None)
 
-        round_counts_all_runs = []
-        convergence_counts_total = 0
-        blue_convergence_total = 0
-        
-        for run_num in range(runs_for_this_setup):
-            print(f"  Starting run {run_num + 1}/{runs_for_this_setup}...")
-            # Critical: Create a new Environment instance for each run to ensure independence
-            env = Environment(agent_configs=agent_configs, 
-                              signal_condition=signal_condition)
-            
-            rounds, converged, choice = env.run_simulation(max_rounds_for_this_setup)
-            
-            run_data = {
-                "run_number": run_num + 1,
-                "rounds_to_convergence": rounds,
-                "converged": converged,
-                "convergence_choice": choice.value if choice else None # Store enum value
-            }
-            all_results[setup_name]["runs_data"].append(run_data)
-
-            round_counts_all_runs.append(rounds)
-            if converged:
-                convergence_counts_total += 1
-                if choice == "Blue": # Assuming choice is "Blue" or "Red" string
-                    blue_convergence_total += 1
-        
-        # Calculate summary statistics for this setup
-        avg_rounds = np.mean(round_counts_all_runs) if round_counts_all_runs else 0
-        convergence_rate = convergence_counts_total / runs_for_this_setup if runs_for_this_setup > 0 else 0
-        
-        # Rate of converging to "Blue", given that convergence occurred
-        blue_conv_rate_if_converged = blue_convergence_total / convergence_counts_total if convergence_counts_total > 0 else 0
-        
-        all_results[setup_name]["summary_stats"] = {
-            "avg_rounds_to_convergence": avg_rounds,
-            "convergence_rate": convergence_rate,
-            "blue_convergence_rate_given_convergence": blue_conv_rate_if_converged,
-            "total_runs": runs_for_this_setup,
-            "total_converged": convergence_counts_total,
-            "total_converged_blue": blue_convergence_total
-        }
-        
-        print(f"  Setup '{setup_name}' Summary: Avg Rounds: {avg_rounds:.1f}, " +
-              f"Convergence Rate: {convergence_rate:.2f}, " +
-              f"Blue Conv. (if conv.): {blue_conv_rate_if_converged:.2f}")
+        setup_index = len(all_results) if setup_seed is None else 1
+        setup_rngs[setup_name] = np.random.default_rng(stream_seed(sweep_seed, 2, setup_index))
+        pending_runs[setup_name] = runs_for_this_setup
+        if runs_for_this_setup == 0:
+            summarize(setup_name)
+        run_numbers = list(range(1, runs_for_this_setup + 1))
+        if setup_engine == "batched":
+            # One batch per worker
+            n_chunks = min(max(1, n_workers), runs_for_this_setup)
+            run_chunks = [list(chunk) for chunk in np.array_split(run_numbers, n_chunks) if len(chunk)]
+        else:
+            run_chunks = [[run_number] for run_number in run_numbers]
+        if resume_store is not None:
+            fingerprints[setup_name] = RunStore.fingerprint(agent_configs, signal_condition, topology,
+                                                            setup_engine, ENGINE_VERSION)
+        for chunk in run_chunks:
+            first_run = int(chunk[0])
+            antithetic = False
+            if variance_reduction == "crn":
+                run_seed = stream_seed(sweep_seed, 1, num_agents, first_run)
+            elif variance_reduction == "antithetic":
+                # Runs 2k - 1 and 2k share a seed; the second uses antithetic uniforms
+                run_seed = stream_seed(sweep_seed, 1, num_agents, (first_run + 1) // 2)
+                antithetic = first_run % 2 == 0
+            else:
+                run_seed = stream_seed(sweep_seed, 0, setup_index, first_run)
+            store_key = None
+            if resume_store is not None:
+                store_key = RunStore.job_key(run_seed, antithetic, [int(run_number) for run_number in chunk])
+            jobs.append({
+                "setup_name": setup_name,
+                "run_numbers": [int(run_number) for run_number in chunk],
+                "runs_total": runs_for_this_setup,
+                "engine": setup_engine,
+                "seed": run_seed,
+                "antithetic": antithetic,
+                "agent_configs": agent_configs,
+                "signal_condition": signal_condition,
+                "topology": topology,
+                "max_rounds": max_rounds_for_this_setup,
+                "snapshot_every": telemetry.snapshot_every if telemetry is not None else 0,
+                "store": store_key,
+                "resume": resume_store.get(fingerprints[setup_name], store_key) if store_key else None
+            })
+
+    try:
+        for setup_name, runs_data, store_entry, measured in _execute_sweep_jobs(jobs, n_workers, curve_buffers,
+                                                                           telemetry, memory_limit):
+            all_results[setup_name]["runs_data"].extend(runs_data)
+            engine_selection = all_results[setup_name].get("engine_selection")
+            if engine_selection is not None:
+                engine_selection["actual_seconds"] += measured["seconds"]
+            pending_runs[setup_name] -= len(runs_data)
+            if store_entry is not None:
+                resume_store.put(fingerprints[setup_name], store_entry.pop("key"), store_entry)
+            if pending_runs[setup_name] == 0:
+                summarize(setup_name)
+                if resume_store is not None:
+                    resume_store.save(fingerprints[setup_name])
+        for setup_name, curve_buffer in curve_buffers.items():
+            total_runs = all_results[setup_name]["summary_stats"]["total_runs"]
+            all_results[setup_name]["curves"] = curve_buffer.curves(total_runs)
+    finally:
+        for curve_buffer in curve_buffers.values():
+            curve_buffer.close()
+            curve_buffer.unlink()
+
+    if variance_reduction is not None:
+        _add_paired_comparisons(all_results, confidence_level,
+                                pair_size=2 if variance_reduction == "antithetic" else 1)
+    if bootstrap_comparisons:
+        _add_bootstrap_comparisons(all_results, replicates, confidence_level)
     
     return all_results
 
@@ -0,0 +1,129 @@
+import sys
+import random
+import argparse
+from typing import List, Dict, Any, Optional
+from environment import (
+    PUBLIC_CONDITIONS,
+    SignalCondition,
+    Strategy,
+    run_all_scenarios,
+    stream_seed
+)
+from stats import ks_two_sample, two_proportion_test, holm_adjust
+from threshold import strategy_mix_sweep
+
+DEFAULT_MIXES = [
+    {Strategy.HISTORY_BASED: 1.0},
+    {Strategy.REWARD_BASED: 1.0},
+    {Strategy.HISTORY_BASED: 0.5, Strategy.REWARD_BASED: 0.5}
+]
+
+
+def _mix_label(mix: Dict[Any, float]) -> str:
+    return " + ".join(f"{getattr(strategy, 'value', strategy)} {share:g}" for strategy, share in mix.items())
+
+
+def _compare_runs(reference: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Two-sample tests of one cell: rounds distribution (KS), convergence rate and Blue share (z-tests)"""
+    def counts(runs):
+        converged = [run for run in runs if run["converged"]]
+        return len(runs), len(converged), sum(1 for run in converged if run["convergence_choice"] == "Blue")
+
+    n_ref, conv_ref, blue_ref = counts(reference)
+    n_cand, conv_cand, blue_cand = counts(candidate)
+    ks, p_rounds = ks_two_sample([run["rounds_to_convergence"] for run in reference],
+                                 [run["rounds_to_convergence"] for run in candidate])
+    conv_diff, p_conv = two_proportion_test(conv_cand, n_cand, conv_ref, n_ref)
+    blue_diff, p_blue = two_proportion_test(blue_cand, conv_cand, blue_ref, conv_ref)
+    return {
+        "rounds_ks": ks, "rounds_p": p_rounds,
+        "convergence_rate_diff": conv_diff, "convergence_rate_p": p_conv,
+        "blue_share_diff": blue_diff, "blue_share_p": p_blue
+    }
+
+
+def equivalence_suite(agent_sizes: List[int] = (2, 3, 4, 7, 8), signal_conditions: Optional[List[SignalCondition]] = None,
+                      mixes: Optional[List[Dict[Any, float]]] = None, runs: int = 200, max_rounds: int = 2000,
+                      reference_engine: str = "scalar", candidate_engine: str = "batched",
+                      alpha: float = 0.01, n_workers: int = 1, seed: Optional[int] = None) -> Dict[str, Any]:
+    """Check that a candidate engine reproduces the reference engine's outcome distributions.
+
+    Every cell of agent_sizes x signal_conditions x strategy mixes is run `runs` times on
+    each engine with independent seeds. Each cell gets three two-sample tests: KS on rounds
+    to convergence (runs stopped at max_rounds count as max_rounds in both samples), and
+    z-tests on the convergence rate and on the Blue share of converged runs. Holm's
+    correction keeps the chance of any false alarm across the whole matrix at `alpha`.
+    Cells the candidate engine cannot run (it falls back to the reference) are skipped;
+    by default the public conditions, which only the scalar engine runs, are left out.
+    """
+    signal_conditions = signal_conditions or [c for c in SignalCondition if c not in PUBLIC_CONDITIONS]
+    mixes = mixes or DEFAULT_MIXES
+    base_seed = seed if seed is not None else random.getrandbits(63)
+
+    setups = []
+    for num_agents in agent_sizes:
+        for signal_condition in signal_conditions:
+            for mix in mixes:
+                setup = strategy_mix_sweep(mix, signal_condition, max_rounds)(num_agents)
+                setup["name"] = f"{num_agents} agents, {signal_condition.value}, {_mix_label(mix)}"
+                setup["runs_per_setup"] = runs
+                setups.append(setup)
+    reference = run_all_scenarios(setups, engine=reference_engine, n_workers=n_workers,
+                                  seed=stream_seed(base_seed, 0))
+    candidate = run_all_scenarios(setups, engine=candidate_engine, n_workers=n_workers,
+                                  seed=stream_seed(base_seed, 1))
+
+    cells, p_values = [], []
+    for setup in setups:
+        name = setup["name"]
+        if candidate[name]["config"]["engine"] != candidate_engine:
+            cells.append({"setup": name, "skipped": True})
+            continue
+        cell = dict(_compare_runs(reference[name]["runs_data"], candidate[name]["runs_data"]),
+                    setup=name, skipped=False)
+        cells.append(cell)
+        p_values += [cell["rounds_p"], cell["convergence_rate_p"], cell["blue_share_p"]]
+
+    adjusted = iter(holm_adjust(p_values))
+    failures = []
+    for cell in cells:
+        if cell["skipped"]:
+            continue
+        for test in ("rounds", "convergence_rate", "blue_share"):
+            cell[f"{test}_p_holm"] = next(adjusted)
+            if cell[f"{test}_p_holm"] < alpha:
+                failures.append((cell["setup"], test))
+
+    print(f"\nEquivalence of '{candidate_engine}' against '{reference_engine}' " +
+          f"({runs} runs per engine and cell, family-wise alpha {alpha}):")
+    for cell in cells:
+        if cell["skipped"]:
+            print(f"  SKIP {cell['setup']} (not supported by {candidate_engine})")
+            continue
+        status = "FAIL" if any(setup == cell["setup"] for setup, _ in failures) else "ok  "
+        print(f"  {status} {cell['setup']}: KS {cell['rounds_ks']:.3f} (p={cell['rounds_p_holm']:.3f}), " +
+              f"conv. diff {cell['convergence_rate_diff']:+.3f} (p={cell['convergence_rate_p_holm']:.3f}), " +
+              f"Blue diff {cell['blue_share_diff']:+.3f} (p={cell['blue_share_p_holm']:.3f})")
+    print(f"  {len(failures)} failing tests out of {len(p_values)}")
+    return {"cells": cells, "failures": failures, "passed": not failures, "seed": base_seed}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Check a fast engine against the reference Environment')
+    parser.add_argument('--agent-sizes', type=int, nargs='+', default=[2, 3, 4, 7, 8],
+                        help='Group sizes in the test matrix')
+    parser.add_argument('--runs', type=int, default=200, help='Runs per engine and cell')
+    parser.add_argument('--max-rounds', type=int, default=2000, help='Round budget per run')
+    parser.add_argument('--candidate', type=str, default='batched', help='Engine under test')
+    parser.add_argument('--alpha', type=float, default=0.01, help='Family-wise false-alarm rate')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='Base seed')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    report = equivalence_suite(args.agent_sizes, runs=args.runs, max_rounds=args.max_rounds,
+                               candidate_engine=args.candidate, alpha=args.alpha,
+                               n_workers=args.workers, seed=args.seed)
+    sys.exit(0 if report["passed"] else 1)
@@ -0,0 +1,189 @@
+import random
+import argparse
+import multiprocessing as mp
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from environment import (
+    SignalCondition,
+    Strategy,
+    Environment,
+    get_strategy_spec,
+    stream_seed
+)
+
+# Stream key of the selection/mutation generator (game streams use (generation, game))
+EVOLUTION_STREAM = 2 ** 32 + 1
+
+
+def _play_games(games: List[Tuple[List[Dict[str, Any]], int]], signal_condition: SignalCondition,
+                rounds_per_game: int) -> List[Tuple[List[float], bool]]:
+    """Play each game for exactly rounds_per_game rounds; return per-agent success rates and convergence"""
+    outcomes = []
+    for agent_configs, seed in games:
+        env = Environment(agent_configs, signal_condition, seed=seed)
+        for _ in range(rounds_per_game):
+            env.run_round()
+        payoffs = [sum(1 for interaction in agent.interaction_history if interaction["success"]) /
+                   max(1, len(agent.interaction_history)) for agent in env.agents]
+        outcomes.append((payoffs, env.converged))
+    return outcomes
+
+
+def _play_games_in_worker(args):
+    return _play_games(*args)
+
+
+def mutate(genome: Dict[str, Any], rng: np.random.Generator, strategies: List[Any],
+           switch_rate: float = 0.1, sigma: float = 0.1) -> Dict[str, Any]:
+    """Copy of a genome (an agent config) with a mutation.
+
+    With probability switch_rate the strategy is replaced by another one from `strategies`
+    with default params; otherwise every param moves by Gaussian noise: additive with
+    sd sigma * (max - min) for params with both bounds, multiplicative (log-normal with
+    sd sigma) otherwise, clipped to the schema bounds. Non-numeric params are kept.
+    """
+    if len(strategies) > 1 and rng.random() < switch_rate:
+        others = [s for s in strategies if get_strategy_spec(s) is not get_strategy_spec(genome["strategy_type"])]
+        return {"strategy_type": others[rng.integers(len(others))], "params": {}}
+    spec = get_strategy_spec(genome["strategy_type"])
+    params = spec.resolve_params(genome.get("params", {}))
+    for param, schema in spec.param_schema.items():
+        value = params[param]
+        if not isinstance(value, (int, float)):
+            continue  # e.g. a color; only numeric params mutate
+        low, high = schema.get("min", -np.inf), schema.get("max", np.inf)
+        if np.isfinite(low) and np.isfinite(high):
+            value = value + rng.normal(0.0, sigma * (high - low))
+        else:
+            value = value * np.exp(rng.normal(0.0, sigma))
+        params[param] = float(min(max(value, low), high))
+    return {"strategy_type": genome["strategy_type"], "params": params}
+
+
+def _generation_summary(population: List[Dict[str, Any]], payoffs: np.ndarray,
+                        games_converged: int, n_games: int) -> Dict[str, Any]:
+    by_strategy: Dict[str, List[int]] = {}
+    for i, genome in enumerate(population):
+        by_strategy.setdefault(get_strategy_spec(genome["strategy_type"]).name, []).append(i)
+    summary = {
+        "mean_payoff": float(payoffs.mean()),
+        "games_converged": games_converged / n_games,
+        "shares": {}, "payoff_by_strategy": {}, "param_means": {}
+    }
+    for name, members in by_strategy.items():
+        spec = get_strategy_spec(population[members[0]]["strategy_type"])
+        resolved = [spec.resolve_params(population[i].get("params", {})) for i in members]
+        summary["shares"][name] = len(members) / len(population)
+        summary["payoff_by_strategy"][name] = float(payoffs[members].mean())
+        summary["param_means"][name] = {param: float(np.mean([params[param] for params in resolved]))
+                                        for param in spec.param_schema
+                                        if isinstance(resolved[0][param], (int, float))}
+    return summary
+
+
+def evolve(population_size: int = 100, group_size: int = 4, generations: int = 1000,
+           rounds_per_game: int = 100, signal_condition: SignalCondition = SignalCondition.OPTIONAL_SIGNAL,
+           strategies: Optional[List[Any]] = None, games_per_agent: int = 1,
+           selection_strength: float = 5.0, mutation_rate: float = 0.05, switch_rate: float = 0.2,
+           sigma: float = 0.1, initial_population: Optional[List[Dict[str, Any]]] = None,
+           n_workers: int = 1, seed: Optional[int] = None, report_every: int = 100) -> Dict[str, Any]:
+    """Evolutionary tournament over strategy/parameter genomes.
+
+    A genome is an agent config ({"strategy_type", "params"}). Each generation the
+    population is shuffled into games of group_size agents, games_per_agent times, and each
+    game is played for exactly rounds_per_game rounds. An agent's payoff is its share of
+    successful interactions. The next generation is drawn Wright-Fisher style with
+    probabilities proportional to exp(selection_strength * payoff), and each offspring
+    mutates with probability mutation_rate (see mutate).
+
+    A generation's games are split into one chunk per worker and played in a process pool
+    kept for the whole run. Game g of generation t uses seed stream_seed(seed, t, g), and
+    selection and mutation draw from one seeded generator, so runs are reproducible for any
+    n_workers. Initial population: equal shares of `strategies` (default: all Strategy
+    members) with default params, unless initial_population is given.
+    """
+    if population_size % group_size != 0 or group_size < 2:
+        raise ValueError(f"population_size ({population_size}) must be a multiple of group_size ({group_size}) >= 2")
+    strategies = list(strategies or list(Strategy))
+    base_seed = seed if seed is not None else random.getrandbits(63)
+    rng = np.random.default_rng(stream_seed(base_seed, EVOLUTION_STREAM))
+    if initial_population is not None:
+        if len(initial_population) != population_size:
+            raise ValueError(f"initial_population has {len(initial_population)} genomes, expected {population_size}")
+        population = [dict(genome) for genome in initial_population]
+    else:
+        population = [{"strategy_type": strategies[i % len(strategies)], "params": {}}
+                      for i in range(population_size)]
+
+    history = []
+    pool = mp.Pool(n_workers) if n_workers > 1 else None
+    try:
+        for generation in range(generations):
+            # Games: rows of member indices
+            games = np.concatenate([rng.permutation(population_size).reshape(-1, group_size)
+                                    for _ in range(games_per_agent)])
+            jobs = [([population[i] for i in members], stream_seed(base_seed, generation, g))
+                    for g, members in enumerate(games)]
+            if pool is not None:
+                chunks = [list(chunk) for chunk in np.array_split(np.arange(len(jobs)), n_workers) if len(chunk)]
+                results = pool.map(_play_games_in_worker, [([jobs[i] for i in chunk], signal_condition, rounds_per_game)
+                                                           for chunk in chunks])
+                outcomes = [outcome for chunk_outcomes in results for outcome in chunk_outcomes]
+            else:
+                outcomes = _play_games(jobs, signal_condition, rounds_per_game)
+
+            payoff_sum = np.zeros(population_size)
+            payoff_count = np.zeros(population_size)
+            for members, (payoffs, _) in zip(games, outcomes):
+                payoff_sum[members] += payoffs
+                payoff_count[members] += 1
+            payoffs = payoff_sum / payoff_count
+            games_converged = sum(1 for _, converged in outcomes if converged)
+            summary = _generation_summary(population, payoffs, games_converged, len(games))
+            summary["generation"] = generation
+            history.append(summary)
+            if report_every and (generation % report_every == 0 or generation == generations - 1):
+                shares = ", ".join(f"{name} {share:.2f}" for name, share in sorted(summary["shares"].items()))
+                print(f"  Generation {generation}: mean payoff {summary['mean_payoff']:.3f}, " +
+                      f"games converged {summary['games_converged']:.2f}, shares: {shares}")
+
+            # Selection (Wright-Fisher) and mutation
+            fitness = np.exp(selection_strength * (payoffs - payoffs.max()))
+            parents = rng.choice(population_size, size=population_size, p=fitness / fitness.sum())
+            mutates = rng.random(population_size) < mutation_rate
+            population = [mutate(population[parent], rng, strategies, switch_rate, sigma) if mutated
+                          else population[parent] for parent, mutated in zip(parents, mutates)]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return {
+        "generations": history,
+        "final_population": population,
+        "final_shares": history[-1]["shares"] if history else {},
+        "seed": base_seed
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Evolve a population of learning strategies')
+    parser.add_argument('--population', type=int, default=100, help='Number of genomes')
+    parser.add_argument('--group-size', type=int, default=4, help='Agents per game')
+    parser.add_argument('--generations', type=int, default=1000, help='Number of generations')
+    parser.add_argument('--rounds', type=int, default=100, help='Rounds per game')
+    parser.add_argument('--signal-condition', type=str, choices=[condition.name for condition in SignalCondition],
+                        default='OPTIONAL_SIGNAL', help='Signal condition of every game')
+    parser.add_argument('--selection', type=float, default=5.0, help='Selection strength')
+    parser.add_argument('--mutation-rate', type=float, default=0.05, help='Per-offspring mutation probability')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='Base seed')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    result = evolve(args.population, args.group_size, args.generations, args.rounds,
+                    getattr(SignalCondition, args.signal_condition), selection_strength=args.selection,
+                    mutation_rate=args.mutation_rate, n_workers=args.workers, seed=args.seed)
+    print(f"\nFinal shares: {result['final_shares']}")
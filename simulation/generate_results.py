@@ -1,85 +1,314 @@
 import json
 import csv
 import os
+import shutil
+import random
+import hashlib
+import argparse
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # Charts are rendered on a pipeline thread
 import matplotlib.pyplot as plt
+from enum import Enum
 from datetime import datetime
 from environment import (
-    SignalCondition, 
-    Strategy, 
-    Environment, 
-    run_all_scenarios
+    SignalCondition,
+    Strategy,
+    Environment,
+    ENGINE_VERSION,
+    PAIRWISE_CONDITIONS,
+    run_all_scenarios,
+    summarize_scenarios,
+    stream_seed
 )
+from pipeline import Stage, Pipeline, write_json
 
-def generate_detailed_results(agent_sizes=[2, 3, 4, 6, 8, 10, 16, 20], 
-                             runs_per_scenario=20, 
-                             max_rounds=100000):
-    """Run all scenarios and save detailed results to json and csv files"""
-    
-    # Create directory for saving results
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    results_dir = f"results_{timestamp}"
-    os.makedirs(results_dir, exist_ok=True)
-    
-    # Record run parameters
-    config = {
+# Table metric -> summary_stats key
+METRICS = {
+    "avg_rounds": "avg_rounds_to_convergence",
+    "convergence_rate": "convergence_rate",
+    "blue_convergence_rate": "blue_convergence_rate_given_convergence"
+}
+
+
+def scenario_label(condition: SignalCondition, strategy: Strategy) -> str:
+    return f"{condition.value} - {strategy.value}"
+
+
+def table_conditions(scenarios):
+    """Signal conditions with at least one scenario among `scenarios`, in enum order"""
+    return [condition for condition in SignalCondition
+            if any(scenario.startswith(f"{condition.value} - ") for scenario in scenarios)]
+
+
+def build_scenario_setups(agent_sizes, runs_per_scenario, max_rounds, signal_conditions=PAIRWISE_CONDITIONS):
+    """One homogeneous setup per scenario (signal condition x strategy) and agent size.
+    Public conditions are left out unless listed in signal_conditions"""
+    setups = []
+    for condition in signal_conditions:
+        for strategy in Strategy:
+            for size in agent_sizes:
+                setups.append({
+                    "name": f"{size} agents, {scenario_label(condition, strategy)}",
+                    "scenario": scenario_label(condition, strategy),
+                    "num_agents": size,
+                    "signal_condition": condition,
+                    "runs_per_setup": runs_per_scenario,
+                    "max_rounds": max_rounds,
+                    "agent_configs": [{"strategy_type": strategy} for _ in range(size)]
+                })
+    return setups
+
+
+def scenario_table(results, setups):
+    """Reshape run_all_scenarios results to table[scenario][size][metric] (with "<metric>_ci")"""
+    table = {}
+    for setup in setups:
+        stats = results[setup["name"]]["summary_stats"]
+        row = table.setdefault(setup["scenario"], {}).setdefault(setup["num_agents"], {})
+        for metric, key in METRICS.items():
+            row[metric] = stats[key]
+            row[f"{metric}_ci"] = stats.get(f"{key}_ci", [float("nan"), float("nan")])
+    return table
+
+
+def strategy_differences(results, setups, strategy_a=Strategy.HISTORY_BASED, strategy_b=Strategy.REWARD_BASED):
+    """Bootstrap differences (a - b) per signal condition and size: diffs[condition][size][metric]"""
+    names = {(setup["scenario"], setup["num_agents"]): setup["name"] for setup in setups}
+    diffs = {}
+    for condition in SignalCondition:
+        for (scenario, size), name in names.items():
+            if scenario != scenario_label(condition, strategy_a):
+                continue
+            other = names.get((scenario_label(condition, strategy_b), size))
+            comparison = results[name].get("bootstrap_comparisons", {}).get(other)
+            if comparison is not None:
+                diffs.setdefault(condition.value, {})[size] = {
+                    metric: comparison[key] for metric, key in METRICS.items()}
+    return diffs
+
+
+def _json_default(value):
+    """Enum members (e.g. strategy types in agent configs) as their values, numpy scalars as Python ones"""
+    return value.value if isinstance(value, Enum) else value.item()
+
+
+def _with_ci(value, ci, digits):
+    return f"{value:.{digits}f} [{ci[0]:.{digits}f}, {ci[1]:.{digits}f}]"
+
+
+def _read_json(root, path):
+    with open(os.path.join(root, path)) as f:
+        return json.load(f)
+
+
+# Pipeline stages. Each reads and writes artifacts in the results directory `root`;
+# build_stages declares which, and Pipeline reruns a stage only when they change.
+
+def setup_seed(seed, name):
+    """Seed of a setup, derived from the sweep seed and its name, so that adding or removing
+    setups leaves the runs of the others unchanged"""
+    return stream_seed(seed, int(hashlib.sha256(name.encode()).hexdigest()[:12], 16))
+
+
+def expand_stage(root, agent_sizes, runs_per_scenario, max_rounds, seed, signal_conditions):
+    """Scenarios x agent sizes -> setups.json (each setup with its own seed) and config.json"""
+    conditions = [SignalCondition[name] for name in signal_conditions]
+    setups = build_scenario_setups(agent_sizes, runs_per_scenario, max_rounds, conditions)
+    for setup in setups:
+        setup["seed"] = setup_seed(seed, setup["name"])
+    write_json(os.path.join(root, "setups.json"), setups, indent=2, default=_json_default)
+    write_json(os.path.join(root, "config.json"), {
         "agent_sizes": agent_sizes,
         "runs_per_scenario": runs_per_scenario,
         "max_rounds": max_rounds,
-        "timestamp": timestamp
-    }
-    
-    # Save configuration
-    with open(f"{results_dir}/config.json", "w") as f:
-        json.dump(config, f, indent=2)
-    
-    # Run all scenarios
-    print("Running all 6 scenarios...")
-    results = run_all_scenarios(agent_sizes, runs_per_scenario, max_rounds)
-    
-    # Save complete results to JSON file
-    with open(f"{results_dir}/full_results.json", "w") as f:
-        json.dump(results, f, indent=2)
-    
-    # Create CSV table data
-    print("\nGenerating CSV reports...")
-    
-    # Create a separate CSV for each metric
-    metrics = ["avg_rounds", "convergence_rate", "blue_convergence_rate"]
-    
-    for metric in metrics:
-        csv_filename = f"{results_dir}/{metric}.csv"
+        "signal_conditions": list(signal_conditions),
+        "seed": seed
+    }, indent=2)
+
+
+def _load_setups(root):
+    setups = _read_json(root, "setups.json")
+    for setup in setups:
+        setup["signal_condition"] = SignalCondition(setup["signal_condition"])
+        for config in setup["agent_configs"]:
+            config["strategy_type"] = Strategy(config["strategy_type"])
+    return setups
+
+
+def _run_key(setup, engine, n_workers):
+    """File key of a setup's runs: everything its runs depend on. Batched runs also depend on
+    how replicas are split over workers"""
+    described = {"setup": setup, "engine": engine, "engine_version": ENGINE_VERSION}
+    if engine != "scalar":
+        described["n_workers"] = n_workers
+    text = json.dumps(described, sort_keys=True, default=_json_default)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def simulate_stage(root, engine, n_workers, memory_limit=None):
+    """Run the setups that have no runs file yet -> runs/<key>.json, indexed by runs/index.json.
+
+    Runs files are keyed by the setup's content, so a changed setup runs again while the
+    others are reused, and files of setups no longer listed are kept for when they return.
+    """
+    runs_dir = os.path.join(root, "runs")
+    os.makedirs(runs_dir, exist_ok=True)
+    setups = _load_setups(root)
+    index = {setup["name"]: f"{_run_key(setup, engine, n_workers)}.json" for setup in setups}
+    missing = [setup for setup in setups if not os.path.exists(os.path.join(runs_dir, index[setup["name"]]))]
+    print(f"Simulating {len(missing)} of {len(setups)} setups " +
+          f"({len(setups) - len(missing)} reused from {runs_dir})")
+    if missing:
+        results = run_all_scenarios(missing, n_workers=n_workers, engine=engine, bootstrap_resamples=0,
+                                    memory_limit=memory_limit)
+        for setup in missing:
+            setup_results = dict(results[setup["name"]])
+            setup_results.pop("summary_stats", None)
+            setup_results["runs_data"] = sorted(setup_results["runs_data"], key=lambda run: run["run_number"])
+            write_json(os.path.join(runs_dir, index[setup["name"]]), setup_results, default=_json_default)
+    write_json(os.path.join(runs_dir, "index.json"), index, indent=2)
+
+
+def aggregate_stage(root, confidence_level, bootstrap_resamples):
+    """runs -> full_results.json: summary statistics, bootstrap CIs and comparisons per setup"""
+    index = _read_json(root, "runs/index.json")
+    results = {name: _read_json(root, f"runs/{filename}") for name, filename in index.items()}
+    summarize_scenarios(results, confidence_level, bootstrap_resamples, bootstrap_comparisons=True)
+    write_json(os.path.join(root, "full_results.json"), results, indent=2, default=_json_default)
+
+
+def tables_stage(root):
+    """full_results.json -> scenario_table.json: the scenario table and strategy differences"""
+    results = _read_json(root, "full_results.json")
+    setups = _load_setups(root)
+    write_json(os.path.join(root, "scenario_table.json"), {
+        "agent_sizes": sorted({setup["num_agents"] for setup in setups}),
+        "table": scenario_table(results, setups),
+        "differences": strategy_differences(results, setups)
+    }, indent=2, default=_json_default)
+
+
+def _load_table(root):
+    """scenario_table.json with its agent-size keys back as ints"""
+    data = _read_json(root, "scenario_table.json")
+    table = {scenario: {int(size): row for size, row in rows.items()} for scenario, rows in data["table"].items()}
+    differences = {condition: {int(size): diff for size, diff in by_size.items()}
+                   for condition, by_size in data["differences"].items()}
+    return table, data["agent_sizes"], differences
+
+
+def csv_stage(root):
+    """A CSV per metric, with bootstrap CI bounds next to each value"""
+    table, agent_sizes, _ = _load_table(root)
+    for metric in METRICS:
+        csv_filename = f"{root}/{metric}.csv"
         with open(csv_filename, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
-            
+
             # Write header
-            scenarios = list(results.keys())
-            header = ["Agent Size"] + scenarios
+            scenarios = list(table.keys())
+            header = ["Agent Size"]
+            for scenario in scenarios:
+                header += [scenario, f"{scenario} CI low", f"{scenario} CI high"]
             writer.writerow(header)
-            
+
             # Write data rows
             for size in agent_sizes:
                 row = [size]
                 for scenario in scenarios:
-                    row.append(results[scenario][size][metric])
+                    row += [table[scenario][size][metric]] + list(table[scenario][size][f"{metric}_ci"])
                 writer.writerow(row)
-    
-    # Generate results summary for article reference
-    generate_article_summary(results, results_dir, agent_sizes)
-    
-    # Plot and save charts
-    plot_and_save_charts(results, results_dir, agent_sizes)
-    
-    print(f"\nAll results have been saved to directory: {results_dir}")
+
+
+def markdown_stage(root):
+    table, agent_sizes, differences = _load_table(root)
+    generate_article_summary(table, root, agent_sizes, differences)
+
+
+def charts_stage(root):
+    table, agent_sizes, _ = _load_table(root)
+    # Start from an empty directory, so charts of sizes no longer run do not linger
+    shutil.rmtree(f"{root}/charts", ignore_errors=True)
+    plot_and_save_charts(table, root, agent_sizes)
+
+
+def build_stages(agent_sizes, runs_per_scenario, max_rounds, seed, engine="scalar", n_workers=1,
+                 memory_limit=None, confidence_level=0.95, bootstrap_resamples=2000,
+                 signal_conditions=PAIRWISE_CONDITIONS):
+    """The stages from setup expansion to the article summary; csv, charts and markdown run concurrently"""
+    return [
+        Stage("expand", expand_stage, outputs=["setups.json", "config.json"],
+              params={"agent_sizes": list(agent_sizes), "runs_per_scenario": runs_per_scenario,
+                      "max_rounds": max_rounds, "seed": seed,
+                      "signal_conditions": [condition.name for condition in signal_conditions]},
+              code=[expand_stage, build_scenario_setups, scenario_label, setup_seed]),
+        Stage("simulate", simulate_stage, inputs=["setups.json"], outputs=["runs"],
+              params={"engine": engine}, options={"n_workers": n_workers, "memory_limit": memory_limit},
+              code=[simulate_stage, _run_key]),
+        Stage("aggregate", aggregate_stage, inputs=["runs"], outputs=["full_results.json"],
+              params={"confidence_level": confidence_level, "bootstrap_resamples": bootstrap_resamples},
+              code=[aggregate_stage, summarize_scenarios]),
+        Stage("tables", tables_stage, inputs=["full_results.json", "setups.json"],
+              outputs=["scenario_table.json"], code=[tables_stage, scenario_table, strategy_differences]),
+        Stage("csv", csv_stage, inputs=["scenario_table.json"], outputs=[f"{metric}.csv" for metric in METRICS]),
+        Stage("charts", charts_stage, inputs=["scenario_table.json"], outputs=["charts"],
+              code=[charts_stage, plot_and_save_charts, _error_bars, table_conditions]),
+        Stage("markdown", markdown_stage, inputs=["scenario_table.json"], outputs=["article_summary.md"],
+              code=[markdown_stage, generate_article_summary, _with_ci, table_conditions])
+    ]
+
+
+def generate_detailed_results(agent_sizes=[2, 3, 4, 6, 8, 10, 16, 20],
+                             runs_per_scenario=20,
+                             max_rounds=100000,
+                             n_workers=1,
+                             seed=None,
+                             results_dir=None,
+                             engine="scalar",
+                             memory_limit=None,
+                             max_parallel=3,
+                             force=(),
+                             signal_conditions=PAIRWISE_CONDITIONS):
+    """Run all scenarios and save detailed results to json and csv files.
+
+    Results go through the stage pipeline (see build_stages) in results_dir (default: a new
+    timestamped directory). Pointing it at an earlier results directory reruns only the
+    stages whose inputs changed, and simulates only setups that have no runs yet; without
+    an explicit seed, that directory's seed is kept. force names stages to rerun anyway.
+    signal_conditions defaults to the pairwise conditions; public ones run only when listed.
+    """
+    if results_dir is None:
+        results_dir = f"results_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if seed is None:
+        config_path = os.path.join(results_dir, "config.json")
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                seed = json.load(f).get("seed")
+    if seed is None:
+        seed = random.getrandbits(63)
+
+    print(f"Results directory: {results_dir} (seed {seed})")
+    stages = build_stages(agent_sizes, runs_per_scenario, max_rounds, seed, engine, n_workers, memory_limit)
+    status = Pipeline(results_dir, stages, max_parallel).run(force)
+    ran = [name for name, outcome in status.items() if outcome == "ran"]
+    print(f"\nStages run: {', '.join(ran) if ran else 'none (all up to date)'}")
+    print(f"All results have been saved to directory: {results_dir}")
     return results_dir
 
-def generate_article_summary(results, results_dir, agent_sizes):
-    """Generate a summary of results for article reference"""
+def generate_article_summary(results, results_dir, agent_sizes, differences=None):
+    """Generate a summary of results for article reference.
+
+    results is a scenario table (see scenario_table); values are shown with their
+    bootstrap confidence intervals. differences (see strategy_differences) adds a table
+    of strategy differences per signal condition.
+    """
     
     summary_file = f"{results_dir}/article_summary.md"
     
     with open(summary_file, "w", encoding="utf-8") as f:
         f.write("# Simulation Results Summary\n\n")
+        f.write("Values are shown as estimate [95% bootstrap percentile CI].\n\n")
         
         # All scenarios comparison
         f.write("## Convergence Comparison Across Scenarios\n\n")
@@ -101,7 +330,7 @@ def generate_article_summary(results, results_dir, agent_sizes):
             f.write(f"| {size} |")
             for scenario in scenarios:
                 value = results[scenario][size]["avg_rounds"]
-                f.write(f" {value:.1f} |")
+                f.write(f" {_with_ci(value, results[scenario][size]['avg_rounds_ci'], 1)} |")
             f.write("\n")
         
         # Convergence rate table
@@ -120,7 +349,7 @@ def generate_article_summary(results, results_dir, agent_sizes):
             f.write(f"| {size} |")
             for scenario in scenarios:
                 value = results[scenario][size]["convergence_rate"]
-                f.write(f" {value:.2f} |")
+                f.write(f" {_with_ci(value, results[scenario][size]['convergence_rate_ci'], 2)} |")
             f.write("\n")
             
         # Blue convergence rate table
@@ -139,12 +368,26 @@ def generate_article_summary(results, results_dir, agent_sizes):
             f.write(f"| {size} |")
             for scenario in scenarios:
                 value = results[scenario][size]["blue_convergence_rate"]
-                f.write(f" {value:.2f} |")
+                f.write(f" {_with_ci(value, results[scenario][size]['blue_convergence_rate_ci'], 2)} |")
             f.write("\n")
+
+        # Strategy difference table
+        if differences:
+            f.write(f"\n### Strategy Differences ({Strategy.HISTORY_BASED.value} - {Strategy.REWARD_BASED.value})\n\n")
+            f.write("Average convergence rounds and convergence rate; a CI excluding 0 marks a clear difference.\n\n")
+            f.write("| Signal Condition | Agent Size | Avg Rounds | Convergence Rate |\n")
+            f.write("| --- | --- | --- | --- |\n")
+            for cond_name, by_size in differences.items():
+                for size in sorted(by_size):
+                    rounds = by_size[size]["avg_rounds"]
+                    rate = by_size[size]["convergence_rate"]
+                    f.write(f"| {cond_name} | {size} | " +
+                            f"{_with_ci(rounds['difference'], [rounds['ci_low'], rounds['ci_high']], 1)} | " +
+                            f"{_with_ci(rate['difference'], [rate['ci_low'], rate['ci_high']], 2)} |\n")
         
         # Signal condition analysis
         f.write("\n## Signal Condition Comparison\n\n")
-        for condition in SignalCondition:
+        for condition in table_conditions(scenarios):
             cond_name = condition.value
             f.write(f"### {cond_name}\n\n")
             
@@ -152,7 +395,7 @@ def generate_article_summary(results, results_dir, agent_sizes):
             f.write("Average performance across different strategies and agent sizes:\n\n")
             
             # Filter scenarios for this condition
-            condition_scenarios = [s for s in scenarios if cond_name in s]
+            condition_scenarios = [s for s in scenarios if s.startswith(f"{cond_name} - ")]
             
             # Convergence rounds
             avg_rounds_by_size = {}
@@ -178,9 +421,12 @@ def generate_article_summary(results, results_dir, agent_sizes):
                     if 3 in agent_sizes:
                         three_agent_data = results[scenario][3]
                         f.write(f"Three-agent group performance:\n")
-                        f.write(f"- Average convergence rounds: {three_agent_data['avg_rounds']:.1f}\n")
-                        f.write(f"- Convergence rate: {three_agent_data['convergence_rate']:.2f}\n")
-                        f.write(f"- Blue choice rate: {three_agent_data['blue_convergence_rate']:.2f}\n\n")
+                        f.write(f"- Average convergence rounds: " +
+                                f"{_with_ci(three_agent_data['avg_rounds'], three_agent_data['avg_rounds_ci'], 1)}\n")
+                        f.write(f"- Convergence rate: " +
+                                f"{_with_ci(three_agent_data['convergence_rate'], three_agent_data['convergence_rate_ci'], 2)}\n")
+                        f.write(f"- Blue choice rate: " +
+                                f"{_with_ci(three_agent_data['blue_convergence_rate'], three_agent_data['blue_convergence_rate_ci'], 2)}\n\n")
         
         # Strategy analysis
         f.write("\n## Strategy Comparison\n\n")
@@ -224,9 +470,9 @@ def generate_article_summary(results, results_dir, agent_sizes):
         
         # Impact of signal conditions on convergence
         signal_impact = {}
-        for condition in SignalCondition:
+        for condition in table_conditions(scenarios):
             cond_name = condition.value
-            condition_scenarios = [s for s in scenarios if cond_name in s]
+            condition_scenarios = [s for s in scenarios if s.startswith(f"{cond_name} - ")]
             avg_rounds = 0
             count = 0
             for size in agent_sizes:
@@ -258,8 +504,15 @@ def generate_article_summary(results, results_dir, agent_sizes):
         
         f.write(f"3. In strategy comparison, {better_strategy[0]} performs better overall with faster convergence.\n\n")
 
+def _error_bars(scenario_results, agent_sizes, metric):
+    """Asymmetric error bars (below, above) from the bootstrap CIs of a scenario table row"""
+    values = np.array([scenario_results[size][metric] for size in agent_sizes], dtype=float)
+    cis = np.array([scenario_results[size][f"{metric}_ci"] for size in agent_sizes], dtype=float)
+    return np.nan_to_num(np.abs(np.vstack([values - cis[:, 0], cis[:, 1] - values])))
+
+
 def plot_and_save_charts(results, results_dir, agent_sizes):
-    """Plot and save detailed charts"""
+    """Plot and save detailed charts from a scenario table (see scenario_table)"""
     
     scenarios = list(results.keys())
     
@@ -271,7 +524,8 @@ def plot_and_save_charts(results, results_dir, agent_sizes):
     plt.figure(figsize=(12, 8))
     for scenario in scenarios:
         rounds_list = [results[scenario][size]["avg_rounds"] for size in agent_sizes]
-        plt.plot(agent_sizes, rounds_list, marker='o', label=scenario)
+        plt.errorbar(agent_sizes, rounds_list, yerr=_error_bars(results[scenario], agent_sizes, "avg_rounds"),
+                     marker='o', capsize=3, label=scenario)
     
     plt.xlabel("Number of Agents")
     plt.ylabel("Average Convergence Rounds")
@@ -283,12 +537,12 @@ def plot_and_save_charts(results, results_dir, agent_sizes):
     plt.close()
     
     # 2. Signal condition group comparison
-    for condition in SignalCondition:
+    for condition in table_conditions(scenarios):
         cond_name = condition.value
         plt.figure(figsize=(10, 6))
         
         # Find scenarios for this condition
-        condition_scenarios = [s for s in scenarios if cond_name in s]
+        condition_scenarios = [s for s in scenarios if s.startswith(f"{cond_name} - ")]
         
         for scenario in condition_scenarios:
             rounds_list = [results[scenario][size]["avg_rounds"] for size in agent_sizes]
@@ -351,7 +605,8 @@ def plot_and_save_charts(results, results_dir, agent_sizes):
     plt.figure(figsize=(12, 8))
     for scenario in scenarios:
         conv_rates = [results[scenario][size]["convergence_rate"] for size in agent_sizes]
-        plt.plot(agent_sizes, conv_rates, marker='o', label=scenario)
+        plt.errorbar(agent_sizes, conv_rates, yerr=_error_bars(results[scenario], agent_sizes, "convergence_rate"),
+                     marker='o', capsize=3, label=scenario)
     
     plt.xlabel("Number of Agents")
     plt.ylabel("Convergence Rate")
@@ -366,7 +621,8 @@ def plot_and_save_charts(results, results_dir, agent_sizes):
     plt.figure(figsize=(12, 8))
     for scenario in scenarios:
         blue_rates = [results[scenario][size]["blue_convergence_rate"] for size in agent_sizes]
-        plt.plot(agent_sizes, blue_rates, marker='o', label=scenario)
+        plt.errorbar(agent_sizes, blue_rates, yerr=_error_bars(results[scenario], agent_sizes, "blue_convergence_rate"),
+                     marker='o', capsize=3, label=scenario)
     
     plt.xlabel("Number of Agents")
     plt.ylabel("Blue Choice Convergence Rate")
@@ -377,19 +633,45 @@ def plot_and_save_charts(results, results_dir, agent_sizes):
     plt.savefig(f"{charts_dir}/blue_convergence_rates_all.png", dpi=300)
     plt.close()
 
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Generate result tables, charts and the article summary')
+    parser.add_argument('--agent-sizes', type=int, nargs='+', default=[2, 3, 4, 6, 8, 10, 16, 20],
+                        help='List of agent sizes to simulate')
+    parser.add_argument('--runs-per-scenario', type=int, default=20, help='Number of runs per scenario')
+    parser.add_argument('--max-rounds', type=int, default=100000, help='Maximum rounds per simulation')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for the simulations')
+    parser.add_argument('--engine', type=str, default="scalar", choices=["scalar", "batched", "auto"],
+                        help='Simulation engine')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Base seed (default: the results directory\'s, or a random one)')
+    parser.add_argument('--results-dir', type=str, default=None,
+                        help='Results directory; an existing one is updated incrementally')
+    parser.add_argument('--force', type=str, nargs='+', default=[],
+                        help='Stages to rerun even if up to date (expand, simulate, aggregate, tables, ' +
+                             'csv, charts, markdown)')
+    parser.add_argument('--max-parallel', type=int, default=3, help='Stages run at the same time')
+    parser.add_argument('--signal-conditions', type=str, nargs='+', choices=[c.name for c in SignalCondition],
+                        default=[c.name for c in PAIRWISE_CONDITIONS],
+                        help='Signal conditions to run (default: the pairwise ones; list PUBLIC_SIGNAL ' +
+                             'or P2P_PUBLIC_SIGNAL to include the public conditions)')
+    return parser.parse_args()
+
+
 def main():
-    print("Generating results for all 6 scenarios (3 signal conditions × 2 strategies)...")
-    
-    # Adjustable parameters
-    agent_sizes = [2, 3, 4, 6, 8, 10, 16, 20]  # List of agent sizes
-    runs_per_scenario = 20                    # Number of runs per scenario
-    max_rounds = 100000                       # Maximum rounds per simulation
-    
+    args = parse_arguments()
+    signal_conditions = [SignalCondition[name] for name in args.signal_conditions]
+    print(f"Generating results for {len(signal_conditions) * len(Strategy)} scenarios " +
+          f"({len(signal_conditions)} signal conditions × {len(Strategy)} strategies)...")
+
     # Run and generate results
-    results_dir = generate_detailed_results(agent_sizes, runs_per_scenario, max_rounds)
-    
+    results_dir = generate_detailed_results(args.agent_sizes, args.runs_per_scenario, args.max_rounds,
+                                            n_workers=args.workers, seed=args.seed, results_dir=args.results_dir,
+                                            engine=args.engine, max_parallel=args.max_parallel, force=args.force,
+                                            signal_conditions=signal_conditions)
+
     print(f"\nComplete! All results have been saved to directory: {results_dir}")
     print(f"Analysis report has been saved to: {results_dir}/article_summary.md")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
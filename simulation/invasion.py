@@ -0,0 +1,209 @@
+import random
+import numpy as np
+from typing import List, Dict, Any, Optional
+from environment import (
+    Agent,
+    SignalCondition,
+    Environment,
+    EnvironmentSnapshot,
+    register_strategy,
+    stream_seed,
+    TOPOLOGY_STREAM
+)
+from topology import GraphTopology
+from stats import wilson_interval
+
+
+class StubbornAgent(Agent):
+    """Always signals, announces and chooses one color, and never learns"""
+
+    def __init__(self, name: str, color: str = "Red", rng: Optional[random.Random] = None):
+        super().__init__(name, rng)
+        if color not in ("Red", "Blue"):
+            raise ValueError(f"Stubborn agent {name} needs color 'Red' or 'Blue', got {color}")
+        self.color = color
+
+    def decide_signal(self, condition: SignalCondition) -> Optional[str]:
+        signal = None if condition in (SignalCondition.NO_SIGNAL, SignalCondition.PUBLIC_SIGNAL) else self.color
+        self.signal_history.append(signal)
+        return signal
+
+    def decide_broadcast(self) -> Optional[str]:
+        return self.color
+
+    def decide_final_choice(self, opponent_signal: Optional[str], own_signal: Optional[str]) -> str:
+        self.choice_history.append(self.color)
+        return self.color
+
+    def update(self, own_signal: Optional[str], opponent_signal: Optional[str],
+               final_choice: str, opponent_choice: str, success: bool) -> None:
+        self.interaction_history.append({
+            "own_signal": own_signal,
+            "opponent_signal": opponent_signal,
+            "own_choice": final_choice,
+            "opponent_choice": opponent_choice,
+            "success": success
+        })
+
+
+register_strategy("STUBBORN", StubbornAgent, {"color": {"default": "Red"}},
+                  description="Fixed color regardless of experience (for invasion experiments)")
+
+
+def stubborn_invaders(k: int, color: str = "opposite", positions: Optional[List[int]] = None) -> Dict[str, Any]:
+    """Perturbation replacing k agents with stubborn ones.
+
+    color "opposite" picks the color against the converged convention; positions None
+    replaces k randomly chosen agents in every trial.
+    """
+    return {"replace": {"count": k, "positions": positions,
+                        "config": {"strategy_type": "STUBBORN", "params": {"color": color}}}}
+
+
+def _other(color: str) -> str:
+    return "Red" if color == "Blue" else "Blue"
+
+
+class InvasionExperiment:
+    """Perturbation trials branched from converged states of one setup.
+
+    Each replicate burns in a fresh run of the setup (seed stream_seed(seed, replicate))
+    until it converges, and keeps its snapshot; every trial of every perturbation then
+    starts from that snapshot instead of re-running the burn-in. A perturbation is a dict
+    with optional keys:
+
+      - "replace": {"count": k, "positions": [...] or None, "config": agent_config}
+        replaces k agents (random per trial if positions is None) with new agents of
+        `config`, built fresh; a params value "opposite" becomes the color against the
+        convention (see stubborn_invaders);
+      - "mutate": {index: {state_field: value}} overwrites learned state of chosen agents.
+
+    Residents are the agents not replaced. After the perturbation the trial runs up to
+    `horizon` rounds. It is disturbed from the first round in which a resident chooses the
+    other color; checking every 10 rounds (the convergence cadence), it flips when all
+    residents' last choices are the other color, and it has recovered when a disturbed
+    trial has them all back on the original convention. A trial never disturbed within the
+    horizon resisted the perturbation.
+    """
+
+    def __init__(self, agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition,
+                 topology: Optional[GraphTopology] = None, burn_in_rounds: int = 100000,
+                 seed: Optional[int] = None):
+        self.agent_configs = agent_configs
+        self.signal_condition = signal_condition
+        self.topology = topology
+        self.burn_in_rounds = burn_in_rounds
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self._snapshots: Dict[int, Optional[EnvironmentSnapshot]] = {}
+
+    def converged_state(self, replicate: int) -> Optional[EnvironmentSnapshot]:
+        """Snapshot of the replicate's converged burn-in (cached), or None if it did not converge"""
+        if replicate not in self._snapshots:
+            seed = stream_seed(self.seed, replicate)
+            topology = self.topology.fresh(stream_seed(seed, TOPOLOGY_STREAM)) if self.topology is not None else None
+            env = Environment(self.agent_configs, self.signal_condition, topology=topology, seed=seed)
+            env.run_simulation(self.burn_in_rounds)
+            self._snapshots[replicate] = env.snapshot() if env.converged else None
+        return self._snapshots[replicate]
+
+    def _branch(self, snapshot: EnvironmentSnapshot, perturbation: Dict[str, Any], seed: int):
+        """Environment continuing the snapshot with the perturbation applied; returns (env, residents)"""
+        rng = random.Random(seed)
+        configs = list(snapshot.agent_configs)
+        replaced = set()
+        replace = perturbation.get("replace")
+        if replace is not None:
+            positions = replace.get("positions")
+            if positions is None:
+                positions = rng.sample(range(len(configs)), replace["count"])
+            params = {key: _other(snapshot.convergence_choice) if value == "opposite" else value
+                      for key, value in replace["config"].get("params", {}).items()}
+            for index in positions:
+                configs[index] = dict(replace["config"], params=params)
+                replaced.add(index)
+
+        topology = None
+        if snapshot.topology_state is not None:
+            graph, mode, pairs_per_round, _ = snapshot.topology_state
+            topology = GraphTopology(graph, mode, pairs_per_round, seed=stream_seed(seed, TOPOLOGY_STREAM))
+        env = Environment(configs, snapshot.signal_condition, topology=topology, seed=seed)
+        env.rounds = snapshot.rounds
+        for i, agent in enumerate(env.agents):
+            if i not in replaced:
+                agent.set_state(snapshot.agent_states[i])
+                agent.choice_history.append(snapshot.last_choices[i])
+        for index, fields in perturbation.get("mutate", {}).items():
+            for field, value in fields.items():
+                setattr(env.agents[index], field, value)
+        residents = [agent for i, agent in enumerate(env.agents) if i not in replaced]
+        return env, residents
+
+    def trial(self, snapshot: EnvironmentSnapshot, perturbation: Dict[str, Any], seed: int,
+              horizon: int = 1000) -> Dict[str, Any]:
+        env, residents = self._branch(snapshot, perturbation, seed)
+        original = snapshot.convergence_choice
+        other = _other(original)
+        outcome = {"flipped": False, "recovered": False, "resisted": False,
+                   "disturbed_round": None, "rounds": horizon}
+        for elapsed in range(1, horizon + 1):
+            env.run_round()
+            if outcome["disturbed_round"] is None:
+                if not any(agent.choice_history and agent.choice_history[-1] == other for agent in residents):
+                    continue
+                outcome["disturbed_round"] = elapsed
+            if elapsed % 10 != 0:
+                continue
+            choices = {agent.choice_history[-1] for agent in residents if agent.choice_history}
+            if choices == {other}:
+                outcome.update(flipped=True, rounds=elapsed)
+                break
+            if choices == {original}:
+                outcome.update(recovered=True, rounds=elapsed)
+                break
+        outcome["resisted"] = outcome["disturbed_round"] is None
+        return outcome
+
+    def run(self, perturbations: Dict[str, Dict[str, Any]], replicates: int = 10,
+            trials_per_replicate: int = 20, horizon: int = 1000, level: float = 0.95) -> Dict[str, Any]:
+        """Run every perturbation from every converged replicate; summary per perturbation label"""
+        snapshots = [(r, self.converged_state(r)) for r in range(replicates)]
+        converged = [(r, snapshot) for r, snapshot in snapshots if snapshot is not None]
+        if not converged:
+            raise ValueError(f"No replicate converged within {self.burn_in_rounds} burn-in rounds")
+        burn_in = [snapshot.rounds for _, snapshot in converged]
+
+        results = {}
+        print(f"\nInvasion trials from {len(converged)}/{replicates} converged states " +
+              f"(median burn-in {np.median(burn_in):.0f} rounds, horizon {horizon}):")
+        for p, (label, perturbation) in enumerate(perturbations.items()):
+            trials = [self.trial(snapshot, perturbation, stream_seed(self.seed, r, p + 1, t), horizon)
+                      for r, snapshot in converged for t in range(trials_per_replicate)]
+            n = len(trials)
+            flips = [trial["rounds"] for trial in trials if trial["flipped"]]
+            recoveries = [trial["rounds"] for trial in trials if trial["recovered"]]
+            resisted = sum(trial["resisted"] for trial in trials)
+            results[label] = {
+                "trials": n,
+                "flip_probability": len(flips) / n,
+                "flip_probability_ci": list(wilson_interval(len(flips), n, level)),
+                "median_flip_rounds": float(np.median(flips)) if flips else None,
+                "recovery_probability": len(recoveries) / n,
+                "median_recovery_rounds": float(np.median(recoveries)) if recoveries else None,
+                "mean_recovery_rounds": float(np.mean(recoveries)) if recoveries else None,
+                "resist_probability": resisted / n,
+                "unresolved": n - len(flips) - len(recoveries) - resisted,
+                "trial_outcomes": trials
+            }
+            summary = results[label]
+            print(f"  {label}: flip probability {summary['flip_probability']:.2f} " +
+                  f"[{summary['flip_probability_ci'][0]:.2f}, {summary['flip_probability_ci'][1]:.2f}], " +
+                  f"recovery probability {summary['recovery_probability']:.2f} " +
+                  f"(median {summary['median_recovery_rounds']} rounds), " +
+                  f"resisted {summary['resist_probability']:.2f}, " +
+                  f"{summary['unresolved']} unresolved")
+        return {
+            "perturbations": results,
+            "converged_replicates": len(converged),
+            "burn_in_rounds": burn_in,
+            "seed": self.seed
+        }
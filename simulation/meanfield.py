@@ -0,0 +1,432 @@
+import itertools
+import time
+import numpy as np
+from typing import List, Dict, Any, Optional
+from environment import (
+    PUBLIC_CONDITIONS,
+    SignalCondition,
+    Strategy,
+    build_experiment_setups,
+    get_strategy_spec,
+    rotation_pairs,
+    run_all_scenarios
+)
+from batched import NO_SIGNAL, RED, BLUE, _follow_signals
+
+
+class MeanFieldModel:
+    """What the mean-field engine needs to know about a strategy beyond its batched kernel.
+
+    The mean-field state is the vector of the kernel state entries listed in `fields`;
+    the kernel's own update rule is applied to every possible interaction outcome, so
+    only the decision probabilities have to be written out here. Methods take kernel
+    state dicts with arrays shaped (points, 1).
+    """
+
+    fields = ()
+
+    def signal_probs(self, state: Dict[str, np.ndarray], condition: SignalCondition) -> np.ndarray:
+        """Probabilities of (no signal, Red, Blue), shaped (points, 3)"""
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def fallback_blue(self, state: Dict[str, np.ndarray]) -> np.ndarray:
+        """Probability of choosing Blue when signals do not decide, shaped (points,)"""
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def clip(self, points: np.ndarray) -> np.ndarray:
+        """Project state vectors onto valid states"""
+        return points
+
+    def affine(self, params: Dict[str, Any]) -> bool:
+        """Whether the kernel's state change for a given interaction outcome is affine in the
+        state (with these params); if so it is tabulated once per run instead of per step"""
+        return False
+
+
+class HistoryBasedMeanField(MeanFieldModel):
+    fields = ("total_count", "blue_count", "no_signal_count", "signal_blue_count", "signal_choice_total")
+
+    def signal_probs(self, state, condition):
+        points = len(state["total_count"])
+        if condition == SignalCondition.NO_SIGNAL:
+            return np.tile([1.0, 0.0, 0.0], (points, 1))
+        if condition == SignalCondition.MANDATORY_SIGNAL:
+            blue = (state["blue_count"] / state["total_count"])[:, 0]
+            return np.stack([np.zeros(points), 1 - blue, blue], axis=1)
+        total = state["signal_choice_total"][:, 0]
+        none = state["no_signal_count"][:, 0] / total
+        blue = state["signal_blue_count"][:, 0] / total
+        return np.stack([none, 1 - none - blue, blue], axis=1)
+
+    def fallback_blue(self, state):
+        return (state["blue_count"] / state["total_count"])[:, 0]
+
+    def clip(self, points):
+        total, blue, none, signal_blue, signal_total = (np.maximum(points[:, i], 1e-12) for i in range(5))
+        none = np.minimum(none, signal_total)
+        return np.stack([total, np.minimum(blue, total), none,
+                         np.minimum(signal_blue, signal_total - none), signal_total], axis=1)
+
+    def affine(self, params):
+        return True  # Counter increments depend on the outcome only
+
+
+class RewardBasedMeanField(MeanFieldModel):
+    fields = ("p_choice_blue", "p_send_signal", "p_signal_blue")
+
+    def signal_probs(self, state, condition):
+        points = len(state["p_choice_blue"])
+        blue = state["p_signal_blue"][:, 0]
+        if condition == SignalCondition.NO_SIGNAL:
+            return np.tile([1.0, 0.0, 0.0], (points, 1))
+        if condition == SignalCondition.MANDATORY_SIGNAL:
+            return np.stack([np.zeros(points), 1 - blue, blue], axis=1)
+        send = state["p_send_signal"][:, 0]
+        return np.stack([1 - send, send * (1 - blue), send * blue], axis=1)
+
+    def fallback_blue(self, state):
+        return state["p_choice_blue"][:, 0]
+
+    def clip(self, points):
+        return np.clip(points, 0.0, 1.0)
+
+    def affine(self, params):
+        # Moves toward 0/1 targets at rates <= 1 stay in [0, 1], so the kernel's clipping never
+        # binds, unless the conflict boost overshoots
+        return params["alpha"] * params["conflict_learning_boost"] <= 1.0
+
+
+MEANFIELD_MODELS: Dict[Any, MeanFieldModel] = {}
+
+
+def register_meanfield_model(key, model: MeanFieldModel) -> None:
+    """Attach a mean-field model to a registered strategy that has a batched kernel"""
+    MEANFIELD_MODELS[get_strategy_spec(key).key] = model
+
+
+register_meanfield_model(Strategy.HISTORY_BASED, HistoryBasedMeanField())
+register_meanfield_model(Strategy.REWARD_BASED, RewardBasedMeanField())
+
+
+# Every outcome of one interaction: (signal A, signal B, fallback draw A, fallback draw B).
+# The final choices and success follow from these alone.
+_OUTCOMES = np.array(list(itertools.product((NO_SIGNAL, RED, BLUE), (NO_SIGNAL, RED, BLUE),
+                                            (RED, BLUE), (RED, BLUE))), dtype=np.int8)
+_SIGNAL_A, _SIGNAL_B = _OUTCOMES[:, 0], _OUTCOMES[:, 1]
+_CHOICE_A = _follow_signals(_SIGNAL_A, _SIGNAL_B, _OUTCOMES[:, 2] == BLUE)
+_CHOICE_B = _follow_signals(_SIGNAL_B, _SIGNAL_A, _OUTCOMES[:, 3] == BLUE)
+_SUCCESS = _CHOICE_A == _CHOICE_B
+_BOTH_BLUE = ((_CHOICE_A == BLUE) & (_CHOICE_B == BLUE)).astype(np.float64)
+_BOTH_RED = ((_CHOICE_A == RED) & (_CHOICE_B == RED)).astype(np.float64)
+_A_BLUE = (_CHOICE_A == BLUE).astype(np.float64)
+
+
+def _homogeneous_setup(agent_configs: List[Dict[str, Any]]):
+    """(model, kernel, params) of a population where every agent has the same strategy and params"""
+    specs = [get_strategy_spec(config.get("strategy_type")) for config in agent_configs]
+    params = [spec.resolve_params(config.get("params", {})) for spec, config in zip(specs, agent_configs)]
+    if any(spec is not specs[0] for spec in specs) or any(p != params[0] for p in params):
+        raise ValueError("The mean-field engine needs a homogeneous population (one strategy, one parameter set)")
+    model = MEANFIELD_MODELS.get(specs[0].key)
+    if model is None or specs[0].kernel is None:
+        raise ValueError(f"Strategy {specs[0].name} has no mean-field model")
+    return model, specs[0].kernel, params[0]
+
+
+def _state_changes(model: MeanFieldModel, kernel, params: Dict[str, Any], points: np.ndarray,
+                   own, opponent, choice) -> np.ndarray:
+    """State change of an agent in state `points[k]` for every outcome, shaped (points, outcomes, fields)"""
+    n_points, n_outcomes = len(points), len(_OUTCOMES)
+    state = kernel.init_state([params], n_points * n_outcomes)
+    for j, field in enumerate(model.fields):
+        state[field] = np.repeat(points[:, j], n_outcomes)[:, None]
+    tile = lambda a: np.tile(a, n_points)[:, None]
+    kernel.update(state, np.array([0]), tile(own), tile(opponent), tile(choice), tile(_SUCCESS))
+    after = np.stack([state[field][:, 0] for field in model.fields], axis=1)
+    return after.reshape(n_points, n_outcomes, -1) - points[:, None, :]
+
+
+class _ChangeTable:
+    """State changes of one agent (role A or B) for every outcome, as a function of its state.
+
+    For an affine model the change is offset[o] + x @ slope[o], read off the kernel once at
+    `base` and `base` + a step along each field; otherwise the kernel is run at every call.
+    """
+
+    def __init__(self, model: MeanFieldModel, kernel, params: Dict[str, Any], base: np.ndarray, role: str):
+        self.model, self.kernel, self.params = model, kernel, params
+        self.args = (_SIGNAL_A, _SIGNAL_B, _CHOICE_A) if role == "A" else (_SIGNAL_B, _SIGNAL_A, _CHOICE_B)
+        self.offset = self.slope = None
+        if model.affine(params):
+            n_fields = len(base)
+            steps = 0.1 * np.maximum(np.abs(base), 1.0)
+            probes = np.vstack([base, base + np.diag(steps)])
+            changes = _state_changes(model, kernel, params, probes, *self.args)
+            self.slope = ((changes[1:] - changes[0]) / steps[:, None, None]).transpose(1, 0, 2)  # (o, f, f)
+            self.offset = changes[0] - np.einsum("f,ofg->og", base, self.slope)
+
+    def at(self, points: np.ndarray) -> np.ndarray:
+        """Changes shaped (points, outcomes, fields)"""
+        if self.offset is None:
+            return _state_changes(self.model, self.kernel, self.params, points, *self.args)
+        return self.offset[None] + np.einsum("kf,ofg->kog", points, self.slope)
+
+
+def _interaction_moments(model: MeanFieldModel, tables, points: np.ndarray, condition: SignalCondition,
+                         n_update_points: int) -> Dict[str, np.ndarray]:
+    """Exact outcome distribution of one interaction between two agents in state `points[k]`.
+
+    Returns P(both Blue), P(both Red), P(an agent chooses Blue) and the signal probabilities
+    at every point; the expected state change of one agent (drift) at the first
+    `n_update_points` points; and the covariance of the pair's summed change at the first point.
+    tables are the (role A, role B) _ChangeTables.
+    """
+    state = {field: points[:, j:j + 1] for j, field in enumerate(model.fields)}
+    q = model.signal_probs(state, condition)
+    blue = model.fallback_blue(state)
+    fallback = np.stack([1 - blue, blue], axis=1)
+    prob = (q[:, _SIGNAL_A + 1] * q[:, _SIGNAL_B + 1] *
+            fallback[:, _OUTCOMES[:, 2]] * fallback[:, _OUTCOMES[:, 3]])
+
+    table_a, table_b = tables
+    changes = table_a.at(points[:n_update_points])
+    drift = np.einsum("ko,kof->kf", prob[:n_update_points], changes)
+    pair_change = changes[0] + table_b.at(points[:1])[0]
+    pair_mean = prob[0] @ pair_change
+    pair_cov = (pair_change * prob[0][:, None]).T @ pair_change - np.outer(pair_mean, pair_mean)
+    return {
+        "drift": drift,
+        "pair_cov": pair_cov,
+        "p_both_blue": prob @ _BOTH_BLUE,
+        "p_both_red": prob @ _BOTH_RED,
+        "blue_share": prob @ _A_BLUE,
+        "signal_probs": q
+    }
+
+
+def _propagate(transition: np.ndarray, noise: np.ndarray, rounds: int):
+    """(T^k, sum_{i<k} T^i Q T^i', sum_{i<k} T^i) for k = rounds, by binary powering: the
+    covariance recursion S -> T S T' + Q and the shift recursion x -> T x + v over k rounds
+    are S -> T^k S T^k' + the second term and x -> T^k x + the third times v"""
+    n = len(transition)
+    result = (np.eye(n), np.zeros((n, n)), np.zeros((n, n)))
+    block = (transition, noise, np.eye(n))
+    while rounds:
+        if rounds & 1:
+            result = (block[0] @ result[0], block[0] @ result[1] @ block[0].T + block[1],
+                      block[0] @ result[2] + block[2])
+        rounds >>= 1
+        if rounds:
+            block = (block[0] @ block[0], block[0] @ block[1] @ block[0].T + block[1],
+                     block[0] @ block[2] + block[2])
+    return result
+
+
+def run_meanfield(agent_configs: List[Dict[str, Any]], signal_condition: SignalCondition,
+                  max_rounds: int = 100000, rounds_per_step: int = 100, quadrature_nodes: int = 40,
+                  tolerance: float = 1e-9) -> Dict[str, Any]:
+    """Deterministic mean-field dynamics of a homogeneous population on the rotation schedule.
+
+    The population-average state follows the expected update of an agent meeting an
+    average opponent. Finite-N fluctuations enter through the linear noise approximation:
+    the covariance of the population average grows as A S A^T + (active / 2N) C per round,
+    with A the linearized drift and C the covariance of one pair's summed update. This is
+    what lets a symmetric start (where the mean itself never moves) break toward either color.
+
+    At every convergence check (each 10th round) the hazard is P(all last choices agree),
+    averaged over the Gaussian state distribution with Gauss-Hermite quadrature along its
+    widest direction; checks are treated as independent. Individual agents are assumed to
+    sit at the population average, so the spread between agents is ignored.
+
+    Where the state changes slowly the drift is re-evaluated only every few rounds (at most
+    `rounds_per_step`, or 1% of the rounds so far once that is more), with it and its
+    linearization held fixed in between; rounds_per_step=1 evaluates every round until round 100.
+    Integration stops once the survival probability drops below `tolerance`, or once the
+    probability of any further convergence is bounded below `tolerance`: after three
+    steady steps (of the full step length) in a row where the hazard, extrapolated to
+    max_rounds at its current log-growth rate, sums to less than that over the remaining checks. The curve is then flat to max_rounds
+    (the last series point is at max_rounds and "flat_from_round" says where it started).
+
+    State changes of affine models (see MeanFieldModel.affine) are tabulated per outcome
+    once per call, and the recursions within a step are composed by binary powering, so a
+    step is a handful of small array operations whatever its length.
+    """
+    if signal_condition in PUBLIC_CONDITIONS:
+        raise ValueError(f"The mean-field engine does not support '{signal_condition.value}'")
+    model, kernel, params = _homogeneous_setup(agent_configs)
+    n = len(agent_configs)
+    n_pairs = len(rotation_pairs(n, 1))
+    if n_pairs == 0:
+        raise ValueError("The mean-field engine needs at least 2 agents")
+    active = 2 * n_pairs / n
+    sitting_out = n - 2 * n_pairs
+
+    initial = kernel.init_state([params], 1)
+    mu = np.array([float(initial[field][0, 0]) for field in model.fields])
+    n_fields = len(mu)
+    cov = np.zeros((n_fields, n_fields))  # every run starts from the same state
+    nodes, node_weights = np.polynomial.hermite.hermgauss(quadrature_nodes)
+    node_weights = node_weights / np.sqrt(np.pi)
+    log_node_weights = np.log(node_weights)
+    tables = (_ChangeTable(model, kernel, params, mu, "A"), _ChangeTable(model, kernel, params, mu, "B"))
+
+    survival, converged_blue = 1.0, 0.0
+    series = {key: [] for key in ("rounds", "survival", "success_rate", "blue_share", "blue_share_sd",
+                                  "p_no_signal", "p_blue_signal")}
+    states = []
+    rounds, step = 0, 0
+    log_hazard, quiet_steps, flat_from, steady = None, 0, None, False
+    while True:
+        eigenvalues, eigenvectors = np.linalg.eigh(cov)
+        spread = np.sqrt(max(eigenvalues[-1], 0.0)) * eigenvectors[:, -1]
+        eps = 1e-6 * np.maximum(np.abs(mu), 1.0)
+        points = np.vstack([mu, mu + np.diag(eps),
+                            model.clip(mu + np.sqrt(2) * nodes[:, None] * spread)])
+        moments = _interaction_moments(model, tables, points, signal_condition, n_fields + 1)
+        at_nodes = slice(n_fields + 1, None)
+
+        if rounds > 0:
+            checks = rounds // 10 - (rounds - step) // 10
+            blue_share = moments["blue_share"][at_nodes]
+            all_blue = moments["p_both_blue"][at_nodes] ** n_pairs * blue_share ** sitting_out
+            all_red = moments["p_both_red"][at_nodes] ** n_pairs * (1 - blue_share) ** sitting_out
+            hazard_blue, hazard_red = node_weights @ all_blue, node_weights @ all_red
+            hazard = min(hazard_blue + hazard_red, 1.0)
+            if checks > 0 and hazard > 0:
+                stopped = survival * (1 - (1 - hazard) ** checks)
+                converged_blue += stopped * hazard_blue / (hazard_blue + hazard_red)
+                survival -= stopped
+
+            mean_blue = node_weights @ blue_share
+            series["rounds"].append(rounds)
+            series["survival"].append(survival)
+            series["success_rate"].append(node_weights @ (moments["p_both_blue"][at_nodes] +
+                                                          moments["p_both_red"][at_nodes]))
+            series["blue_share"].append(mean_blue)
+            series["blue_share_sd"].append(np.sqrt(max(node_weights @ (blue_share - mean_blue) ** 2, 0.0)))
+            series["p_no_signal"].append(node_weights @ moments["signal_probs"][at_nodes, 0])
+            series["p_blue_signal"].append(node_weights @ moments["signal_probs"][at_nodes, 2])
+            states.append(mu.copy())
+
+            # Bound on the probability of converging in the remaining rounds, in log space
+            # (the hazard of a large group underflows)
+            with np.errstate(divide="ignore"):
+                share = np.clip(blue_share, 0.0, 1.0)
+                log_nodes = np.concatenate([
+                    n_pairs * np.log(np.maximum(moments["p_both_blue"][at_nodes], 0.0)) +
+                    (sitting_out * np.log(share) if sitting_out else 0.0),
+                    n_pairs * np.log(np.maximum(moments["p_both_red"][at_nodes], 0.0)) +
+                    (sitting_out * np.log(1 - share) if sitting_out else 0.0)])
+            previous, log_hazard = log_hazard, float(np.logaddexp.reduce(np.tile(log_node_weights, 2) + log_nodes))
+            remaining = max_rounds - rounds
+            if previous is not None and remaining > 0:
+                if log_hazard == -np.inf:
+                    growth = 0.0
+                elif previous == -np.inf:
+                    growth = np.inf
+                else:
+                    growth = max(0.0, (log_hazard - previous) / step)
+                bound = np.log(remaining / 10 + 1) + min(0.0, log_hazard + growth * remaining)
+                # Only trusted while the state moves slowly: the hazard of a symmetric start is
+                # flat at first and only takes off once the fluctuations have grown
+                quiet_steps = quiet_steps + 1 if steady and bound < np.log(tolerance) else 0
+        if rounds >= max_rounds or survival < tolerance:
+            break
+        if quiet_steps >= 3:
+            flat_from = rounds
+            for key in series:
+                series[key].append(series[key][-1])
+            series["rounds"][-1] = max_rounds
+            states.append(mu.copy())
+            break
+
+        drift = moments["drift"][0]
+        jacobian = ((moments["drift"][1:n_fields + 1] - drift) / eps[:, None]).T
+        transition = np.eye(n_fields) + active * jacobian
+        noise = active / (2 * n) * moments["pair_cov"]
+        # Longer steps only while no state entry moves by more than 2% (of max(|value|, 1))
+        # and the fluctuations grow by less than 5%
+        spread_now = np.trace(cov)
+        growth = (np.trace(transition @ cov @ transition.T + noise) - spread_now) / spread_now if spread_now > 0 else np.inf
+        with np.errstate(divide="ignore"):
+            steady_rounds = min(np.min(0.02 * np.maximum(np.abs(mu), 1.0) / np.abs(active * drift)),
+                                0.05 / growth if growth > 0 else np.inf)
+        step = int(max(1, min(max(rounds_per_step, rounds // 100), steady_rounds, max_rounds - rounds)))
+
+        steady = steady_rounds >= max(rounds_per_step, rounds // 100)
+
+        # Round-by-round recursion with the drift and its linearization held fixed over the step
+        power, noise_sum, drift_sum = _propagate(transition, noise, step)
+        cov = power @ cov @ power.T + noise_sum
+        mu = model.clip((mu + drift_sum @ (active * drift))[None, :])[0]
+        rounds += step
+
+    result = {key: np.array(values) for key, values in series.items()}
+    result["state"] = {field: np.array([s[j] for s in states]) for j, field in enumerate(model.fields)}
+    below_half = np.nonzero(result["survival"] <= 0.5)[0]
+    result["predicted_median_rounds"] = float(result["rounds"][below_half[0]]) if len(below_half) else None
+    result["predicted_convergence_rate"] = float(1.0 - survival)
+    result["predicted_blue_given_convergence"] = float(converged_blue / (1.0 - survival)) if survival < 1.0 else None
+    result["max_rounds"] = max_rounds
+    result["flat_from_round"] = flat_from
+    return result
+
+
+def _step_values(x, y, at, before=1.0):
+    """Evaluate the right-continuous step function through (x, y) at `at`"""
+    y = np.append(before, y)
+    return y[np.searchsorted(x, at, side="right")]
+
+
+def compare_with_stochastic(agent_sizes: List[int], strategy: Strategy, signal_condition: SignalCondition,
+                            runs_per_setup: int = 200, max_rounds: int = 10000, engine: str = "batched",
+                            n_workers: int = 1, seed: Optional[int] = None,
+                            rounds_per_step: int = 100) -> Dict[int, Dict[str, Any]]:
+    """Run the mean-field model and the stochastic engine for each group size and compare them.
+
+    Per N this reports predicted vs observed median rounds (observed: Kaplan-Meier, with its
+    CI), convergence rate and Blue share of converged runs, plus the largest gap between the
+    predicted survival curve and the Kaplan-Meier curve and the round where it occurs.
+    """
+    comparison = {}
+    for setup in build_experiment_setups(agent_sizes, [signal_condition], [strategy],
+                                         runs_per_setup, max_rounds):
+        num_agents = len(setup["agent_configs"])
+        start = time.perf_counter()
+        meanfield = run_meanfield(setup["agent_configs"], signal_condition, max_rounds, rounds_per_step)
+        meanfield_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = run_all_scenarios([setup], engine=engine, n_workers=n_workers, seed=seed)
+        stochastic_seconds = time.perf_counter() - start
+        stats = results[setup["name"]]["summary_stats"]
+
+        km = stats["survival_curve"]
+        grid = np.union1d(meanfield["rounds"], km["rounds"])
+        gap = (_step_values(meanfield["rounds"], meanfield["survival"], grid) -
+               _step_values(np.array(km["rounds"]), km["survival"], grid))
+        worst = int(np.argmax(np.abs(gap))) if len(grid) else 0
+        comparison[num_agents] = {
+            "median_rounds": {"meanfield": meanfield["predicted_median_rounds"],
+                              "stochastic": stats["km_median_rounds"],
+                              "stochastic_ci": stats["km_median_ci"]},
+            "convergence_rate": {"meanfield": meanfield["predicted_convergence_rate"],
+                                 "stochastic": stats["convergence_rate"]},
+            "blue_given_convergence": {"meanfield": meanfield["predicted_blue_given_convergence"],
+                                       "stochastic": stats["blue_convergence_rate_given_convergence"]},
+            "survival_max_gap": float(gap[worst]) if len(grid) else 0.0,
+            "survival_max_gap_round": float(grid[worst]) if len(grid) else None,
+            "meanfield_seconds": meanfield_seconds,
+            "stochastic_seconds": stochastic_seconds
+        }
+
+    print(f"\nMean-field vs stochastic ({strategy.value}, {signal_condition.value}, {runs_per_setup} runs):")
+    print(f"  {'N':>5} {'median MF':>10} {'median sim':>11} {'conv MF':>8} {'conv sim':>9} "
+          f"{'max S gap':>10} {'at round':>9}")
+    for num_agents, row in comparison.items():
+        fmt = lambda v: "n/a" if v is None else f"{v:.0f}"
+        print(f"  {num_agents:>5} {fmt(row['median_rounds']['meanfield']):>10} "
+              f"{fmt(row['median_rounds']['stochastic']):>11} "
+              f"{row['convergence_rate']['meanfield']:>8.2f} {row['convergence_rate']['stochastic']:>9.2f} "
+              f"{row['survival_max_gap']:>+10.2f} {fmt(row['survival_max_gap_round']):>9}")
+    return comparison
@@ -0,0 +1,86 @@
+from typing import Dict, Any, Optional, Tuple
+
+# Prior costs, replaced by calibration from measured jobs. Scalar runs keep an interaction
+# record per agent per round (measured ~230 bytes); batched jobs keep a few arrays per
+# agent per replica, whatever the round budget.
+BYTES_PER_UNIT = {"scalar": 256.0, "batched": 1024.0}
+JOB_OVERHEAD_BYTES = 8 * 2 ** 20
+# Jobs smaller than this are dominated by allocator noise and do not calibrate the model
+MIN_CALIBRATION_UNITS = 10000
+
+
+def read_rss() -> Optional[Tuple[int, int]]:
+    """(current, peak) resident set size of this process in bytes, from /proc; None elsewhere"""
+    try:
+        with open("/proc/self/status") as status:
+            fields = dict(line.split(":", 1) for line in status if line.startswith(("VmRSS", "VmHWM")))
+        return int(fields["VmRSS"].split()[0]) * 1024, int(fields["VmHWM"].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def reset_peak_rss() -> Optional[int]:
+    """Reset this process's peak RSS to its current RSS (Linux clear_refs); return the current RSS"""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return None
+    rss = read_rss()
+    return rss[0] if rss is not None else None
+
+
+def job_units(job: Dict[str, Any], rounds: Optional[int] = None) -> float:
+    """Memory units of a sweep job: agent-rounds of history (scalar) or agent-replicas (batched).
+
+    Without `rounds` a scalar job is costed at its full round budget (the worst case: a run
+    that never converges); with it, at the rounds its runs actually played.
+    """
+    num_agents = len(job["agent_configs"])
+    if job["engine"] == "batched":
+        return float(num_agents * len(job["run_numbers"]))
+    if rounds is None:
+        rounds = job["max_rounds"]
+        resume = job.get("resume")
+        if resume is not None and resume["state"] is not None:
+            # A restored run starts with empty histories
+            rounds = max(0, rounds - resume["max_rounds"])
+    return float(num_agents * rounds)
+
+
+class MemoryModel:
+    """Estimate of a sweep job's peak memory: overhead + bytes per unit * job_units(job).
+
+    Starts from the BYTES_PER_UNIT priors; once a job of an engine with enough units has
+    been measured, that engine's cost per unit becomes the largest one observed, so the
+    model follows the machine it runs on and errs on the high side. Estimates are scaled
+    by `safety`.
+    """
+
+    def __init__(self, safety: float = 1.25):
+        self.safety = safety
+        self.bytes_per_unit = dict(BYTES_PER_UNIT)
+        self.calibrated = {engine: False for engine in BYTES_PER_UNIT}
+        self.observations = 0
+
+    def estimate(self, job: Dict[str, Any]) -> float:
+        return self.safety * (JOB_OVERHEAD_BYTES + self.bytes_per_unit[job["engine"]] * job_units(job))
+
+    def observe(self, job: Dict[str, Any], measured: Dict[str, Any]) -> None:
+        """Calibrate from a finished job's measurement (see _run_sweep_job's measured record)"""
+        if measured.get("rss_before") is None or measured.get("peak_rss") is None:
+            return
+        units = measured["units"]
+        if units < MIN_CALIBRATION_UNITS:
+            return
+        engine = job["engine"]
+        growth = max(0, measured["peak_rss"] - measured["rss_before"] - JOB_OVERHEAD_BYTES)
+        # Freed memory the allocator hands back to a later job hides part of its growth, so a
+        # first measurement may not undercut the prior by more than 4x
+        cost = growth / units
+        if not self.calibrated[engine]:
+            self.bytes_per_unit[engine] = max(cost, BYTES_PER_UNIT[engine] / 4)
+        elif cost > self.bytes_per_unit[engine]:
+            self.bytes_per_unit[engine] = cost
+        self.calibrated[engine] = True
+        self.observations += 1
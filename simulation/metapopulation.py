@@ -0,0 +1,202 @@
+import random
+import argparse
+import numpy as np
+from typing import List, Dict, Any, Optional
+from environment import (
+    PUBLIC_CONDITIONS,
+    SignalCondition,
+    Strategy,
+    get_strategy_spec
+)
+from batched import NO_SIGNAL, RED, BLUE, CHOICE_NAMES, batched_kernels
+
+
+class Metapopulation:
+    """Many groups of agents stepping together, with migration between groups.
+
+    All agents live in flat arrays: each strategy's kernel state is shaped (1, agents of
+    that strategy), as one replica of the batched engine (see batched.py), and `group_of`
+    holds every agent's current group. Each round every group is randomly matched into
+    pairs (one agent sits out of odd-sized groups), so a round is a few array operations
+    over all agents regardless of the number of groups.
+
+    Migration happens after every round: each agent becomes a migrant with probability
+    migration_rate, and the migrants' group slots are randomly permuted among them. Agents
+    carry their learned state (it is indexed by agent, not by group) and group sizes stay
+    fixed.
+    """
+
+    def __init__(self, agent_configs: List[Dict[str, Any]], group_sizes: List[int],
+                 signal_condition: SignalCondition, migration_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        if sum(group_sizes) != len(agent_configs):
+            raise ValueError(f"Group sizes add up to {sum(group_sizes)} but there are {len(agent_configs)} agents")
+        if min(group_sizes) < 2:
+            raise ValueError("Every group needs at least 2 agents")
+        if not 0.0 <= migration_rate <= 1.0:
+            raise ValueError(f"migration_rate must be in [0, 1], got {migration_rate}")
+        if signal_condition in PUBLIC_CONDITIONS:
+            raise ValueError(f"The metapopulation mode does not support '{signal_condition.value}'")
+        kernels = batched_kernels(agent_configs)
+        if kernels is None:
+            raise ValueError("Every strategy in the metapopulation needs a batched kernel")
+        self.num_agents = len(agent_configs)
+        self.group_sizes = np.array(group_sizes, dtype=np.int64)
+        self.group_start = np.concatenate([[0], np.cumsum(self.group_sizes)[:-1]])
+        self.signal_condition = signal_condition
+        self.migration_rate = migration_rate
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = np.random.default_rng(self.seed)
+
+        # Agents start in order: the first group_sizes[0] agents form group 0, and so on
+        self.group_of = np.repeat(np.arange(len(group_sizes)), self.group_sizes)
+        self.groups = []
+        self.local_index = np.zeros(self.num_agents, dtype=np.int64)
+        self.kernel_of = np.zeros(self.num_agents, dtype=np.int64)
+        for kernel in dict.fromkeys(kernels):
+            members = [i for i, k in enumerate(kernels) if k is kernel]
+            params_list = [get_strategy_spec(agent_configs[i].get("strategy_type"))
+                           .resolve_params(agent_configs[i].get("params", {})) for i in members]
+            self.local_index[members] = np.arange(len(members))
+            self.kernel_of[members] = len(self.groups)
+            self.groups.append((kernel, kernel.init_state(params_list, 1)))
+        self.last_choice = np.full(self.num_agents, NO_SIGNAL, dtype=np.int8)
+        self.rounds = 0
+
+    def _draw_pairs(self):
+        """Random matching inside every group: (left agents, right agents)"""
+        order = np.lexsort((self.rng.random(self.num_agents), self.group_of))
+        group = self.group_of[order]
+        position = np.arange(self.num_agents) - self.group_start[group]
+        first = np.nonzero((position % 2 == 0) & (position + 1 < self.group_sizes[group]))[0]
+        return order[first], order[first + 1]
+
+    def _migrate(self) -> None:
+        migrants = np.nonzero(self.rng.random(self.num_agents) < self.migration_rate)[0]
+        if len(migrants) > 1:
+            self.group_of[migrants] = self.group_of[self.rng.permutation(migrants)]
+
+    def step(self) -> None:
+        """One round in every group, then migration"""
+        self.rounds += 1
+        left, right = self._draw_pairs()
+        players = np.concatenate([left, right])
+        n_pairs = len(left)
+        opponent_pos = np.concatenate([np.arange(n_pairs, 2 * n_pairs), np.arange(n_pairs)])
+        u = self.rng.random((3, 1, len(players)))
+        splits = []
+        for g in range(len(self.groups)):
+            positions = np.nonzero(self.kernel_of[players] == g)[0]
+            splits.append((positions, self.local_index[players[positions]]))
+
+        signal = np.empty((1, len(players)), dtype=np.int8)
+        for (kernel, state), (positions, cols) in zip(self.groups, splits):
+            if len(positions):
+                signal[:, positions] = kernel.decide_signal(state, cols, self.signal_condition,
+                                                            u[0][:, positions], u[1][:, positions])
+        opponent_signal = signal[:, opponent_pos]
+        choice = np.empty((1, len(players)), dtype=np.int8)
+        for (kernel, state), (positions, cols) in zip(self.groups, splits):
+            if len(positions):
+                choice[:, positions] = kernel.decide_final_choice(
+                    state, cols, signal[:, positions], opponent_signal[:, positions], u[2][:, positions])
+        success = choice == choice[:, opponent_pos]
+        for (kernel, state), (positions, cols) in zip(self.groups, splits):
+            if len(positions):
+                kernel.update(state, cols, signal[:, positions], opponent_signal[:, positions],
+                              choice[:, positions], success[:, positions])
+        self.last_choice[players] = choice[0]
+        if self.migration_rate > 0:
+            self._migrate()
+
+    def group_conventions(self) -> np.ndarray:
+        """Per group: BLUE or RED if all its members' last choices agree, else NO_SIGNAL"""
+        n_groups = len(self.group_sizes)
+        blue = np.bincount(self.group_of, weights=self.last_choice == BLUE, minlength=n_groups)
+        red = np.bincount(self.group_of, weights=self.last_choice == RED, minlength=n_groups)
+        conventions = np.full(n_groups, NO_SIGNAL, dtype=np.int8)
+        conventions[blue == self.group_sizes] = BLUE
+        conventions[red == self.group_sizes] = RED
+        return conventions
+
+    def census(self) -> Dict[str, Any]:
+        conventions = self.group_conventions()
+        blue_groups = int(np.sum(conventions == BLUE))
+        red_groups = int(np.sum(conventions == RED))
+        chosen = self.last_choice != NO_SIGNAL
+        return {
+            "round": self.rounds,
+            "blue_groups": blue_groups,
+            "red_groups": red_groups,
+            "converged_groups": (blue_groups + red_groups) / len(conventions),
+            # Both conventions held by whole groups at once: conventions stay local
+            "coexisting": blue_groups > 0 and red_groups > 0,
+            "blue_share": float(np.mean(self.last_choice[chosen] == BLUE)) if chosen.any() else float("nan")
+        }
+
+    def run(self, max_rounds: int = 100000, record_every: int = 10) -> Dict[str, Any]:
+        """Step until every agent's last choice agrees (checked every 10 rounds) or max_rounds.
+
+        The census (groups holding each convention, whether both coexist, Blue share of
+        last choices) is recorded every `record_every` rounds and at the end.
+        """
+        history = []
+        converged, choice = False, None
+        while self.rounds < max_rounds:
+            self.step()
+            if record_every and self.rounds % record_every == 0:
+                history.append(self.census())
+            # Same cadence and rule as Environment._check_convergence, over all agents
+            if self.rounds % 10 == 0:
+                first = self.last_choice[0]
+                if first != NO_SIGNAL and np.all(self.last_choice == first):
+                    converged, choice = True, CHOICE_NAMES[int(first)]
+                    break
+        if not history or history[-1]["round"] != self.rounds:
+            history.append(self.census())
+        return {
+            "rounds": self.rounds,
+            "converged": converged,
+            "convergence_choice": choice,
+            "group_conventions": [CHOICE_NAMES.get(int(c)) for c in self.group_conventions()],
+            "history": history,
+            "seed": self.seed
+        }
+
+
+def run_metapopulation(n_groups: int, group_size: int, strategy=Strategy.REWARD_BASED,
+                       signal_condition: SignalCondition = SignalCondition.NO_SIGNAL,
+                       migration_rate: float = 0.0, max_rounds: int = 10000,
+                       params: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+                       record_every: int = 10) -> Dict[str, Any]:
+    """Homogeneous metapopulation of n_groups groups of group_size agents"""
+    agent_configs = [{"strategy_type": strategy, "params": dict(params or {})}
+                     for _ in range(n_groups * group_size)]
+    meta = Metapopulation(agent_configs, [group_size] * n_groups, signal_condition, migration_rate, seed)
+    return meta.run(max_rounds, record_every)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Run many groups with migration between them')
+    parser.add_argument('--groups', type=int, default=1000, help='Number of groups')
+    parser.add_argument('--group-size', type=int, default=4, help='Agents per group')
+    parser.add_argument('--strategy', type=str, choices=[strategy.name for strategy in Strategy],
+                        default='REWARD_BASED', help='Strategy of every agent')
+    parser.add_argument('--signal-condition', type=str, default='NO_SIGNAL',
+                        choices=[c.name for c in SignalCondition if c not in PUBLIC_CONDITIONS],
+                        help='Signal condition inside groups')
+    parser.add_argument('--migration-rate', type=float, default=0.01, help='Per-agent migration probability per round')
+    parser.add_argument('--max-rounds', type=int, default=10000, help='Round budget')
+    parser.add_argument('--seed', type=int, default=None, help='Seed')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    result = run_metapopulation(args.groups, args.group_size, getattr(Strategy, args.strategy),
+                                getattr(SignalCondition, args.signal_condition), args.migration_rate,
+                                args.max_rounds, seed=args.seed, record_every=100)
+    for census in result["history"]:
+        print(f"  Round {census['round']}: {census['blue_groups']} Blue / {census['red_groups']} Red groups, " +
+              f"Blue share {census['blue_share']:.2f}")
+    print(f"Converged globally: {result['converged']} ({result['convergence_choice']}) after {result['rounds']} rounds")
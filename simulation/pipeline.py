@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import hashlib
+import inspect
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Callable, Sequence
+
+MANIFEST = "pipeline_manifest.json"
+
+
+def artifact_hash(path: str) -> Optional[str]:
+    """sha256 of a file, or of the relative paths and contents of every file under a directory;
+    None if the path does not exist"""
+    if os.path.isfile(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for folder, dirs, files in sorted(os.walk(path)):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(folder, name)
+                digest.update(os.path.relpath(full, path).encode())
+                digest.update(artifact_hash(full).encode())
+        return digest.hexdigest()
+    return None
+
+
+def write_json(path: str, data: Any, **kwargs) -> None:
+    """Write JSON through a temporary file, so an interrupted stage never leaves a partial artifact"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(temporary, path)
+
+
+class Stage:
+    """One step of a Pipeline.
+
+    func(root, **params, **options) reads its `inputs` and writes its `outputs`, both paths
+    relative to the results directory `root` (a directory output counts as all the files
+    under it). The stage's fingerprint covers its params, the source of `code` (default:
+    func) and the hashes of its inputs; options (e.g. worker counts) are passed but not
+    fingerprinted, so they must not change the outputs.
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str] = (), outputs: Sequence[str] = (),
+                 params: Optional[Dict[str, Any]] = None, options: Optional[Dict[str, Any]] = None,
+                 code: Optional[Sequence[Callable]] = None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = dict(params or {})
+        self.options = dict(options or {})
+        self.code = list(code or [func])
+
+    def fingerprint(self, input_hashes: Dict[str, Optional[str]]) -> str:
+        description = {
+            "name": self.name,
+            "params": self.params,
+            "code": [inspect.getsource(f) for f in self.code],
+            "inputs": input_hashes
+        }
+        text = json.dumps(description, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+
+class Pipeline:
+    """Stages with declared artifacts in one results directory, rerun only when their inputs change.
+
+    A stage depends on the stages producing its inputs. When all of them have finished, its
+    fingerprint is compared with the one recorded in the directory's manifest: if it matches
+    and its outputs are still the files it wrote, the stage is skipped, otherwise it runs.
+    Stages whose dependencies are satisfied run concurrently on up to max_parallel threads,
+    and the manifest is saved after every stage, so an interrupted pipeline resumes from the
+    stages it finished.
+    """
+
+    def __init__(self, root: str, stages: List[Stage], max_parallel: int = 4):
+        self.root = root
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self.producer: Dict[str, str] = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producer:
+                    raise ValueError(f"'{output}' is an output of both '{self.producer[output]}' and '{stage.name}'")
+                self.producer[output] = stage.name
+        self.depends = {stage.name: {self.producer[i] for i in stage.inputs if i in self.producer}
+                        for stage in stages}
+        self._check_acyclic()
+        self.max_parallel = max_parallel
+        self.manifest_path = os.path.join(root, MANIFEST)
+
+    def _check_acyclic(self) -> None:
+        done, visiting = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage '{name}' depends on itself")
+            visiting.add(name)
+            for dependency in self.depends[name]:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {}
+
+    def _hashes(self, paths: List[str]) -> Dict[str, Optional[str]]:
+        return {path: artifact_hash(os.path.join(self.root, path)) for path in paths}
+
+    def _up_to_date(self, stage: Stage, fingerprint: str, manifest: Dict[str, Any]) -> bool:
+        record = manifest.get(stage.name)
+        return (record is not None and record["fingerprint"] == fingerprint and
+                record["outputs"] == self._hashes(stage.outputs) and None not in record["outputs"].values())
+
+    def _execute(self, stage: Stage) -> float:
+        started = time.perf_counter()
+        stage.func(self.root, **stage.params, **stage.options)
+        return time.perf_counter() - started
+
+    def run(self, force: Sequence[str] = ()) -> Dict[str, str]:
+        """Run or skip every stage; `force` names stages to rerun regardless. Returns stage -> "ran"/"skipped" """
+        unknown = set(force) - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stages: {sorted(unknown)}")
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self._load_manifest()
+        status: Dict[str, str] = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while len(status) < len(self.stages):
+                for name, stage in self.stages.items():
+                    if name in status or name in running.values() or not self.depends[name] <= set(status):
+                        continue
+                    inputs = self._hashes(stage.inputs)
+                    missing = [path for path, digest in inputs.items() if digest is None]
+                    if missing:
+                        raise ValueError(f"Stage '{name}' is missing its inputs {missing}")
+                    fingerprint = stage.fingerprint(inputs)
+                    if name not in force and self._up_to_date(stage, fingerprint, manifest):
+                        status[name] = "skipped"
+                        print(f"[pipeline] {name}: up to date")
+                        continue
+                    print(f"[pipeline] {name}: running")
+                    future = executor.submit(self._execute, stage)
+                    future.fingerprint = fingerprint
+                    running[future] = name
+                if not running:
+                    continue
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    seconds = future.result()  # Re-raises a failed stage's exception
+                    manifest[name] = {
+                        "fingerprint": future.fingerprint,
+                        "outputs": self._hashes(self.stages[name].outputs),
+                        "seconds": seconds,
+                        "finished": time.strftime("%Y-%m-%d %H:%M:%S")
+                    }
+                    write_json(self.manifest_path, manifest, indent=2)
+                    status[name] = "ran"
+                    print(f"[pipeline] {name}: done in {seconds:.1f}s")
+        return status
@@ -0,0 +1,85 @@
+from typing import Dict, Any, Optional, Tuple, List
+from environment import (
+    ENGINE_VERSION,
+    TOPOLOGY_STREAM,
+    Environment,
+    SignalCondition,
+    stream_seed
+)
+
+
+def _find_run(results: Dict[str, Any], setup_name: str, run_number: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    if setup_name not in results:
+        raise ValueError(f"Unknown setup '{setup_name}'")
+    setup_results = results[setup_name]
+    for run in setup_results["runs_data"]:
+        if run["run_number"] == run_number:
+            return setup_results["config"], run
+    raise ValueError(f"Setup '{setup_name}' has no run {run_number}")
+
+
+def replay_run(results: Dict[str, Any], setup_name: str, run_number: int,
+               round_window: Optional[Tuple[int, int]] = None, topology=None) -> Dict[str, Any]:
+    """Regenerate the full interaction trace of one stored run from its recorded seed.
+
+    Sweeps keep only per-run outcomes; this re-runs the single run (or, for the batched
+    engine, its batch) and records every interaction inside `round_window` (inclusive
+    1-based rounds; default: the whole run). The run stops at the end of the window, so
+    early windows are cheap. `topology` must be the GraphTopology of the original setup
+    when it used one (configs only keep its description).
+
+    Returns the trace as a list of dicts plus the outcome of the replay; when the replay
+    ran to the end, `matches_record` says whether it reproduced the stored outcome.
+    """
+    config, run = _find_run(results, setup_name, run_number)
+    if "seed" not in run:
+        raise ValueError(f"Run {run_number} of '{setup_name}' has no recorded seed")
+    if run.get("engine_version") != ENGINE_VERSION:
+        raise ValueError(f"Run was produced by engine version {run.get('engine_version')}, "
+                         f"this code is version {ENGINE_VERSION}; it cannot be replayed exactly")
+    if config["topology"] != "rotation" and topology is None:
+        raise ValueError(f"Setup '{setup_name}' used topology '{config['topology']}'; pass it as `topology`")
+
+    signal_condition = SignalCondition(config["signal_condition"])
+    max_rounds = config["max_rounds"]
+    first_round, last_round = round_window if round_window is not None else (1, max_rounds)
+    if first_round < 1 or last_round < first_round:
+        raise ValueError(f"Invalid round window {round_window}")
+    stop_round = min(last_round, max_rounds)
+
+    trace: List[Dict[str, Any]] = []
+
+    def record(round_number, name1, name2, signal1, signal2, choice1, choice2, success):
+        if round_number >= first_round:
+            trace.append({"round": round_number, "agents": (name1, name2), "signals": (signal1, signal2),
+                          "choices": (choice1, choice2), "success": success})
+
+    if run.get("engine", "scalar") == "batched":
+        from batched import run_batched
+        outcomes = run_batched(config["agent_configs"], signal_condition, run["batch_size"], stop_round,
+                               seed=run["seed"], trace_replica=run["batch_replica"], trace_callback=record)
+        rounds, converged, choice = outcomes[run["batch_replica"]]
+    else:
+        env = Environment(agent_configs=config["agent_configs"],
+                          signal_condition=signal_condition,
+                          topology=(topology.fresh(stream_seed(run["seed"], TOPOLOGY_STREAM))
+                                    if topology is not None else None),
+                          seed=run["seed"],
+                          antithetic=run.get("antithetic", False))
+        env.trace_callback = record
+        rounds, converged, choice = env.run_simulation(stop_round)
+
+    complete = converged or stop_round == max_rounds
+    return {
+        "setup_name": setup_name,
+        "run_number": run_number,
+        "seed": run["seed"],
+        "round_window": (first_round, stop_round),
+        "rounds": rounds,
+        "converged": converged,
+        "convergence_choice": choice,
+        "matches_record": ((rounds, converged, choice) ==
+                           (run["rounds_to_convergence"], run["converged"], run["convergence_choice"])
+                           if complete else None),
+        "trace": trace
+    }
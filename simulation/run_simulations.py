@@ -2,10 +2,13 @@ import argparse
 from environment import (
     SignalCondition, 
     Strategy, 
+    PAIRWISE_CONDITIONS,
     Environment, 
+    build_experiment_setups,
     run_all_scenarios, 
     plot_results
 )
+from telemetry import SweepTelemetry, TelemetryServer
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Run agent simulations with different communication conditions')
@@ -41,7 +44,7 @@ def parse_arguments():
     parser.add_argument(
         '--signal-condition', 
         type=str, 
-        choices=['NO_SIGNAL', 'MANDATORY_SIGNAL', 'OPTIONAL_SIGNAL'],
+        choices=[condition.name for condition in SignalCondition],
         default='MANDATORY_SIGNAL',
         help='Signal condition to use for single scenario run'
     )
@@ -61,6 +64,37 @@ def parse_arguments():
         help='Number of agents for single scenario run'
     )
     
+    parser.add_argument(
+        '--signal-conditions', 
+        type=str, 
+        nargs='+',
+        choices=[condition.name for condition in SignalCondition],
+        default=[condition.name for condition in PAIRWISE_CONDITIONS],
+        help='Signal conditions to run for all scenarios (default: the pairwise ones; list ' +
+             'PUBLIC_SIGNAL or P2P_PUBLIC_SIGNAL to include the public conditions)'
+    )
+    
+    parser.add_argument(
+        '--workers', 
+        type=int, 
+        default=1,
+        help='Number of worker processes for the sweep'
+    )
+    
+    parser.add_argument(
+        '--memory-limit', 
+        type=float, 
+        default=None,
+        help='Ceiling in MB on the estimated memory of the runs in flight'
+    )
+    
+    parser.add_argument(
+        '--telemetry-port', 
+        type=int, 
+        default=None,
+        help='Serve live sweep progress on http://127.0.0.1:PORT/status (JSON) and /status.txt'
+    )
+    
     return parser.parse_args()
 
 def run_single_scenario(args):
@@ -73,7 +107,8 @@ def run_single_scenario(args):
     print(f"  Strategy: {strategy.value}")
     print(f"  Number of Agents: {args.num_agents}")
     
-    env = Environment(args.num_agents, signal_condition, strategy)
+    agent_configs = [{"strategy_type": strategy} for _ in range(args.num_agents)]
+    env = Environment(agent_configs, signal_condition)
     rounds, converged, choice = env.run_simulation(args.max_rounds)
     
     print("\nResults:")
@@ -102,12 +137,28 @@ def main():
         run_single_scenario(args)
     else:
         print("Running all scenarios...")
-        results = run_all_scenarios(
+        experiment_setups = build_experiment_setups(
             agent_sizes=args.agent_sizes,
-            runs_per_scenario=args.runs_per_scenario,
+            signal_conditions=[SignalCondition[name] for name in args.signal_conditions],
+            runs_per_setup=args.runs_per_scenario,
             max_rounds=args.max_rounds
         )
         
+        telemetry = server = None
+        if args.telemetry_port is not None:
+            telemetry = SweepTelemetry()
+            server = TelemetryServer(telemetry, port=args.telemetry_port).start()
+            print(f"Telemetry available at http://{server.host}:{server.port}/status " +
+                  f"(plain text: /status.txt)")
+        
+        try:
+            results = run_all_scenarios(
+                experiment_setups, telemetry=telemetry, n_workers=args.workers,
+                memory_limit=args.memory_limit * 2 ** 20 if args.memory_limit is not None else None)
+        finally:
+            if server is not None:
+                server.stop()
+        
         print("\nPlotting results...")
         plot_results(results)
         
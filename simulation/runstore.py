@@ -0,0 +1,69 @@
+import os
+import json
+import pickle
+import hashlib
+from typing import List, Dict, Any, Optional
+
+
+class RunStore:
+    """On-disk record of finished sweep jobs, used to extend round budgets without rerunning.
+
+    One file per setup fingerprint (agents, signal condition, topology, engine and engine
+    version; not max_rounds or runs_per_setup). Each file maps a job key (run seed,
+    antithetic flag and run numbers) to the job's runs_data at the budget it ran with,
+    plus the end state of its unconverged runs: a pickled EnvironmentSnapshot (scalar) or
+    BatchedEngine (batched), or None when every run converged.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._files: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def fingerprint(agent_configs: List[Dict[str, Any]], signal_condition, topology, engine: str,
+                    engine_version: str) -> str:
+        description = {
+            "agent_configs": agent_configs,
+            "signal_condition": signal_condition.value,
+            "topology": None,
+            "engine": engine,
+            "engine_version": engine_version
+        }
+        if topology is not None:
+            graph = topology.graph
+            description["topology"] = {
+                "describe": topology.describe(),
+                "graph": hashlib.sha256(graph.indptr.tobytes() + graph.indices.tobytes()).hexdigest()
+            }
+        text = json.dumps(description, sort_keys=True, default=str)
+        return hashlib.sha256(text.encode()).hexdigest()[:20]
+
+    @staticmethod
+    def job_key(seed: int, antithetic: bool, run_numbers: List[int]) -> str:
+        return f"{seed}:{int(antithetic)}:{run_numbers[0]}-{run_numbers[-1]}"
+
+    def _file(self, fingerprint: str) -> str:
+        return os.path.join(self.path, f"{fingerprint}.pkl")
+
+    def jobs(self, fingerprint: str) -> Dict[str, Dict[str, Any]]:
+        if fingerprint not in self._files:
+            try:
+                with open(self._file(fingerprint), "rb") as f:
+                    self._files[fingerprint] = pickle.load(f)
+            except FileNotFoundError:
+                self._files[fingerprint] = {}
+        return self._files[fingerprint]
+
+    def get(self, fingerprint: str, key: str) -> Optional[Dict[str, Any]]:
+        return self.jobs(fingerprint).get(key)
+
+    def put(self, fingerprint: str, key: str, entry: Dict[str, Any]) -> None:
+        self.jobs(fingerprint)[key] = entry
+
+    def save(self, fingerprint: str) -> None:
+        """Write the setup's file atomically"""
+        path = self._file(fingerprint)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(self.jobs(fingerprint), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
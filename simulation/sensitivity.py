@@ -0,0 +1,185 @@
+import random
+import argparse
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from environment import (
+    SignalCondition,
+    Strategy,
+    get_strategy_spec,
+    run_all_scenarios,
+    stream_seed
+)
+from stats import percentile_ci
+from threshold import strategy_mix_sweep
+
+# Sampling ranges of the factors; params without both schema bounds need one here
+DEFAULT_FACTORS = {
+    "alpha": (0.05, 0.5),
+    "beta": (0.05, 0.5),
+    "conflict_learning_boost": (0.0, 3.0),
+    "initial_p_send_signal": (0.1, 0.9),
+    "pseudo_count": (0.5, 8.0),
+    "learning_step_follow": (0.0, 2.0)
+}
+
+OUTPUTS = ("mean_rounds", "convergence_rate", "blue_share")
+
+
+def saltelli_design(n_base: int, n_factors: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Base matrices A, B (n_base x d, uniform on [0, 1)) and AB (d x n_base x d), where AB[i]
+    is A with column i taken from B: n_base * (d + 2) points in total"""
+    a = rng.random((n_base, n_factors))
+    b = rng.random((n_base, n_factors))
+    ab = np.repeat(a[None], n_factors, axis=0)
+    for i in range(n_factors):
+        ab[i, :, i] = b[:, i]
+    return a, b, ab
+
+
+def sobol_estimates(f_a: np.ndarray, f_b: np.ndarray, f_ab: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """First-order (Saltelli 2010) and total (Jansen) indices; leading axes of the inputs
+    broadcast, so bootstrap resamples are estimated in one call (f_ab: (..., d, n))"""
+    variance = np.var(np.concatenate([f_a, f_b], axis=-1), axis=-1)[..., None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        first = np.mean(f_b[..., None, :] * (f_ab - f_a[..., None, :]), axis=-1) / variance
+        total = 0.5 * np.mean((f_a[..., None, :] - f_ab) ** 2, axis=-1) / variance
+    return first, total
+
+
+def _point_outputs(runs_data: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Model outputs of one design point: mean rounds (unconverged runs count at max_rounds),
+    convergence rate and the share of runs that converged to Blue"""
+    n = len(runs_data)
+    return {
+        "mean_rounds": float(np.mean([run["rounds_to_convergence"] for run in runs_data])),
+        "convergence_rate": sum(1 for run in runs_data if run["converged"]) / n,
+        "blue_share": sum(1 for run in runs_data
+                          if run["converged"] and run["convergence_choice"] == "Blue") / n
+    }
+
+
+def sobol_analysis(factors: Optional[Dict[str, Tuple[float, float]]] = None,
+                   mix: Optional[Dict[Any, float]] = None, num_agents: int = 6,
+                   signal_condition: SignalCondition = SignalCondition.OPTIONAL_SIGNAL,
+                   n_base: int = 64, runs_per_point: int = 10, max_rounds: int = 10000,
+                   batch_points: int = 64, engine: str = "batched", n_workers: int = 1,
+                   variance_reduction: Optional[str] = None, n_bootstrap: int = 1000,
+                   level: float = 0.95, seed: Optional[int] = None) -> Dict[str, Any]:
+    """First-order and total Sobol indices of strategy parameters on convergence outcomes.
+
+    factors maps a param name to its sampling range (default DEFAULT_FACTORS); a factor
+    sets that param for every agent of the strategies in `mix` that have it (default: half
+    History Based, half Reward Based). The Saltelli design evaluates n_base * (d + 2) points,
+    sharing the base samples A and B across all factors. Each point is a setup of
+    runs_per_point runs, and points are run through run_all_scenarios in batches of
+    batch_points setups (n_workers applies within a batch). variance_reduction="crn"
+    drives all points from the same random streams, which removes most simulation noise
+    from the differences the estimators use (it implies the scalar engine).
+
+    Error bars are percentile intervals over n_bootstrap resamples of the base rows, all
+    estimated at once as arrays. Indices are estimates: with noisy outputs, small ones
+    may come out slightly negative. An output that is constant over the base samples has
+    no variance to apportion; its indices are NaN and it is listed in "constant_outputs".
+    """
+    factors = dict(factors or DEFAULT_FACTORS)
+    mix = mix or {Strategy.HISTORY_BASED: 0.5, Strategy.REWARD_BASED: 0.5}
+    names = list(factors)
+    bounds = np.array([factors[name] for name in names], dtype=np.float64)
+    owners = {name: [strategy for strategy in mix if name in get_strategy_spec(strategy).param_schema]
+              for name in names}
+    missing = [name for name, strategies in owners.items() if not strategies]
+    if missing:
+        raise ValueError(f"No strategy in the mix has params {missing}")
+    base_seed = seed if seed is not None else random.getrandbits(63)
+    rng = np.random.default_rng(stream_seed(base_seed, 0))
+
+    a, b, ab = saltelli_design(n_base, len(names), rng)
+    unit_points = np.concatenate([a, b, ab.reshape(-1, len(names))])
+    points = bounds[:, 0] + unit_points * (bounds[:, 1] - bounds[:, 0])
+
+    setups = []
+    for k, values in enumerate(points):
+        params = {strategy: {} for strategy in mix}
+        for name, value in zip(names, values):
+            for strategy in owners[name]:
+                params[strategy][name] = float(value)
+        setup = strategy_mix_sweep(mix, signal_condition, max_rounds, params)(num_agents)
+        setup.update(name=f"point {k}", runs_per_setup=runs_per_point)
+        setups.append(setup)
+
+    outputs = {output: np.empty(len(setups)) for output in OUTPUTS}
+    # Common random numbers need the scalar engine; asking run_all_scenarios for batched
+    # would print a fallback note for every design point
+    run_engine = "scalar" if variance_reduction is not None else engine
+    for start in range(0, len(setups), batch_points):
+        batch = setups[start:start + batch_points]
+        print(f"\nSensitivity analysis: points {start + 1}-{start + len(batch)} of {len(setups)}")
+        # With crn every batch must share the base seed so all points use the same streams
+        batch_seed = base_seed if variance_reduction == "crn" else stream_seed(base_seed, 1, start)
+        results = run_all_scenarios(batch, engine=run_engine, n_workers=n_workers, seed=batch_seed,
+                                    variance_reduction=variance_reduction, bootstrap_resamples=0)
+        for k, setup in enumerate(batch, start):
+            for output, value in _point_outputs(results[setup["name"]]["runs_data"]).items():
+                outputs[output][k] = value
+
+    d = len(names)
+    resamples = rng.integers(0, n_base, size=(n_bootstrap, n_base))
+    report = {}
+    constant = []
+    print(f"\nSobol indices ({n_base} base samples, {len(setups)} points x {runs_per_point} runs, " +
+          f"{level:.0%} bootstrap CIs):")
+    for output, values in outputs.items():
+        f_a, f_b = values[:n_base], values[n_base:2 * n_base]
+        f_ab = values[2 * n_base:].reshape(d, n_base)
+        if np.var(np.concatenate([f_a, f_b])) == 0:
+            # Nothing to apportion (e.g. every run converged): the indices are 0 / 0
+            constant.append(output)
+            report[output] = {name: {"first_order": float("nan"), "first_order_ci": [float("nan")] * 2,
+                                     "total": float("nan"), "total_ci": [float("nan")] * 2} for name in names}
+            print(f"  {output}: output constant ({f_a[0]:.3g}) over the base samples, indices undefined")
+            continue
+        first, total = sobol_estimates(f_a, f_b, f_ab)
+        boot_first, boot_total = sobol_estimates(f_a[resamples], f_b[resamples], f_ab[:, resamples].transpose(1, 0, 2))
+        report[output] = {
+            name: {
+                "first_order": float(first[i]),
+                "first_order_ci": list(percentile_ci(boot_first[:, i], level)),
+                "total": float(total[i]),
+                "total_ci": list(percentile_ci(boot_total[:, i], level))
+            } for i, name in enumerate(names)
+        }
+        print(f"  {output}:")
+        for name, index in report[output].items():
+            print(f"    {name}: S1 {index['first_order']:.3f} " +
+                  f"[{index['first_order_ci'][0]:.3f}, {index['first_order_ci'][1]:.3f}], " +
+                  f"ST {index['total']:.3f} [{index['total_ci'][0]:.3f}, {index['total_ci'][1]:.3f}]")
+    return {
+        "factors": factors,
+        "indices": report,
+        "constant_outputs": constant,
+        "points": points,
+        "outputs": outputs,
+        "evaluations": len(setups),
+        "runs": len(setups) * runs_per_point,
+        "seed": base_seed
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Sobol sensitivity of convergence outcomes to strategy params')
+    parser.add_argument('--num-agents', type=int, default=6, help='Group size')
+    parser.add_argument('--signal-condition', type=str, choices=[condition.name for condition in SignalCondition],
+                        default='OPTIONAL_SIGNAL', help='Signal condition')
+    parser.add_argument('--base-samples', type=int, default=64, help='Rows of the base matrices A and B')
+    parser.add_argument('--runs-per-point', type=int, default=10, help='Runs per design point')
+    parser.add_argument('--max-rounds', type=int, default=10000, help='Round budget per run')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes')
+    parser.add_argument('--seed', type=int, default=None, help='Base seed')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    sobol_analysis(num_agents=args.num_agents, signal_condition=getattr(SignalCondition, args.signal_condition),
+                   n_base=args.base_samples, runs_per_point=args.runs_per_point, max_rounds=args.max_rounds,
+                   n_workers=args.workers, seed=args.seed)
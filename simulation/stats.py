@@ -0,0 +1,184 @@
+import numpy as np
+from statistics import NormalDist
+from typing import List, Dict, Any, Tuple, Optional
+
+
+def normal_quantile(p: float) -> float:
+    return NormalDist().inv_cdf(p)
+
+
+def t_quantile(p: float, df: float) -> float:
+    """Student t quantile via the Cornish-Fisher expansion (accurate to ~1e-3 for df >= 3)"""
+    z = normal_quantile(p)
+    if df <= 0 or np.isinf(df):
+        return z
+    return (z + (z ** 3 + z) / (4 * df)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+def mean_ci(values, level: float = 0.95) -> Tuple[float, float, float]:
+    """Mean with a t confidence interval: (mean, low, high)"""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return float("nan"), float("nan"), float("nan")
+    mean = float(values.mean())
+    if n == 1:
+        return mean, float("nan"), float("nan")
+    half_width = float(t_quantile(0.5 + level / 2, n - 1) * values.std(ddof=1) / np.sqrt(n))
+    return mean, mean - half_width, mean + half_width
+
+
+def wilson_interval(successes: float, n: int, level: float = 0.95) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion"""
+    if n == 0:
+        return 0.0, 1.0
+    z = normal_quantile(0.5 + level / 2)
+    p = successes / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half_width = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return float(max(0.0, center - half_width)), float(min(1.0, center + half_width))
+
+
+def ks_two_sample(x, y) -> Tuple[float, float]:
+    """Two-sample Kolmogorov-Smirnov statistic and asymptotic p-value (Stephens' correction).
+
+    With ties (e.g. rounds only ever ending on a convergence check) the p-value is conservative.
+    """
+    x = np.sort(np.asarray(x, dtype=np.float64))
+    y = np.sort(np.asarray(y, dtype=np.float64))
+    n, m = len(x), len(y)
+    if n == 0 or m == 0:
+        return float("nan"), 1.0
+    grid = np.concatenate([x, y])
+    cdf_x = np.searchsorted(x, grid, side="right") / n
+    cdf_y = np.searchsorted(y, grid, side="right") / m
+    statistic = float(np.max(np.abs(cdf_x - cdf_y)))
+    en = np.sqrt(n * m / (n + m))
+    lam = (en + 0.12 + 0.11 / en) * statistic
+    if lam < 1e-3:
+        return statistic, 1.0
+    k = np.arange(1, 101)
+    p_value = 2 * np.sum((-1.0) ** (k - 1) * np.exp(-2 * k * k * lam * lam))
+    return statistic, float(min(max(p_value, 0.0), 1.0))
+
+
+def two_proportion_test(successes_a: int, n_a: int, successes_b: int, n_b: int) -> Tuple[float, float]:
+    """Difference of two proportions (a - b) and its two-sided pooled z-test p-value"""
+    if n_a == 0 or n_b == 0:
+        return float("nan"), 1.0
+    diff = successes_a / n_a - successes_b / n_b
+    pooled = (successes_a + successes_b) / (n_a + n_b)
+    se = np.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+    if se == 0:
+        return diff, 1.0
+    return diff, float(2 * (1 - NormalDist().cdf(abs(diff) / se)))
+
+
+def holm_adjust(p_values) -> List[float]:
+    """Holm step-down adjusted p-values (family-wise error control), in input order"""
+    p_values = np.asarray(p_values, dtype=np.float64)
+    n = len(p_values)
+    order = np.argsort(p_values)
+    adjusted = np.maximum.accumulate((n - np.arange(n)) * p_values[order])
+    result = np.empty(n)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result.tolist()
+
+
+def run_metrics(runs_data: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Per-run metric arrays ordered by run_number"""
+    runs = sorted(runs_data, key=lambda run: run["run_number"])
+    return {
+        "rounds_to_convergence": np.array([run["rounds_to_convergence"] for run in runs], dtype=np.float64),
+        "converged": np.array([run["converged"] for run in runs], dtype=np.float64),
+        "converged_blue": np.array([run["converged"] and run["convergence_choice"] == "Blue"
+                                    for run in runs], dtype=np.float64)
+    }
+
+
+def paired_difference_ci(x, y, level: float = 0.95, pair_size: int = 1) -> Dict[str, float]:
+    """Mean of x - y over paired units with a t confidence interval.
+
+    With pair_size > 1, consecutive runs (e.g. an antithetic pair) are first averaged into
+    one unit, since only the units are independent.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = min(len(x), len(y))
+    x, y = x[:n], y[:n]
+    if pair_size > 1:
+        starts = np.arange(0, n, pair_size)
+        x = np.add.reduceat(x, starts) / np.diff(np.append(starts, n))
+        y = np.add.reduceat(y, starts) / np.diff(np.append(starts, n))
+    diff = x - y
+    mean, low, high = mean_ci(diff, level)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = float(np.corrcoef(x, y)[0, 1]) if len(diff) > 1 and x.std() > 0 and y.std() > 0 else float("nan")
+    return {
+        "mean_difference": mean,
+        "ci_low": low,
+        "ci_high": high,
+        "n_units": len(diff),
+        "correlation": correlation
+    }
+
+
+def paired_run_comparison(runs_a: List[Dict[str, Any]], runs_b: List[Dict[str, Any]],
+                          level: float = 0.95, pair_size: int = 1) -> Dict[str, Dict[str, float]]:
+    """Paired differences (a - b) of every per-run metric for runs matched by run_number"""
+    metrics_a, metrics_b = run_metrics(runs_a), run_metrics(runs_b)
+    return {metric: paired_difference_ci(metrics_a[metric], metrics_b[metric], level, pair_size)
+            for metric in metrics_a}
+
+
+# Statistics of summary_stats that get bootstrap confidence intervals
+BOOTSTRAP_METRICS = ("avg_rounds_to_convergence", "convergence_rate", "blue_convergence_rate_given_convergence")
+
+
+def bootstrap_replicates(runs_data: List[Dict[str, Any]], n_resamples: int = 2000,
+                         rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """Values of every BOOTSTRAP_METRICS statistic over n_resamples resamples of the runs.
+
+    All resamples are drawn at once as an (n_resamples, runs) matrix of multiplicities, so
+    each statistic is one matrix product over the per-run metrics instead of a Python loop.
+    A resample without converged runs has no Blue share (NaN).
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    metrics = run_metrics(runs_data)
+    n = len(metrics["converged"])
+    if n == 0:
+        return {metric: np.full(n_resamples, np.nan) for metric in BOOTSTRAP_METRICS}
+    draws = rng.integers(0, n, size=(n_resamples, n)) + n * np.arange(n_resamples)[:, None]
+    weights = np.bincount(draws.ravel(), minlength=n_resamples * n).reshape(n_resamples, n)
+    sums = weights @ np.column_stack([metrics["rounds_to_convergence"], metrics["converged"],
+                                      metrics["converged_blue"]])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        blue_share = sums[:, 2] / sums[:, 1]
+    return {
+        "avg_rounds_to_convergence": sums[:, 0] / n,
+        "convergence_rate": sums[:, 1] / n,
+        "blue_convergence_rate_given_convergence": blue_share
+    }
+
+
+def percentile_ci(replicates: np.ndarray, level: float = 0.95) -> Tuple[float, float]:
+    """Percentile bootstrap interval, ignoring undefined (NaN) replicates"""
+    replicates = replicates[~np.isnan(replicates)]
+    if len(replicates) == 0:
+        return float("nan"), float("nan")
+    low, high = np.percentile(replicates, [50 * (1 - level), 50 * (1 + level)])
+    return float(low), float(high)
+
+
+def bootstrap_difference(replicates_a: Dict[str, np.ndarray], replicates_b: Dict[str, np.ndarray],
+                         estimates_a: Dict[str, float], estimates_b: Dict[str, float],
+                         level: float = 0.95) -> Dict[str, Dict[str, float]]:
+    """Differences (a - b) of every statistic of two independent setups with percentile CIs"""
+    differences = {}
+    for metric in replicates_a:
+        low, high = percentile_ci(replicates_a[metric] - replicates_b[metric], level)
+        differences[metric] = {"difference": float(estimates_a[metric] - estimates_b[metric]),
+                               "ci_low": low, "ci_high": high}
+    return differences
@@ -0,0 +1,134 @@
+import numpy as np
+from typing import List, Dict, Any, Optional
+from stats import normal_quantile
+
+
+def kaplan_meier(times, events) -> Dict[str, np.ndarray]:
+    """Kaplan-Meier estimate of P(T > t) with Greenwood variance terms.
+
+    times: rounds at which each run converged or stopped; events: True if it converged
+    (False means right-censored at max_rounds). Returned arrays are indexed by the
+    distinct event times.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    events = np.asarray(events, dtype=bool)
+    event_times, deaths = np.unique(times[events], return_counts=True)
+    sorted_times = np.sort(times)
+    at_risk = len(times) - np.searchsorted(sorted_times, event_times, side="left")
+    survival = np.cumprod(1.0 - deaths / at_risk)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        greenwood_terms = deaths / (at_risk * (at_risk - deaths))
+    return {
+        "times": event_times,
+        "deaths": deaths,
+        "at_risk": at_risk,
+        "survival": survival,
+        "greenwood_cumsum": np.cumsum(greenwood_terms)
+    }
+
+
+def _survival_at(km: Dict[str, np.ndarray], t: float) -> float:
+    idx = np.searchsorted(km["times"], t, side="right") - 1
+    return 1.0 if idx < 0 else float(km["survival"][idx])
+
+
+def restricted_mean(km: Dict[str, np.ndarray], tau: float) -> Dict[str, float]:
+    """Restricted mean time to convergence E[min(T, tau)] (area under the KM curve) and its SE"""
+    keep = km["times"] <= tau
+    times, survival = km["times"][keep], km["survival"][keep]
+    edges = np.concatenate([[0.0], times, [tau]])
+    levels = np.concatenate([[1.0], survival])
+    areas = levels * np.diff(edges)
+    rmst = float(areas.sum())
+    # Area under the curve from each event time to tau
+    tail_areas = np.cumsum(areas[::-1])[::-1][1:]
+    deaths, at_risk = km["deaths"][keep], km["at_risk"][keep]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(at_risk > deaths, tail_areas ** 2 * deaths / (at_risk * (at_risk - deaths)), 0.0)
+    return {"mean": rmst, "se": float(np.sqrt(terms.sum()))}
+
+
+def median_time(km: Dict[str, np.ndarray], level: float = 0.95) -> Dict[str, Optional[float]]:
+    """KM median with a CI from the log(-log) pointwise band; None where the curve never reaches 0.5"""
+    z = normal_quantile(0.5 + level / 2)
+    survival = km["survival"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_survival = np.log(survival)
+        sigma = np.sqrt(km["greenwood_cumsum"]) / np.abs(log_survival)
+        lower = survival ** np.exp(z * sigma)
+        upper = survival ** np.exp(-z * sigma)
+    lower = np.where(survival > 0, lower, 0.0)
+    upper = np.where(survival > 0, upper, 0.0)
+
+    def first_below_half(curve):
+        hits = np.nonzero(curve <= 0.5)[0]
+        return float(km["times"][hits[0]]) if len(hits) else None
+
+    return {"median": first_below_half(survival),
+            "ci_low": first_below_half(lower),
+            "ci_high": first_below_half(upper)}
+
+
+def extrapolated_mean(times, events, km: Dict[str, np.ndarray], level: float = 0.95,
+                      tail_start: Optional[float] = None) -> Dict[str, Optional[float]]:
+    """Mean time to convergence with an exponential tail beyond the round budget.
+
+    Past `tail_start` (default: the KM median, capped at half the last observed time) the
+    hazard is taken as constant, estimated as tail events / tail exposure. The mean is the restricted mean up to
+    the last observed time plus S(t_last) / hazard. The normal CI adds the standard errors of
+    the parts (rather than their variances) because all three move together: a low hazard goes
+    with a high S(t_last) and a high restricted mean.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    events = np.asarray(events, dtype=bool)
+    t_last = float(times.max())
+    rmst = restricted_mean(km, t_last)
+    s_last = _survival_at(km, t_last)
+    z = normal_quantile(0.5 + level / 2)
+    if s_last == 0.0:
+        # Nothing censored at the end: the KM mean needs no extrapolation
+        half_width = z * rmst["se"]
+        return {"mean": rmst["mean"], "ci_low": rmst["mean"] - half_width,
+                "ci_high": rmst["mean"] + half_width, "tail_hazard": None}
+
+    if tail_start is None:
+        tail_start = min(median_time(km, level)["median"] or 0.0, t_last / 2)
+    in_tail = times > tail_start
+    tail_events = int((events & in_tail).sum())
+    exposure = float((times[in_tail] - tail_start).sum())
+    if tail_events == 0 or exposure <= 0:
+        return {"mean": None, "ci_low": rmst["mean"], "ci_high": None, "tail_hazard": None}
+
+    hazard = tail_events / exposure
+    tail_mean = s_last / hazard
+    mean = rmst["mean"] + tail_mean
+    # Delta method on log(S/h): SE(log S) from Greenwood, SE(log h) = 1/sqrt(d) for a Poisson count
+    idx = np.searchsorted(km["times"], t_last, side="right") - 1
+    var_log_s = float(km["greenwood_cumsum"][idx]) if idx >= 0 else 0.0
+    se = float(rmst["se"] + tail_mean * (np.sqrt(var_log_s) + 1.0 / np.sqrt(tail_events)))
+    return {"mean": mean, "ci_low": max(rmst["mean"], mean - z * se), "ci_high": mean + z * se,
+            "tail_hazard": hazard}
+
+
+def convergence_time_summary(runs_data: List[Dict[str, Any]], max_rounds: int,
+                             level: float = 0.95) -> Dict[str, Any]:
+    """Censoring-aware convergence-time statistics for one setup's runs"""
+    times = np.array([run["rounds_to_convergence"] for run in runs_data], dtype=np.float64)
+    events = np.array([run["converged"] for run in runs_data], dtype=bool)
+    if len(times) == 0:
+        return {}
+    km = kaplan_meier(times, events)
+    median = median_time(km, level)
+    rmst = restricted_mean(km, max_rounds)
+    tail = extrapolated_mean(times, events, km, level)
+    z = normal_quantile(0.5 + level / 2)
+    return {
+        "censored_runs": int((~events).sum()),
+        "km_median_rounds": median["median"],
+        "km_median_ci": [median["ci_low"], median["ci_high"]],
+        "restricted_mean_rounds": rmst["mean"],
+        "restricted_mean_ci": [rmst["mean"] - z * rmst["se"], rmst["mean"] + z * rmst["se"]],
+        "extrapolated_mean_rounds": tail["mean"],
+        "extrapolated_mean_ci": [tail["ci_low"], tail["ci_high"]],
+        "survival_curve": {"rounds": km["times"].tolist(), "survival": km["survival"].tolist()}
+    }
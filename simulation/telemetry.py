@@ -0,0 +1,254 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SweepTelemetry:
+    """Live progress of a sweep, fed by cheap periodic snapshots from the simulation loop.
+
+    All methods are thread-safe so the HTTP server can read while the sweep writes.
+    Events can also be delivered as tuples through `handle()` (e.g. from a worker queue).
+    """
+
+    def __init__(self, snapshot_every: int = 1000):
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.jobs_total = 0
+        self.jobs_done = 0
+        self.job_durations = []
+        self.setups: Dict[str, Dict[str, Any]] = {}
+        self.workers: Dict[str, Dict[str, Any]] = {}
+
+    def add_setup(self, setup_name: str, runs: int, max_rounds: int) -> None:
+        with self._lock:
+            self.jobs_total += runs
+            self.setups[setup_name] = {
+                "runs_total": runs,
+                "runs_done": 0,
+                "converged": 0,
+                "converged_blue": 0,
+                "max_rounds": max_rounds
+            }
+
+    def job_started(self, worker: str, setup_name: str, run_number: int, max_rounds: int) -> None:
+        now = time.time()
+        with self._lock:
+            state = self.workers.setdefault(worker, {"jobs_done": 0, "rounds_per_sec": 0.0})
+            state.update({
+                "setup": setup_name,
+                "run_number": run_number,
+                "round": 0,
+                "max_rounds": max_rounds,
+                "job_started_at": now,
+                "last_update": now
+            })
+
+    def progress(self, worker: str, rounds: int) -> None:
+        """Record a round-counter snapshot for the worker's in-flight run"""
+        now = time.time()
+        with self._lock:
+            state = self.workers.get(worker)
+            if state is None or state.get("setup") is None:
+                return
+            elapsed = now - state["last_update"]
+            if elapsed > 0 and rounds > state["round"]:
+                state["rounds_per_sec"] = (rounds - state["round"]) / elapsed
+            state["round"] = rounds
+            state["last_update"] = now
+
+    def job_finished(self, worker: str, setup_name: str, run_number: int,
+                     rounds: int, converged: bool, choice: Optional[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self.jobs_done += 1
+            setup = self.setups.get(setup_name)
+            if setup is not None:
+                setup["runs_done"] += 1
+                if converged:
+                    setup["converged"] += 1
+                    if choice == "Blue":
+                        setup["converged_blue"] += 1
+            state = self.workers.get(worker)
+            if state is not None and state.get("setup") is not None:
+                duration = now - state["job_started_at"]
+                self.job_durations.append(duration)
+                if duration > 0:
+                    state["rounds_per_sec"] = rounds / duration
+                state["jobs_done"] += 1
+                state.update({"setup": None, "run_number": None, "round": rounds, "last_update": now})
+
+    def handle(self, event: tuple) -> None:
+        """Dispatch an event tuple such as ("progress", worker, rounds)"""
+        kind, *args = event
+        getattr(self, kind)(*args)
+
+    def _eta_seconds(self, now: float) -> Optional[float]:
+        pending = self.jobs_total - self.jobs_done
+        if pending <= 0:
+            return 0.0
+        n_workers = max(1, len(self.workers))
+        mean_duration = (sum(self.job_durations) / len(self.job_durations)
+                         if self.job_durations else None)
+
+        in_flight_remaining = 0.0
+        in_flight = 0
+        for state in self.workers.values():
+            if state.get("setup") is None:
+                continue
+            in_flight += 1
+            elapsed = now - state["job_started_at"]
+            if mean_duration is not None:
+                in_flight_remaining += max(0.0, mean_duration - elapsed)
+            elif state["rounds_per_sec"] > 0:
+                # No finished job yet: assume the run goes to its round budget
+                in_flight_remaining += (state["max_rounds"] - state["round"]) / state["rounds_per_sec"]
+            else:
+                return None
+
+        queued = pending - in_flight
+        if queued > 0:
+            if mean_duration is None:
+                if in_flight == 0:
+                    return None
+                mean_duration = in_flight_remaining / in_flight
+            in_flight_remaining += queued * mean_duration
+        return in_flight_remaining / n_workers
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable view of the current progress"""
+        now = time.time()
+        with self._lock:
+            eta = self._eta_seconds(now)
+            setups = {}
+            for name, setup in self.setups.items():
+                done = setup["runs_done"]
+                setups[name] = dict(setup)
+                setups[name]["convergence_rate_so_far"] = setup["converged"] / done if done else None
+            workers = {}
+            for worker, state in self.workers.items():
+                workers[worker] = {
+                    "setup": state.get("setup"),
+                    "run_number": state.get("run_number"),
+                    "current_round": state.get("round") if state.get("setup") is not None else None,
+                    "max_rounds": state.get("max_rounds"),
+                    "rounds_per_sec": state["rounds_per_sec"],
+                    "jobs_done": state["jobs_done"]
+                }
+            return {
+                "elapsed_sec": now - self.started_at,
+                "jobs_total": self.jobs_total,
+                "jobs_done": self.jobs_done,
+                "jobs_pending": self.jobs_total - self.jobs_done,
+                "rounds_per_sec_total": sum(w["rounds_per_sec"] for w in workers.values()
+                                            if w["setup"] is not None),
+                "eta_sec": eta,
+                "projected_completion": (time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now + eta))
+                                         if eta is not None else None),
+                "workers": workers,
+                "setups": setups
+            }
+
+    def render_text(self) -> str:
+        """Plain-text rendering of `snapshot()`"""
+        snap = self.snapshot()
+        eta = snap["eta_sec"]
+        lines = [
+            f"Jobs: {snap['jobs_done']}/{snap['jobs_total']} done, {snap['jobs_pending']} pending",
+            f"Elapsed: {snap['elapsed_sec']:.0f}s, " +
+            f"ETA: {'unknown' if eta is None else f'{eta:.0f}s'} " +
+            f"(projected completion {snap['projected_completion'] or 'unknown'})",
+            f"Throughput: {snap['rounds_per_sec_total']:.0f} rounds/sec",
+            "",
+            "Workers:"
+        ]
+        for worker, state in sorted(snap["workers"].items()):
+            if state["setup"] is None:
+                lines.append(f"  {worker}: idle ({state['jobs_done']} jobs done)")
+            else:
+                lines.append(f"  {worker}: {state['setup']} run {state['run_number']}, " +
+                             f"round {state['current_round']}/{state['max_rounds']}, " +
+                             f"{state['rounds_per_sec']:.0f} rounds/sec")
+        lines.append("")
+        lines.append("Setups:")
+        for name, setup in snap["setups"].items():
+            rate = setup["convergence_rate_so_far"]
+            lines.append(f"  {name}: {setup['runs_done']}/{setup['runs_total']} runs, " +
+                         f"convergence so far: {'n/a' if rate is None else f'{rate:.2f}'}")
+        return "\n".join(lines) + "\n"
+
+
+class TelemetryServer:
+    """Local asyncio HTTP endpoint serving a SweepTelemetry.
+
+    GET /status (or /status.json) returns JSON, GET /status.txt returns plain text.
+    The server runs its own event loop in a daemon thread, so the sweep is never blocked.
+    """
+
+    def __init__(self, telemetry: SweepTelemetry, host: str = "127.0.0.1", port: int = 8765):
+        self.telemetry = telemetry
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, timeout: float = 10.0) -> "TelemetryServer":
+        """Start serving; re-raises the bind error (e.g. port in use) of a server that failed to start"""
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError(f"Telemetry server on {self.host}:{self.port} did not start within {timeout}s")
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+            # Pick up the real port when port=0 was requested
+            self.port = server.sockets[0].getsockname()[1]
+        except Exception as error:
+            self._error = error
+            return
+        finally:
+            self._ready.set()
+        async with server:
+            await self._stop.wait()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            # Drain the request headers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            path = request_line[1].split("?")[0] if len(request_line) > 1 else "/"
+
+            if path in ("/", "/status", "/status.json"):
+                status, content_type = "200 OK", "application/json"
+                body = json.dumps(self.telemetry.snapshot(), indent=2)
+            elif path == "/status.txt":
+                status, content_type = "200 OK", "text/plain; charset=utf-8"
+                body = self.telemetry.render_text()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "Not found\n"
+
+            payload = body.encode("utf-8")
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+            writer.write(payload)
+            await writer.drain()
+        finally:
+            writer.close()
@@ -0,0 +1,144 @@
+import random
+import numpy as np
+from typing import List, Dict, Any, Optional, Callable
+from environment import (
+    SignalCondition,
+    run_all_scenarios,
+    stream_seed
+)
+from stats import wilson_interval
+
+
+def strategy_mix_sweep(mix: Dict[Any, float], signal_condition: SignalCondition, max_rounds: int = 10000,
+                       params: Optional[Dict[Any, Dict[str, Any]]] = None) -> Callable[[int], Dict[str, Any]]:
+    """Setup factory over group size for a fixed strategy mix, e.g. {Strategy.HISTORY_BASED: 0.5, ...}.
+
+    Counts per strategy are the largest-remainder rounding of the fractions; params
+    optionally maps a strategy to its parameter overrides.
+    """
+    strategies = list(mix)
+    fractions = np.array([mix[strategy] for strategy in strategies], dtype=np.float64)
+    if np.any(fractions < 0) or fractions.sum() <= 0:
+        raise ValueError(f"Invalid strategy mix {mix}")
+    fractions = fractions / fractions.sum()
+
+    def make_setup(num_agents):
+        exact = fractions * int(num_agents)
+        counts = np.floor(exact).astype(int)
+        for i in np.argsort(counts - exact)[:int(num_agents) - counts.sum()]:
+            counts[i] += 1
+        agent_configs = []
+        for strategy, count in zip(strategies, counts):
+            agent_configs += [{"strategy_type": strategy, "params": dict((params or {}).get(strategy, {}))}
+                              for _ in range(count)]
+        return {"signal_condition": signal_condition, "max_rounds": max_rounds, "agent_configs": agent_configs}
+    return make_setup
+
+
+def find_critical_size(make_setup: Callable[[int], Dict[str, Any]], target_rate: float = 0.5,
+                       n_low: int = 2, n_high: int = 64, indifference: float = 0.1,
+                       alpha: float = 0.05, beta: float = 0.05, batch_size: int = 10,
+                       max_runs_per_probe: int = 400, engine: str = "scalar", n_workers: int = 1,
+                       seed: Optional[int] = None, level: float = 0.95) -> Dict[str, Any]:
+    """Smallest group size whose convergence rate (within max_rounds) is below target_rate.
+
+    Bisection over integer N in [n_low, n_high], assuming the convergence rate falls with N.
+    Each probe is a Wald sequential probability ratio test of p = target + indifference
+    ("coordinates") against p = target - indifference ("breaks down"), run in batches of
+    `batch_size` until it decides with error rates alpha/beta or reaches max_runs_per_probe
+    (then the point estimate decides and the probe is marked inconclusive).
+
+    Runs of size N always come from seeds stream_seed(seed, N, batch), so repeated probes
+    extend earlier data. The threshold CI combines per-size Wilson intervals: it starts
+    just above the largest probed N whose interval lies above the target, and ends at the
+    smallest probed N whose interval lies below it. To narrow it, the two sizes bracketing
+    the threshold get more runs until their intervals exclude the target (or the per-probe
+    run cap is reached).
+    """
+    if not 0 < target_rate < 1 or not 0 < indifference < min(target_rate, 1 - target_rate):
+        raise ValueError("Need 0 < target_rate - indifference < target_rate + indifference < 1")
+    if n_low >= n_high:
+        raise ValueError(f"Need n_low < n_high, got {n_low} and {n_high}")
+    base_seed = seed if seed is not None else random.getrandbits(63)
+    p_ok, p_broken = target_rate + indifference, target_rate - indifference
+    llr_converged = np.log(p_broken / p_ok)
+    llr_failed = np.log((1 - p_broken) / (1 - p_ok))
+    accept_broken, accept_ok = np.log((1 - beta) / alpha), np.log(beta / (1 - alpha))
+
+    probes: Dict[int, Dict[str, Any]] = {}
+    path: List[int] = []
+
+    def run_batch(num_agents: int, state: Dict[str, Any]) -> None:
+        setup = dict(make_setup(num_agents), name=f"{num_agents} agents", runs_per_setup=batch_size)
+        results = run_all_scenarios([setup], engine=engine, n_workers=n_workers,
+                                    seed=stream_seed(base_seed, num_agents, state["batches"]))
+        runs_data = results[setup["name"]]["runs_data"]
+        state["runs"] += len(runs_data)
+        state["converged"] += sum(1 for run in runs_data if run["converged"])
+        state["batches"] += 1
+
+    def probe(num_agents: int) -> bool:
+        """True if the convergence rate at num_agents is below the target"""
+        path.append(num_agents)
+        state = probes.setdefault(num_agents, {"runs": 0, "converged": 0, "batches": 0})
+        while True:
+            failed = state["runs"] - state["converged"]
+            llr = state["converged"] * llr_converged + failed * llr_failed
+            if llr >= accept_broken or llr <= accept_ok or state["runs"] >= max_runs_per_probe:
+                break
+            run_batch(num_agents, state)
+        state["llr"] = float(llr)
+        state["conclusive"] = bool(llr >= accept_broken or llr <= accept_ok)
+        state["below_target"] = bool(llr >= accept_broken if state["conclusive"]
+                                     else state["converged"] < target_rate * state["runs"])
+        return state["below_target"]
+
+    threshold = None
+    if probe(n_low):
+        threshold = n_low
+    elif probe(n_high):
+        low, high = n_low, n_high
+        while high - low > 1:
+            mid = (low + high) // 2
+            if probe(mid):
+                high = mid
+            else:
+                low = mid
+        threshold = high
+
+    # Sharpen the CI: add runs on both sides of the threshold until their intervals exclude the target
+    for num_agents in ([threshold - 1, threshold] if threshold is not None and threshold > n_low else []):
+        state = probes.get(num_agents)
+        if state is None:
+            continue
+        while (state["runs"] < max_runs_per_probe and
+               wilson_interval(state["converged"], state["runs"], level)[0] < target_rate <=
+               wilson_interval(state["converged"], state["runs"], level)[1]):
+            run_batch(num_agents, state)
+
+    for num_agents, state in probes.items():
+        state["convergence_rate"] = state["converged"] / state["runs"]
+        state["convergence_rate_ci"] = list(wilson_interval(state["converged"], state["runs"], level))
+    above = [n for n, state in probes.items() if state["convergence_rate_ci"][0] >= target_rate]
+    below = [n for n, state in probes.items() if state["convergence_rate_ci"][1] < target_rate]
+    ci = [max(above) + 1 if above else n_low, min(below) if below else None]
+    runs_used = sum(state["runs"] for state in probes.values())
+
+    print(f"\nCritical group size (convergence rate < {target_rate:.2f}): " +
+          f"{'not found up to ' + str(n_high) if threshold is None else threshold}, " +
+          f"CI {ci}, {runs_used} runs over {len(probes)} sizes")
+    for num_agents in sorted(probes):
+        state = probes[num_agents]
+        print(f"  N={num_agents}: {state['runs']} runs, rate {state['convergence_rate']:.2f} " +
+              f"[{state['convergence_rate_ci'][0]:.2f}, {state['convergence_rate_ci'][1]:.2f}], " +
+              f"{'below' if state['below_target'] else 'above'} target" +
+              ("" if state["conclusive"] else " (inconclusive)"))
+    return {
+        "threshold": threshold,
+        "threshold_ci": ci,
+        "target_rate": target_rate,
+        "probes": {n: probes[n] for n in sorted(probes)},
+        "probe_order": path,
+        "runs_used": runs_used,
+        "seed": base_seed
+    }